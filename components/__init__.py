@@ -2,5 +2,6 @@ from .student_card import StudentCard
 from .grade_table import GradeTable
 from .charts import ChartBuilder
 from .wheel_picker import WheelPicker
+from .virtual_list import VirtualList
 
-__all__ = ['StudentCard', 'GradeTable', 'ChartBuilder', 'WheelPicker']
+__all__ = ['StudentCard', 'GradeTable', 'ChartBuilder', 'WheelPicker', 'VirtualList']
@@ -1,16 +1,35 @@
 """
 Toplu not girişi tablosu bileşeni.
 Tab/Enter ile hızlı navigasyon destekli.
+Otomatik kayıtta düzenlemeler tabloda biriktirilir ve kısa bir bekleme
+sonrası (veya belirli sayıya ulaşınca) yazma kuyruğuna tek işlem olarak
+gönderilir; giriş sırasında diske yazma beklenmez.
 """
+import threading
 import flet as ft
+from database import instrumentation
 from utils.helpers import validate_grade, get_grade_color
+from .row_reconciler import RowReconciler
+
+
+# Otomatik kayıt: son düzenlemeden sonra bekleme (sn) ve bekletmeden yazılan düzenleme sayısı
+_KAYIT_BEKLEMESI = 0.5
+_MAX_BEKLEYEN = 20
+
+# Hücre durumlarının kenarlık renkleri
+_DURUM_RENKLERI = {
+    None: ft.colors.BLUE_400,
+    'bekliyor': ft.colors.AMBER_700,
+    'kaydedildi': ft.colors.GREEN_400,
+    'hata': ft.colors.RED,
+}
 
 
 class GradeTable(ft.Container):
     """Toplu not girişi tablosu."""
     
     def __init__(self, db_manager, sinif_id, baslik_id=None, on_save=None, 
-                 baslik_ids=None, baslik_name=None):
+                 baslik_ids=None, baslik_name=None, autosave=True):
         super().__init__()
         self.db = db_manager
         self.sinif_id = sinif_id
@@ -24,184 +43,42 @@ class GradeTable(ft.Container):
         self.has_changes = False
         self.sort_column = "number" # number, class, name
         self.sort_descending = False
+        self.autosave = autosave
+        self._bekleyenler = {}  # {ogrenci_id: puan} - henüz yazılmamış düzenlemeler
+        self._gecersizler = set()  # Geçersiz değer girilmiş (kaydedilmemiş) hücreler
+        self._zamanlayici = None
+        self._kilit = threading.Lock()
         self._build_content()
     
     def _build_content(self):
         # Tüm sınıflar modu mu?
-        is_all_mode = self.sinif_id == "all" and self.baslik_ids
+        self.is_all_mode = self.sinif_id == "all" and self.baslik_ids
         
-        if is_all_mode:
-            # Tüm sınıflardaki öğrencileri al
-            ogrenciler = self.db.get_all_ogrenciler(None)  # Tüm öğrenciler
-            baslik_text = self.baslik_name or "Tüm Sınıflar"
-            
-            # Öğrenci-başlık id eşleştirmesi
-            ogrenci_baslik_map = {}
-            for baslik_id in self.baslik_ids:
-                basliklar = self.db.get_not_basliklari()
-                baslik = next((b for b in basliklar if b['id'] == baslik_id), None)
-                if baslik and baslik.get('sinif_id'):
-                    # Bu başlık hangi sınıfa ait
-                    sinif_ogrenciler = self.db.get_all_ogrenciler(baslik['sinif_id'])
-                    for og in sinif_ogrenciler:
-                        ogrenci_baslik_map[og['id']] = baslik_id
-            
-            # Mevcut notları al - her baslik_id için
-            mevcut_notlar = {}
-            for ogrenci in ogrenciler:
-                baslik_id = ogrenci_baslik_map.get(ogrenci['id'])
-                if baslik_id:
-                    notlar = self.db.get_notlar(ogrenci_id=ogrenci['id'], baslik_id=baslik_id)
-                    if notlar:
-                        mevcut_notlar[ogrenci['id']] = {
-                            'puan': notlar[0]['puan'],
-                            'baslik_id': baslik_id
-                        }
-                    else:
-                        mevcut_notlar[ogrenci['id']] = {
-                            'puan': None,
-                            'baslik_id': baslik_id
-                        }
-        else:
-            # Tek sınıf modu
-            ogrenciler = self.db.get_all_ogrenciler(self.sinif_id)
-            
-            # Not başlığı bilgisi
-            basliklar = self.db.get_not_basliklari()
-            baslik = next((b for b in basliklar if b['id'] == self.baslik_id), None)
-            baslik_text = baslik['baslik'] if baslik else 'Bilinmeyen Başlık'
-            
-            # Mevcut notları al
-            mevcut_notlar = {}
-            for ogrenci in ogrenciler:
-                notlar = self.db.get_notlar(ogrenci_id=ogrenci['id'], baslik_id=self.baslik_id)
-                if notlar:
-                    mevcut_notlar[ogrenci['id']] = {
-                        'puan': notlar[0]['puan'],
-                        'baslik_id': self.baslik_id
-                    }
-                else:
-                    mevcut_notlar[ogrenci['id']] = {
-                        'puan': None,
-                        'baslik_id': self.baslik_id
-                    }
-            
-            ogrenci_baslik_map = {og['id']: self.baslik_id for og in ogrenciler}
-        
-        # Sıralama
-        def get_sort_key(o):
-            if self.sort_column == "number":
-                try:
-                    return int(o.get('okul_no') or 0)
-                except ValueError:
-                    return 0
-            elif self.sort_column == "name":
-                return o.get('ad', '').lower()
-            elif self.sort_column == "class":
-                return o.get('sinif_adi', '').lower()
-            return 0
-            
-        ogrenciler.sort(key=get_sort_key, reverse=self.sort_descending)
-        
-        # Öğrenci satırları
-        rows = []
-        self.input_refs = []
-        
-        # Başlık satırı - Tüm sınıflar modunda Sınıf sütunu ekle
-        # Başlık satırı - Tüm sınıflar modunda Sınıf sütunu ekle
-        header_cols = [
-            ft.Container(ft.Text("#", weight=ft.FontWeight.BOLD), width=40),
-            ft.Container(self._create_header_button("Okul No", "number"), width=80),
-        ]
-        if is_all_mode:
-            header_cols.append(ft.Container(self._create_header_button("Sınıf", "class"), width=80))
-        header_cols.extend([
-            ft.Container(self._create_header_button("Ad Soyad", "name"), expand=True),
-            ft.Container(ft.Text("Not", weight=ft.FontWeight.BOLD), width=120),
-            ft.Container(ft.Text("Durum", weight=ft.FontWeight.BOLD), width=100),
-        ])
+        # Öğrenci satırları id'ye göre yeniden kullanılır (bkz. refresh, _sort_table)
+        self._satirlar = RowReconciler(
+            self._not_satiri,
+            self._not_satirini_doldur,
+            anahtar=lambda oge: oge['ogrenci']['id'],
+        )
         
-        header_row = ft.Container(
-            content=ft.Row(header_cols),
+        self.header_row = ft.Container(
+            content=ft.Row(self._header_cols()),
             bgcolor=ft.colors.SURFACE_VARIANT,
             padding=ft.padding.symmetric(horizontal=10, vertical=8),
             border_radius=ft.border_radius.only(top_left=5, top_right=5),
         )
-        rows.append(header_row)
-        
-        for i, ogrenci in enumerate(ogrenciler):
-            not_bilgi = mevcut_notlar.get(ogrenci['id'], {'puan': None, 'baslik_id': None})
-            mevcut_not = not_bilgi['puan']
-            baslik_id_for_ogrenci = not_bilgi.get('baslik_id') or ogrenci_baslik_map.get(ogrenci['id'], self.baslik_id)
-            
-            # Not input
-            grade_input = ft.TextField(
-                value=str(int(mevcut_not)) if mevcut_not is not None else "",
-                width=100,
-                content_padding=ft.padding.symmetric(horizontal=10, vertical=15),
-                text_align=ft.TextAlign.CENTER,
-                keyboard_type=ft.KeyboardType.NUMBER,
-                on_change=lambda e, oid=ogrenci['id']: self._on_grade_change(e, oid),
-                on_submit=lambda e, idx=i: self._move_to_next(idx),
-                hint_text="Not",
-                border_color=ft.colors.BLUE_400,
-                focused_border_color=ft.colors.BLUE_700,
-                border_width=2,
-            )
-            
-            self.input_refs.append(grade_input)
-            self.grade_inputs[ogrenci['id']] = {
-                'input': grade_input,
-                'baslik_id': baslik_id_for_ogrenci
-            }
-            
-            # Satır sütunları
-            row_cols = [
-                ft.Container(
-                    ft.Text(str(i + 1), text_align=ft.TextAlign.CENTER),
-                    width=40,
-                ),
-                ft.Container(
-                    ft.Text(ogrenci['okul_no'] or '-'),
-                    width=80,
-                ),
-            ]
-            if is_all_mode:
-                row_cols.append(ft.Container(
-                    ft.Text(ogrenci.get('sinif_adi', '-'), size=11),
-                    width=80,
-                ))
-            row_cols.extend([
-                ft.Container(
-                    ft.Text(f"{ogrenci['ad']} {ogrenci['soyad']}"),
-                    expand=True,
-                ),
-                ft.Container(
-                    grade_input,
-                    width=120,
-                ),
-                ft.Container(
-                    ft.Container(
-                        content=ft.Text(
-                            self._get_status_text(mevcut_not),
-                            size=12,
-                            color=ft.colors.WHITE,
-                        ),
-                        bgcolor=self._get_status_color(mevcut_not),
-                        border_radius=5,
-                        padding=ft.padding.symmetric(horizontal=8, vertical=4),
-                    ),
-                    width=100,
-                ),
-            ])
-            
-            # Satır
-            row = ft.Container(
-                content=ft.Row(row_cols, vertical_alignment=ft.CrossAxisAlignment.CENTER),
-                padding=ft.padding.symmetric(horizontal=10, vertical=8),
-                bgcolor=ft.colors.SURFACE_VARIANT if i % 2 == 0 else None,
-            )
-            rows.append(row)
+        self.rows_column = ft.Column(
+            [self.header_row],
+            spacing=0,
+            scroll=ft.ScrollMode.AUTO,
+        )
+        self.baslik_text = ft.Text("", size=18, weight=ft.FontWeight.BOLD)
+        self.total_text = ft.Text("", weight=ft.FontWeight.BOLD, color=ft.colors.GREY_700)
+        self.autosave_switch = ft.Switch(
+            label="Otomatik kaydet",
+            value=self.autosave,
+            on_change=self._on_autosave_toggle,
+        )
         
         # Kısayol bilgisi
         shortcut_info = ft.Container(
@@ -220,8 +97,9 @@ class GradeTable(ft.Container):
             ft.Container(
                 content=ft.Row([
                     ft.Icon(ft.icons.EDIT_NOTE, color=ft.colors.PRIMARY),
-                    ft.Text(baslik_text, size=18, weight=ft.FontWeight.BOLD),
+                    self.baslik_text,
                     ft.Container(expand=True),
+                    self.autosave_switch,
                     ft.ElevatedButton(
                         "Kaydet",
                         icon=ft.icons.SAVE,
@@ -237,11 +115,7 @@ class GradeTable(ft.Container):
             
             # Tablo
             ft.Container(
-                content=ft.Column(
-                    rows,
-                    spacing=0,
-                    scroll=ft.ScrollMode.AUTO,
-                ),
+                content=self.rows_column,
                 expand=True,
                 border=ft.border.all(1, ft.colors.OUTLINE_VARIANT),
                 border_radius=ft.border_radius.only(bottom_left=5, bottom_right=5),
@@ -251,24 +125,307 @@ class GradeTable(ft.Container):
             ft.Row([
                 shortcut_info,
                 ft.Container(expand=True),
-                ft.Text(f"Toplam: {len(ogrenciler)} öğrenci", 
-                       weight=ft.FontWeight.BOLD, color=ft.colors.GREY_700),
+                self.total_text,
             ]),
         ], spacing=0, expand=True)
         self.expand = True
+        self._load_rows()
+    
+    def _header_cols(self):
+        """Başlık satırının sütunları - Tüm sınıflar modunda Sınıf sütunu eklenir."""
+        header_cols = [
+            ft.Container(ft.Text("#", weight=ft.FontWeight.BOLD), width=40),
+            ft.Container(self._create_header_button("Okul No", "number"), width=80),
+        ]
+        if self.is_all_mode:
+            header_cols.append(ft.Container(self._create_header_button("Sınıf", "class"), width=80))
+        header_cols.extend([
+            ft.Container(self._create_header_button("Ad Soyad", "name"), expand=True),
+            ft.Container(ft.Text("Not", weight=ft.FontWeight.BOLD), width=120),
+            ft.Container(ft.Text("Durum", weight=ft.FontWeight.BOLD), width=100),
+        ])
+        return header_cols
+    
+    def _load_rows(self):
+        """Not çizelgesini okur ve satırları öğrenci id'sine göre eşitler."""
+        if self.is_all_mode:
+            # Tüm sınıflardaki öğrenciler ve başlıklar tek sorguda
+            matris = self.db.get_not_matrisi(None, self.baslik_ids, *self._siralama())
+            baslik_text = self.baslik_name or "Tüm Sınıflar"
+            
+            # Öğrenci-başlık id eşleştirmesi: her öğrenci kendi sınıfının başlığına not alır
+            sinif_sutun = {
+                b['sinif_id']: j for j, b in enumerate(matris['basliklar']) if b.get('sinif_id')
+            }
+        else:
+            # Tek sınıf modu
+            matris = self.db.get_not_matrisi(self.sinif_id, [self.baslik_id], *self._siralama())
+            
+            # Not başlığı bilgisi
+            basliklar = matris['basliklar']
+            baslik_text = basliklar[0]['baslik'] if basliklar else 'Bilinmeyen Başlık'
+            sinif_sutun = None
+        
+        # Satır verileri: öğrenci, mevcut not ve notun yazılacağı başlık
+        ogeler = []
+        for ogrenci, puanlar in zip(matris['ogrenciler'], matris['puanlar']):
+            if sinif_sutun is None:
+                j = 0 if matris['basliklar'] else None
+            else:
+                j = sinif_sutun.get(ogrenci['sinif_id'])
+            ogeler.append({
+                'ogrenci': ogrenci,
+                'puan': puanlar[j] if j is not None else None,
+                'baslik_id': matris['basliklar'][j]['id'] if j is not None else self.baslik_id,
+            })
+        
+        satirlar = self._satirlar.reconcile(ogeler)
+        self.rows_column.controls = [self.header_row, *satirlar]
+        self.input_refs = [satir.data['input'] for satir in satirlar]
+        self.grade_inputs = {
+            oge['ogrenci']['id']: {'input': satir.data['input'], 'baslik_id': oge['baslik_id']}
+            for oge, satir in zip(ogeler, satirlar)
+        }
+        self.baslik_text.value = baslik_text
+        self.total_text.value = f"Toplam: {len(ogeler)} öğrenci"
+    
+    def _not_satiri(self):
+        """Boş not satırı; hücreler _not_satirini_doldur ile ayarlanır."""
+        grade_input = ft.TextField(
+            value="",
+            width=100,
+            content_padding=ft.padding.symmetric(horizontal=10, vertical=15),
+            text_align=ft.TextAlign.CENTER,
+            keyboard_type=ft.KeyboardType.NUMBER,
+            hint_text="Not",
+            border_color=ft.colors.BLUE_400,
+            focused_border_color=ft.colors.BLUE_700,
+            border_width=2,
+        )
+        hucreler = {
+            'sira': ft.Text(text_align=ft.TextAlign.CENTER),
+            'okul_no': ft.Text(),
+            'sinif': ft.Text(size=11),
+            'ad': ft.Text(),
+            'input': grade_input,
+            'durum': ft.Text(size=12, color=ft.colors.WHITE),
+            'kayitli': None,  # Veritabanındaki değer; kullanıcı değiştirmediyse yenilenir
+        }
+        hucreler['durum_kutu'] = ft.Container(
+            content=hucreler['durum'],
+            border_radius=5,
+            padding=ft.padding.symmetric(horizontal=8, vertical=4),
+        )
+        
+        # Satır sütunları
+        row_cols = [
+            ft.Container(hucreler['sira'], width=40),
+            ft.Container(hucreler['okul_no'], width=80),
+        ]
+        if self.is_all_mode:
+            row_cols.append(ft.Container(hucreler['sinif'], width=80))
+        row_cols.extend([
+            ft.Container(hucreler['ad'], expand=True),
+            ft.Container(grade_input, width=120),
+            ft.Container(hucreler['durum_kutu'], width=100),
+        ])
+        
+        return ft.Container(
+            content=ft.Row(row_cols, vertical_alignment=ft.CrossAxisAlignment.CENTER),
+            padding=ft.padding.symmetric(horizontal=10, vertical=8),
+            data=hucreler,
+        )
+    
+    def _not_satirini_doldur(self, satir, sira, oge):
+        """Satırı öğeye göre ayarlar; kullanıcının kaydedilmemiş girişine dokunmaz."""
+        hucreler = satir.data
+        ogrenci = oge['ogrenci']
+        mevcut_not = oge['puan']
+        
+        hucreler['sira'].value = str(sira + 1)
+        hucreler['okul_no'].value = ogrenci['okul_no'] or '-'
+        hucreler['sinif'].value = ogrenci.get('sinif_adi') or '-'
+        hucreler['ad'].value = f"{ogrenci['ad']} {ogrenci['soyad']}"
+        hucreler['durum'].value = self._get_status_text(mevcut_not)
+        hucreler['durum_kutu'].bgcolor = self._get_status_color(mevcut_not)
+        
+        grade_input = hucreler['input']
+        kayitli = str(int(mevcut_not)) if mevcut_not is not None else ""
+        if hucreler['kayitli'] is None or grade_input.value == hucreler['kayitli']:
+            grade_input.value = kayitli
+        hucreler['kayitli'] = kayitli
+        grade_input.on_change = lambda e, oid=ogrenci['id']: self._on_grade_change(e, oid)
+        grade_input.on_submit = lambda e, idx=sira: self._move_to_next(idx)
+        
+        satir.bgcolor = ft.colors.SURFACE_VARIANT if sira % 2 == 0 else None
+    
+    def refresh(self):
+        """Notları yeniden okur; yalnızca değişen hücreler istemciye gönderilir."""
+        self._load_rows()
+        if self.page:
+            self.update()
     
     def _on_grade_change(self, e, ogrenci_id):
-        """Not değiştiğinde çağrılır."""
+        """
+        Not değiştiğinde çağrılır. Otomatik kayıtta geçerli değer, temizlenen
+        hücre için de notun silinmesi kuyruğa alınır; geçersiz değer yazılmaz.
+        """
         self.has_changes = True
         
         # Renk güncelle
         value = validate_grade(e.control.value)
-        if e.control.value and value is None:
-            e.control.border_color = ft.colors.RED
+        if (e.control.value or '').strip() and value is None:
+            e.control.border_color = _DURUM_RENKLERI['hata']
+            # Önceki geçerli değer de yazılmasın; hücre düzeltilene kadar kayıtsız kalır
+            with self._kilit:
+                self._bekleyenler.pop(ogrenci_id, None)
+                self._gecersizler.add(ogrenci_id)
+            e.control.update()
+            return
+        
+        with self._kilit:
+            self._gecersizler.discard(ogrenci_id)
+        if self.autosave:
+            e.control.border_color = _DURUM_RENKLERI['bekliyor']
+            self._kuyruga_al(ogrenci_id, value)
         else:
-            e.control.border_color = ft.colors.BLUE_400
+            e.control.border_color = _DURUM_RENKLERI[None]
         e.control.update()
     
+    # ==================== OTOMATİK KAYIT ====================
+    
+    def _kuyruga_al(self, ogrenci_id, puan):
+        """
+        Düzenlemeyi biriktirir (puan None: not silinir); bekleme süresi
+        dolunca veya kuyruk dolunca yazılır.
+        """
+        with self._kilit:
+            self._bekleyenler[ogrenci_id] = puan
+            if self._zamanlayici:
+                self._zamanlayici.cancel()
+                self._zamanlayici = None
+            dolu = len(self._bekleyenler) >= _MAX_BEKLEYEN
+            if not dolu:
+                self._zamanlayici = threading.Timer(_KAYIT_BEKLEMESI, self.flush)
+                self._zamanlayici.daemon = True
+                self._zamanlayici.start()
+        if dolu:
+            self.flush()
+    
+    def flush(self):
+        """
+        Bekleyen düzenlemeleri yazma kuyruğuna tek işlem (tek geri alma adımı)
+        olarak gönderir ve beklemeden Future döndürür; bekleyen yoksa None.
+        """
+        with self._kilit:
+            if self._zamanlayici:
+                self._zamanlayici.cancel()
+                self._zamanlayici = None
+            bekleyenler, self._bekleyenler = self._bekleyenler, {}
+        
+        kayitlar = [
+            (ogrenci_id, self.grade_inputs[ogrenci_id]['baslik_id'], puan)
+            for ogrenci_id, puan in bekleyenler.items()
+            if ogrenci_id in self.grade_inputs and self.grade_inputs[ogrenci_id]['baslik_id']
+        ]
+        if not kayitlar:
+            return None
+        
+        future = self.db.submit_write(self._bekleyenleri_yaz, kayitlar)
+        future.add_done_callback(lambda f: self._flush_tamamlandi(f, kayitlar))
+        return future
+    
+    def _bekleyenleri_yaz(self, kayitlar):
+        """
+        Notları yazar, puanı None olan (temizlenen) hücrelerin notlarını siler;
+        hepsi tek geri alma adımıdır. Yazılan not sayısını döndürür.
+        """
+        silinecekler = [(ogrenci_id, baslik_id) for ogrenci_id, baslik_id, puan in kayitlar if puan is None]
+        if not silinecekler:
+            return self.db.upsert_notlar(kayitlar)
+        
+        notlar = [kayit for kayit in kayitlar if kayit[2] is not None]
+        with self.db.undo_grubu():
+            for ogrenci_id, baslik_id in silinecekler:
+                self.db.delete_not(ogrenci_id, baslik_id)
+            return self.db.upsert_notlar(notlar) if notlar else 0
+    
+    def _yeniden_kuyruga_al(self, kayitlar):
+        """
+        Yazılamayan kayıtları bekleyenlere geri koyar; bu arada yeniden
+        düzenlenen (bekleyen veya geçersiz) hücrelerin yeni değeri korunur.
+        """
+        with self._kilit:
+            for ogrenci_id, _, puan in kayitlar:
+                if ogrenci_id not in self._bekleyenler and ogrenci_id not in self._gecersizler:
+                    self._bekleyenler[ogrenci_id] = puan
+            self.has_changes = True
+    
+    def _flush_tamamlandi(self, future, kayitlar):
+        # Yazıcı thread'inde çağrılır; ekran güncellemesi UI döngüsüne bırakılır.
+        # Başarısız kayıtlar tablo kapatılmış olsa da sonraki flush'a kalır
+        if future.exception() is not None:
+            self._yeniden_kuyruga_al(kayitlar)
+        # Tablo bu arada sayfadan kaldırılabilir; page bir kez okunur
+        page = self.page
+        if page:
+            page.run_task(self._flush_sonucunu_goster, page, future.exception(), kayitlar)
+    
+    async def _flush_sonucunu_goster(self, page, hata, kayitlar):
+        """Yazılan hücreleri kaydedildi (veya hatalı) olarak işaretler."""
+        if self.page is None:
+            # Görev sırasını beklerken tablo kapatıldı; hata yine de bildirilir
+            if hata is not None:
+                self._otomatik_kayit_hatasi(page, hata)
+            return
+        
+        for ogrenci_id, _, puan in kayitlar:
+            satir = self._satirlar.get(ogrenci_id)
+            if satir is None:
+                continue
+            hucreler = satir.data
+            grade_input = hucreler['input']
+            if hata is not None:
+                grade_input.border_color = _DURUM_RENKLERI['hata']
+                continue
+            # Yazılırken değer yeniden değiştiyse hücre beklemede kalır
+            guncel = (grade_input.value or '').strip()
+            if puan is None:
+                ok = not guncel
+            else:
+                ok = validate_grade(guncel) == puan
+            if ok:
+                grade_input.border_color = _DURUM_RENKLERI['kaydedildi']
+            hucreler['kayitli'] = str(int(puan)) if puan is not None else ""
+            hucreler['durum'].value = self._get_status_text(puan)
+            hucreler['durum_kutu'].bgcolor = self._get_status_color(puan)
+        
+        if hata is not None:
+            self._otomatik_kayit_hatasi(page, hata)
+            return
+        
+        with self._kilit:
+            self.has_changes = bool(self._bekleyenler or self._gecersizler)
+        self.update()
+        if self.on_save:
+            self.on_save()
+    
+    @staticmethod
+    def _otomatik_kayit_hatasi(page, hata):
+        """Otomatik kayıt hatasını sayfada gösterir."""
+        page.snack_bar = ft.SnackBar(
+            content=ft.Text(f"Otomatik kayıt başarısız: {hata}"),
+            bgcolor=ft.colors.RED_400
+        )
+        page.snack_bar.open = True
+        page.update()
+    
+    def _on_autosave_toggle(self, e):
+        """Otomatik kayıt kapatılırken bekleyenler yazılır."""
+        self.autosave = e.control.value
+        if not self.autosave:
+            self.flush()
+    
     def _move_to_next(self, current_index):
         """Sonraki inputa geçer."""
         next_index = current_index + 1
@@ -310,9 +467,21 @@ class GradeTable(ft.Container):
             return ft.colors.RED
     
     def _save_grades(self, e):
-        """Notları kaydeder."""
+        """
+        Tüm girişleri kaydeder. Geçersiz değerler işaretlenip atlanır;
+        geçerli olanlar yine de kaydedilir.
+        """
+        # Bekleyen otomatik kayıtlar (temizlenen hücrelerin silinmesi dahil) bu kayda dahildir
+        with self._kilit:
+            if self._zamanlayici:
+                self._zamanlayici.cancel()
+                self._zamanlayici = None
+            silinecekler = {ogrenci_id for ogrenci_id, puan in self._bekleyenler.items() if puan is None}
+            self._bekleyenler = {}
+        
         errors = []
-        saved_count = 0
+        gecersizler = set()
+        kayitlar = []
         
         for ogrenci_id, data in self.grade_inputs.items():
             input_field = data['input']
@@ -325,34 +494,50 @@ class GradeTable(ft.Container):
             if value:
                 grade = validate_grade(value)
                 if grade is None:
-                    errors.append(f"Geçersiz not değeri: {value}")
+                    errors.append(value)
+                    gecersizler.add(ogrenci_id)
+                    input_field.border_color = _DURUM_RENKLERI['hata']
                 else:
-                    self.db.add_or_update_not(ogrenci_id, baslik_id, grade)
-                    saved_count += 1
+                    kayitlar.append((ogrenci_id, baslik_id, grade))
+            elif ogrenci_id in silinecekler:
+                kayitlar.append((ogrenci_id, baslik_id, None))
+        with self._kilit:
+            self._gecersizler = gecersizler
         
-        if errors:
-            if hasattr(self, 'page') and self.page:
-                self.page.snack_bar = ft.SnackBar(
-                    content=ft.Text(f"Hatalar: {', '.join(errors)}"),
-                    bgcolor=ft.colors.RED_400
-                )
-                self.page.snack_bar.open = True
-                self.page.update()
-            return
+        saved_count = 0
+        if kayitlar:
+            try:
+                with instrumentation.action('_save_grades'):
+                    # Tüm notlar tek işlemde kaydedilir, tek adımda geri alınır
+                    saved_count = self._bekleyenleri_yaz(kayitlar)
+            except Exception as err:
+                # Silinecekler de kaybolmasın; sonraki kayıtta yeniden denenir
+                self._yeniden_kuyruga_al(kayitlar)
+                if self.page:
+                    self.page.snack_bar = ft.SnackBar(
+                        content=ft.Text(f"Kayıt başarısız: {err}"),
+                        bgcolor=ft.colors.RED_400
+                    )
+                    self.page.snack_bar.open = True
+                    self.page.update()
+                return
         
-        if saved_count > 0:
+        if not errors:
             self.has_changes = False
-            
-            if hasattr(self, 'page') and self.page:
-                self.page.snack_bar = ft.SnackBar(
-                    content=ft.Text(f"✓ {saved_count} not kaydedildi!"),
-                    bgcolor=ft.colors.GREEN_400
-                )
-                self.page.snack_bar.open = True
-                self.page.update()
-            
-            if self.on_save:
-                self.on_save()
+        
+        if hasattr(self, 'page') and self.page and (errors or saved_count > 0):
+            mesaj = f"✓ {saved_count} not kaydedildi!"
+            if errors:
+                mesaj = f"{saved_count} not kaydedildi. Geçersiz değerler atlandı: {', '.join(errors)}"
+            self.page.snack_bar = ft.SnackBar(
+                content=ft.Text(mesaj),
+                bgcolor=ft.colors.ORANGE_400 if errors else ft.colors.GREEN_400
+            )
+            self.page.snack_bar.open = True
+            self.page.update()
+        
+        if saved_count > 0 and self.on_save:
+            self.on_save()
     
     def focus_first(self):
         """İlk inputa focus ver."""
@@ -379,13 +564,21 @@ class GradeTable(ft.Container):
             border_radius=4,
         )
 
+    def _siralama(self):
+        """Seçili sütunun SQL sıralaması: (siralama, azalan)."""
+        siralama = {"number": "okul_no", "name": "ad", "class": "sinif"}[self.sort_column]
+        return siralama, self.sort_descending
+    
     def _sort_table(self, column):
-        """Tabloyu sütuna göre sıralar."""
+        """Tabloyu sütuna göre sıralar (sıralama SQL'de yapılır)."""
         if self.sort_column == column:
             self.sort_descending = not self.sort_descending
         else:
             self.sort_column = column
             self.sort_descending = False
             
-        self.controls = [self.build()]
+        # Ok işaretleri için başlık yeniden kurulur; satırlar yerinde yeniden
+        # sıralanır, kaydedilmemiş girişler aynı TextField'larda kalır
+        self.header_row.content = ft.Row(self._header_cols())
+        self._load_rows()
         self.update()
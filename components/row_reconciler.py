@@ -0,0 +1,60 @@
+"""
+Anahtarlı satır eşitleme.
+Liste yenilenirken satır kontrollerini baştan kurmak yerine eski kontrolleri
+anahtarlarına (ör. öğrenci id) göre yeniden kullanır. Flet yalnızca değişen
+özellikleri ve listedeki yer değişikliklerini istemciye gönderdiğinden, tek
+bir notun değişmesi ya da bir geri alma küçük bir güncelleme olarak gider.
+"""
+
+
+def _id_anahtari(oge):
+    return oge['id']
+
+
+class RowReconciler:
+    """Satır kontrollerini anahtara göre saklayıp yeniden kullanan yardımcı."""
+    
+    def __init__(self, olustur, doldur, anahtar=None):
+        """
+        olustur(): boş bir satır kontrolü döndürür (hücre referansları .data'da tutulur).
+        doldur(satir, sira, oge): satırın hücrelerini öğeye göre ayarlar (sira 0 tabanlı).
+        anahtar(oge): satırın kalıcı anahtarı; verilmezse oge['id'].
+        """
+        self._olustur = olustur
+        self._doldur = doldur
+        self._anahtar = anahtar or _id_anahtari
+        self._satirlar = {}  # anahtar -> (satir, sira, oge)
+    
+    def reconcile(self, ogeler, baslangic=0):
+        """
+        Öğelerin satır kontrollerini sırayla döndürür.
+        Anahtarı bilinen satır yeniden kullanılır ve yalnızca sırası veya
+        verisi değiştiyse doldurulur; yeni anahtarlar için satır oluşturulur,
+        listede kalmayanlar bırakılır.
+        """
+        yeni_satirlar = {}
+        kontroller = []
+        for sira, oge in enumerate(ogeler, baslangic):
+            anahtar = self._anahtar(oge)
+            kayit = self._satirlar.get(anahtar)
+            if kayit is None:
+                satir = self._olustur()
+                self._doldur(satir, sira, oge)
+            else:
+                satir, eski_sira, eski_oge = kayit
+                if eski_sira != sira or eski_oge != oge:
+                    self._doldur(satir, sira, oge)
+            yeni_satirlar[anahtar] = (satir, sira, oge)
+            kontroller.append(satir)
+        
+        self._satirlar = yeni_satirlar
+        return kontroller
+    
+    def get(self, anahtar):
+        """Anahtarın güncel satır kontrolü (yoksa None)."""
+        kayit = self._satirlar.get(anahtar)
+        return kayit[0] if kayit else None
+    
+    def clear(self):
+        """Saklanan satırları unutur; sonraki eşitlemede hepsi yeniden oluşturulur."""
+        self._satirlar = {}
@@ -0,0 +1,102 @@
+"""
+Sanal (pencereli) liste.
+Yalnızca görünen satırlar ve üstündeki/altındaki pay (overscan) için kontrol
+oluşturur; listenin geri kalan yüksekliği iki boş dolgu Container'ı ile
+korunur. Kaydırdıkça görünen pencerenin öğeleri kaynaktan istenir, böylece
+istemciye giden kontrol sayısı liste uzunluğundan bağımsız kalır.
+"""
+import math
+import flet as ft
+from utils.tracing import tracer
+from .row_reconciler import RowReconciler
+
+
+class VirtualList(ft.ListView):
+    """Sabit satır yükseklikli sanal liste."""
+    
+    def __init__(self, satir_olustur, satir_doldur, anahtar=None, satir_yuksekligi=56,
+                 tasma=10, **kwargs):
+        """
+        satir_olustur() / satir_doldur(satir, sira, oge) / anahtar(oge): bkz. RowReconciler;
+        pencere kaydıkça veya kaynak yenilendikçe aynı anahtarlı satırlar yeniden kullanılır.
+        satir_yuksekligi: her satırın sabit yüksekliği (piksel); dolgular buna göre hesaplanır.
+        tasma: görünen alanın üstünde ve altında ayrıca çizilen satır sayısı.
+        """
+        super().__init__(
+            spacing=0,
+            on_scroll=self._on_scroll,
+            on_scroll_interval=50,
+            **kwargs,
+        )
+        self._satirlar = RowReconciler(satir_olustur, satir_doldur, anahtar)
+        self.satir_yuksekligi = satir_yuksekligi
+        self.tasma = tasma
+        self._uzunluk = 0
+        self._pencere_getir = None
+        self._gorunur = 20  # Görünen satır sayısı; ilk kaydırmaya kadar tahmin
+        self._ilk = 0  # İlk görünen satırın sırası
+        self._aralik = (0, 0)  # Çizili satırlar [başlangıç, bitiş)
+        self._ust_dolgu = ft.Container(height=0)
+        self._alt_dolgu = ft.Container(height=0)
+        self.controls = [self._ust_dolgu, self._alt_dolgu]
+    
+    # ==================== KAYNAK ====================
+    
+    def set_source(self, uzunluk, pencere_getir, basa_don=False):
+        """
+        Listenin kaynağını ayarlar ve görünen pencereyi yeniden çizer.
+        pencere_getir(baslangic, bitis): [baslangic, bitis) aralığındaki öğeleri döndürür
+        (ör. veritabanından yalnızca o pencere). update() çağıranın işidir.
+        """
+        self._uzunluk = uzunluk
+        self._pencere_getir = pencere_getir
+        if basa_don:
+            self._ilk = 0
+            if self.page:
+                self.scroll_to(offset=0, duration=0)
+        self._ilk = min(self._ilk, max(uzunluk - 1, 0))
+        self._ciz()
+    
+    def set_items(self, ogeler, basa_don=False):
+        """Bellekteki bir listeyi kaynak olarak ayarlar."""
+        self.set_source(len(ogeler), lambda baslangic, bitis: ogeler[baslangic:bitis], basa_don)
+    
+    def refresh_window(self):
+        """Görünen pencereyi kaynaktan yeniden okuyup çizer."""
+        self._ciz()
+        if self.page:
+            self.update()
+    
+    # ==================== ÇİZİM ====================
+    
+    @tracer.traced('VirtualList._ciz', 'render')
+    def _ciz(self):
+        yukseklik = self.satir_yuksekligi
+        baslangic = max(0, self._ilk - self.tasma)
+        bitis = min(self._uzunluk, self._ilk + self._gorunur + self.tasma)
+        ogeler = self._pencere_getir(baslangic, bitis) if bitis > baslangic else []
+        
+        satirlar = self._satirlar.reconcile(ogeler, baslangic)
+        for satir in satirlar:
+            satir.height = yukseklik
+        
+        self._ust_dolgu.height = baslangic * yukseklik
+        self._alt_dolgu.height = max(self._uzunluk - baslangic - len(satirlar), 0) * yukseklik
+        self.controls = [self._ust_dolgu, *satirlar, self._alt_dolgu]
+        self._aralik = (baslangic, baslangic + len(satirlar))
+    
+    def _on_scroll(self, e):
+        if self._pencere_getir is None:
+            return
+        if e.viewport_dimension:
+            self._gorunur = max(1, math.ceil(e.viewport_dimension / self.satir_yuksekligi))
+        self._ilk = min(int(e.pixels // self.satir_yuksekligi), max(self._uzunluk - 1, 0))
+        
+        # Görünen satırlar hâlâ çizili aralıktaysa bir şey gönderme
+        baslangic, bitis = self._aralik
+        son = min(self._ilk + self._gorunur, self._uzunluk)
+        if baslangic <= self._ilk and son <= bitis:
+            return
+        
+        self._ciz()
+        self.update()
@@ -1,4 +1,8 @@
-from .models import init_db
+from .models import init_db, close_connections
 from .db_manager import DatabaseManager
+from .async_manager import AsyncDatabaseManager
+from .maintenance import MaintenanceManager
+from .instrumentation import instrumentation
 
-__all__ = ['init_db', 'DatabaseManager']
+__all__ = ['init_db', 'close_connections', 'DatabaseManager', 'AsyncDatabaseManager',
+           'MaintenanceManager', 'instrumentation']
@@ -0,0 +1,62 @@
+"""
+Asenkron veritabanı erişimi.
+Görünümlerin ağır okumalarını (öğrenci listesi/arama, raporlar) UI thread'i
+dışında, sınırlı bir thread havuzunda salt okunur bağlantılarla paralel
+çalıştırır. Yazmalar DatabaseManager'ın yazma kuyruğundan geçer.
+"""
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+
+class AsyncDatabaseManager:
+    """DatabaseManager okumaları için await edilebilir cephe."""
+    
+    def __init__(self, db_manager, max_okuyucu=4):
+        self.db = db_manager
+        self._okuyucular = ThreadPoolExecutor(
+            max_workers=max_okuyucu, thread_name_prefix='db-okuma'
+        )
+    
+    async def run(self, fn, *args, **kwargs):
+        """Salt okunur bir işi okuma havuzunda çalıştırır."""
+        loop = asyncio.get_running_loop()
+        # Bağlam kopyalanır: okuma havuzundaki sorgular çağıran eyleme yazılır
+        baglam = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self._okuyucular, partial(baglam.run, fn, *args, **kwargs)
+        )
+    
+    def shutdown(self, wait=True):
+        """Okuma havuzunu kapatır."""
+        self._okuyucular.shutdown(wait=wait, cancel_futures=True)
+    
+    # ==================== OKUMALAR ====================
+    
+    async def get_all_siniflar(self):
+        return await self.run(self.db.get_all_siniflar)
+    
+    async def get_all_kategoriler(self):
+        return await self.run(self.db.get_all_kategoriler)
+    
+    async def get_all_ogrenciler(self, sinif_id=None, siralama='soyad', azalan=False):
+        return await self.run(self.db.get_all_ogrenciler, sinif_id, siralama, azalan)
+    
+    async def get_ogrenci_idleri(self, sinif_id=None, siralama='soyad', azalan=False):
+        return await self.run(self.db.get_ogrenci_idleri, sinif_id, siralama, azalan)
+    
+    async def search_ogrenciler(self, query, sinif_id=None, limit=50, siralama='soyad',
+                                azalan=False):
+        return await self.run(
+            self.db.search_ogrenciler, query, sinif_id, limit, siralama, azalan
+        )
+    
+    async def get_ortalama_tablosu(self, sinif_id=None):
+        return await self.run(self.db.get_ortalama_tablosu, sinif_id)
+    
+    async def get_sinif_kategori_ortalama(self, sinif_id, kategori_id):
+        return await self.run(self.db.get_sinif_kategori_ortalama, sinif_id, kategori_id)
+    
+    async def get_sinif_not_dagilimi(self, sinif_id):
+        return await self.run(self.db.get_sinif_not_dagilimi, sinif_id)
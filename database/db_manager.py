@@ -4,108 +4,309 @@ Tüm CRUD işlemleri ve iş mantığı burada tanımlanır.
 """
 import sqlite3
 import json
+import functools
+import re
+import threading
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
-from .models import get_connection
+from utils.helpers import fold_turkish, filter_students_by_name
+from .models import get_connection, get_read_connection, sira_anahtarlarini_guncelle, turkish_sort_key
+from .write_queue import WriteQueue
+
+
+# Silinen kayda bağlı satırlar (geri yükleme sırasıyla): (tablo, koşul).
+# Koşuldaki ? silinen kaydın id'sidir. Şemadaki ON DELETE CASCADE ile aynıdır.
+_BAGIMLI_TABLOLAR = {
+    'sinif': [
+        ('not_basligi', 'sinif_id = ?'),
+        ('not_', 'baslik_id IN (SELECT id FROM not_basligi WHERE sinif_id = ?)'),
+    ],
+    'ogrenci': [
+        ('not_', 'ogrenci_id = ?'),
+    ],
+    'kategori': [
+        ('not_basligi', 'kategori_id = ?'),
+        ('not_', 'baslik_id IN (SELECT id FROM not_basligi WHERE kategori_id = ?)'),
+    ],
+    'not_basligi': [
+        ('not_', 'baslik_id = ?'),
+    ],
+}
+
+# Silmede NULL yapılan referanslar (ON DELETE SET NULL): (tablo, kolon)
+_SIFIRLANAN_KOLONLAR = {
+    'sinif': [('ogrenci', 'sinif_id')],
+}
+
+
+# Öğrenci listelerinin sıralamaları (ORDER BY terimleri). *_anahtari kolonları
+# Türk alfabesi sırasını ikili karşılaştırmayla verir (bkz. turkish_sort_key);
+# soyad/ad sıraları idx_ogrenci_*anahtar indekslerinden okunur. Sınıf adları
+# 'tr' collation'ı ile sıralanır.
+_OGRENCI_SIRALAMA = {
+    'soyad': ('o.soyad_anahtari', 'o.ad_anahtari'),
+    'ad': ('o.ad_anahtari', 'o.soyad_anahtari'),
+    # NULL'lar '' sayılır: keyset sayfalamada anahtar karşılaştırılabilir kalsın
+    'okul_no': ("CAST(IFNULL(o.okul_no, '') AS INTEGER)", "IFNULL(o.okul_no, '')"),
+    'sinif': ("IFNULL(s.ad, '') COLLATE tr", 'o.soyad_anahtari', 'o.ad_anahtari'),
+}
+
+
+def _ogrenci_sirasi(siralama='soyad', azalan=False):
+    """Öğrenci sorguları için ORDER BY ifadesi (eşitlikte id ile kararlı)."""
+    yon = ' DESC' if azalan else ''
+    terimler = _OGRENCI_SIRALAMA[siralama] + ('o.id',)
+    return ' ORDER BY ' + ', '.join(terim + yon for terim in terimler)
+
+
+def _yazma(metot):
+    """Metodu yazıcı thread'inde çalıştırır ve sonucunu bekler."""
+    @functools.wraps(metot)
+    def sarici(self, *args, **kwargs):
+        return self._yazici.calistir(metot, self, *args, **kwargs)
+    return sarici
 
 
 class DatabaseManager:
     """Veritabanı işlemlerini yöneten sınıf."""
     
-    def __init__(self):
-        self.undo_stack = []
-        self.max_undo = 50
+    def __init__(self, max_undo=50, max_gecmis=500):
+        # Bellekteki undo/redo penceresi; tam geçmiş islem_gecmisi tablosunda
+        self.max_undo = max_undo
+        self.max_gecmis = max_gecmis
+        self.undo_stack = deque(maxlen=max_undo)
+        self.redo_stack = deque(maxlen=max_undo)
+        # Thread başına durum: açık undo grubu, son görülen data_version
+        self._yerel = threading.local()
+        
+        # Referans verisi önbelleği; her yazmada nesil artar ve önbellek boşalır
+        self._onbellek = {}
+        self._nesil = 0
+        
+        # Tüm yazmalar tek yazıcı thread'inde; okumalar salt okunur bağlantılarda
+        self._yazici = WriteQueue(
+            commit_sonrasi=self._degisti,
+            commit_hatasi=self.reload_undo_history,
+        )
+        self.reload_undo_history()
+    
+    @property
+    def _grup(self):
+        """Bu thread'de açık undo grubunun adımları (yoksa None)."""
+        return getattr(self._yerel, 'grup', None)
+    
+    @_grup.setter
+    def _grup(self, adimlar):
+        self._yerel.grup = adimlar
+    
+    @contextmanager
+    def _islem(self):
+        """
+        Yazma işlemi için yazıcı bağlantısından cursor verir.
+        Yalnızca yazıcı thread'inde çalışır (bkz. _yazma); commit/rollback
+        yazma kuyruğu tarafından toplu olarak yapılır.
+        """
+        yield get_connection().cursor()
+    
+    def submit_write(self, fn, *args, **kwargs):
+        """
+        Yazan bir işi yazıcı kuyruğuna koyar ve beklemeden Future döndürür.
+        Aynı anda gönderilen işler tek transaction'da commit edilir.
+        """
+        return self._yazici.gonder(fn, *args, **kwargs)
+    
+    def run_outside_transaction(self, fn, *args, **kwargs):
+        """
+        Transaction içinde çalışamayan bir işi (ör. VACUUM) yazıcı thread'inde
+        tek başına çalıştırır ve sonucunu döndürür; bu sırada başka yazma yapılmaz.
+        """
+        return self._yazici.calistir_islemsiz(fn, *args, **kwargs)
+    
+    def run_in_own_transaction(self, fn, *args, **kwargs):
+        """
+        Yazan bir işi yazıcıda başka yazmalarla birleştirmeden, kendi
+        transaction'ında çalıştırır ve sonucunu döndürür. fn hata verirse
+        transaction tümüyle geri alınır. Geri alma günlüğüne kaydedilmez.
+        """
+        if self._yazici.yazici_thread_mi() or self._yazici.oturum_acik():
+            raise RuntimeError("Açık bir transaction içinden yeni transaction başlatılamaz.")
+        with self._yazici.oturum():
+            return self._yazici.calistir(fn, *args, **kwargs)
+    
+    @contextmanager
+    def undo_grubu(self):
+        """
+        Bloktaki tüm yazma işlemlerini tek transaction'da toplar ve
+        tek bir undo kaydı olarak saklar. Hata olursa hepsi geri alınır.
+            
+            with db.undo_grubu():
+                for sinif in siniflar:
+                    db.add_not_basligi(baslik, kategori_id, sinif['id'])
+        
+        Grup sürerken yazıcı yalnızca bu bloğun yazmalarını çalıştırır.
+        Bloktaki okumalar henüz commit edilmemiş grup yazmalarını görmez.
+        İç içe kullanıldığında yalnızca en dıştaki grup geçerlidir.
+        """
+        if self._grup is not None or self._yazici.oturum_acik():
+            yield
+            return
+        
+        if self._yazici.yazici_thread_mi():
+            # Yazıcı içinden açılan grup: zaten açık transaction'ın içindeyiz
+            self._grubu_baslat()
+            try:
+                yield
+                self._grubu_kaydet()
+            finally:
+                self._grubu_birak()
+            return
+        
+        with self._yazici.oturum(self._grubu_baslat, self._grubu_kaydet,
+                                 self._grubu_birak):
+            yield
+    
+    def _grubu_baslat(self):
+        self._grup = []
+    
+    def _grubu_kaydet(self):
+        """Grubun adımlarını tek undo kaydı olarak yazar (yazıcı thread'inde)."""
+        adimlar, self._grup = self._grup, None
+        if not adimlar:
+            return
+        
+        cursor = get_connection().cursor()
+        if len(adimlar) == 1:
+            self._add_to_undo(cursor, **adimlar[0])
+        else:
+            tablolar = {adim['tablo_adi'] for adim in adimlar}
+            tablo_adi = tablolar.pop() if len(tablolar) == 1 else 'karma'
+            self._add_to_undo(cursor, 'GRUP', tablo_adi, None, None, None,
+                              adimlar=adimlar)
+    
+    def _grubu_birak(self):
+        self._grup = None
+    
+    # ==================== ÖNBELLEK ====================
+    
+    def _degisti(self):
+        """Yazma sonrası önbelleği geçersiz kılar."""
+        self._nesil += 1
+        self._onbellek.clear()
+    
+    def invalidate_cache(self):
+        """Önbelleği temizler (DatabaseManager dışından yapılan yazmalardan sonra)."""
+        self._degisti()
+    
+    def _onbellekten(self, anahtar, oku):
+        """
+        Sonucu önbellekten verir, yoksa oku() ile doldurur.
+        Başka bağlantıların commit'leri PRAGMA data_version ile yakalanır.
+        Çağıran değiştirebileceği için satırların kopyası döner.
+        """
+        surum = get_read_connection().execute('PRAGMA data_version').fetchone()[0]
+        if getattr(self._yerel, 'data_version', None) != surum:
+            # Bu thread'in ilk okuması ya da başka bir bağlantı yazmış
+            self._yerel.data_version = surum
+            self._degisti()
+        
+        nesil = self._nesil
+        sonuc = self._onbellek.get(anahtar)
+        if sonuc is None:
+            sonuc = oku()
+            # Okuma sırasında yazma olduysa sonucu saklama
+            if nesil == self._nesil:
+                self._onbellek[anahtar] = sonuc
+        return [dict(row) for row in sonuc]
     
     # ==================== SINIF İŞLEMLERİ ====================
     
     def get_all_siniflar(self):
-        """Tüm sınıfları döndürür."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM sinif ORDER BY ad')
-        result = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return result
+        """Tüm sınıfları döndürür (önbellekli)."""
+        def oku():
+            conn = get_read_connection()
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM sinif ORDER BY ad COLLATE tr')
+            result = [dict(row) for row in cursor.fetchall()]
+            conn.close()
+            return result
+        
+        return self._onbellekten(('siniflar',), oku)
     
+    @_yazma
     def add_sinif(self, ad, donem=''):
         """Yeni sınıf ekler."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            'INSERT INTO sinif (ad, donem) VALUES (?, ?)',
-            (ad, donem)
-        )
-        sinif_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self._islem() as cursor:
+            cursor.execute(
+                'INSERT INTO sinif (ad, donem) VALUES (?, ?)',
+                (ad, donem)
+            )
+            sinif_id = cursor.lastrowid
+            
+            self._add_to_undo(cursor, 'INSERT', 'sinif', sinif_id, None, {'ad': ad, 'donem': donem})
         
-        self._add_to_undo('INSERT', 'sinif', sinif_id, None, {'ad': ad, 'donem': donem})
         return sinif_id
     
+    @_yazma
     def update_sinif(self, sinif_id, ad, donem=''):
         """Sınıf bilgilerini günceller."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Eski veriyi al
-        cursor.execute('SELECT * FROM sinif WHERE id = ?', (sinif_id,))
-        old_data = dict(cursor.fetchone())
-        
-        cursor.execute(
-            'UPDATE sinif SET ad = ?, donem = ? WHERE id = ?',
-            (ad, donem, sinif_id)
-        )
-        conn.commit()
-        conn.close()
-        
-        self._add_to_undo('UPDATE', 'sinif', sinif_id, old_data, {'ad': ad, 'donem': donem})
+        with self._islem() as cursor:
+            # Eski veriyi al
+            cursor.execute('SELECT * FROM sinif WHERE id = ?', (sinif_id,))
+            old_data = dict(cursor.fetchone())
+            
+            cursor.execute(
+                'UPDATE sinif SET ad = ?, donem = ? WHERE id = ?',
+                (ad, donem, sinif_id)
+            )
+            
+            self._add_to_undo(cursor, 'UPDATE', 'sinif', sinif_id, old_data, {'ad': ad, 'donem': donem})
     
+    @_yazma
     def delete_sinif(self, sinif_id):
         """Sınıfı siler."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Eski veriyi al
-        cursor.execute('SELECT * FROM sinif WHERE id = ?', (sinif_id,))
-        old_data = dict(cursor.fetchone())
-        
-        cursor.execute('DELETE FROM sinif WHERE id = ?', (sinif_id,))
-        conn.commit()
-        conn.close()
-        
-        self._add_to_undo('DELETE', 'sinif', sinif_id, old_data, None)
+        with self._islem() as cursor:
+            # Eski veriyi al
+            cursor.execute('SELECT * FROM sinif WHERE id = ?', (sinif_id,))
+            old_data = dict(cursor.fetchone())
+            
+            bagimlilar = self._bagimlilari_sil(cursor, 'sinif', sinif_id)
+            cursor.execute('DELETE FROM sinif WHERE id = ?', (sinif_id,))
+            
+            self._add_to_undo(cursor, 'DELETE', 'sinif', sinif_id, old_data, None,
+                              bagimlilar=bagimlilar)
     
+    @_yazma
     def copy_sinif_to_new_term(self, sinif_id, new_sinif_ad, new_donem):
         """
         Sınıfı yeni dönem/seneye kopyalar.
         Öğrenciler kopyalanır, notlar sıfırlanır.
         """
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Yeni sınıf oluştur
-        cursor.execute(
-            'INSERT INTO sinif (ad, donem) VALUES (?, ?)',
-            (new_sinif_ad, new_donem)
-        )
-        new_sinif_id = cursor.lastrowid
-        
-        # Öğrencileri kopyala
-        cursor.execute('''
-            INSERT INTO ogrenci (ad, soyad, okul_no, sinif_id)
-            SELECT ad, soyad, okul_no || '_' || ?, ?
-            FROM ogrenci WHERE sinif_id = ?
-        ''', (new_sinif_id, new_sinif_id, sinif_id))
-        
-        conn.commit()
-        conn.close()
+        with self._islem() as cursor:
+            # Yeni sınıf oluştur
+            cursor.execute(
+                'INSERT INTO sinif (ad, donem) VALUES (?, ?)',
+                (new_sinif_ad, new_donem)
+            )
+            new_sinif_id = cursor.lastrowid
+            
+            # Öğrencileri kopyala
+            cursor.execute('''
+                INSERT INTO ogrenci (ad, soyad, okul_no, sinif_id, ad_anahtari, soyad_anahtari)
+                SELECT ad, soyad, okul_no || '_' || ?, ?, ad_anahtari, soyad_anahtari
+                FROM ogrenci WHERE sinif_id = ?
+            ''', (new_sinif_id, new_sinif_id, sinif_id))
         
         return new_sinif_id
     
     # ==================== ÖĞRENCİ İŞLEMLERİ ====================
     
-    def get_all_ogrenciler(self, sinif_id=None):
-        """Tüm öğrencileri veya belirli bir sınıfın öğrencilerini döndürür."""
-        conn = get_connection()
+    def get_all_ogrenciler(self, sinif_id=None, siralama='soyad', azalan=False):
+        """
+        Tüm öğrencileri veya belirli bir sınıfın öğrencilerini döndürür.
+        siralama: 'soyad' (varsayılan), 'ad', 'okul_no' veya 'sinif'.
+        """
+        conn = get_read_connection()
         cursor = conn.cursor()
         
         if sinif_id:
@@ -114,23 +315,121 @@ class DatabaseManager:
                 FROM ogrenci o 
                 LEFT JOIN sinif s ON o.sinif_id = s.id 
                 WHERE o.sinif_id = ?
-                ORDER BY o.soyad, o.ad
-            ''', (sinif_id,))
+            ''' + _ogrenci_sirasi(siralama, azalan), (sinif_id,))
         else:
             cursor.execute('''
                 SELECT o.*, s.ad as sinif_adi 
                 FROM ogrenci o 
                 LEFT JOIN sinif s ON o.sinif_id = s.id 
-                ORDER BY o.soyad, o.ad
-            ''')
+            ''' + _ogrenci_sirasi(siralama, azalan))
         
         result = [dict(row) for row in cursor.fetchall()]
         conn.close()
         return result
     
+    def get_ogrenci_sayfasi(self, sinif_id=None, after_key=None, limit=200, siralama='soyad',
+                            azalan=False):
+        """
+        Öğrencileri sayfa sayfa döndürür (keyset sayfalama).
+        İlk sayfa için after_key=None, sonrakiler için bir önceki çağrının
+        döndürdüğü anahtar verilir. Sıra get_all_ogrenciler ile aynıdır ve
+        OFFSET kullanılmadığından her sayfa indeksten doğrudan okunur.
+        Dönüş: (ogrenciler, sonraki_anahtar); son sayfada sonraki_anahtar None.
+        """
+        terimler = _OGRENCI_SIRALAMA[siralama] + ('o.id',)
+        anahtar_kolonlari = ''.join(f', {terim} AS _anahtar{i}' for i, terim in enumerate(terimler))
+        sorgu = f'''
+            SELECT o.*, s.ad as sinif_adi{anahtar_kolonlari}
+            FROM ogrenci o
+            LEFT JOIN sinif s ON o.sinif_id = s.id
+            WHERE 1=1
+        '''
+        params = []
+        if sinif_id:
+            sorgu += ' AND o.sinif_id = ?'
+            params.append(sinif_id)
+        if after_key is not None:
+            # Satır değeri karşılaştırması: (soyad, ad, id) > (?, ?, ?). SQLite
+            # satır değerini indeks aralığına çeviremediğinden ilk terim ayrıca
+            # sınırlanır; böylece sayfa baştan taranmadan indeksten aranır.
+            yon = '<' if azalan else '>'
+            yer_tutucular = ', '.join('?' * len(terimler))
+            sorgu += f" AND {terimler[0]} {yon}= ? AND ({', '.join(terimler)}) {yon} ({yer_tutucular})"
+            params.append(after_key[0])
+            params.extend(after_key)
+        # Bir fazla satır: sonraki sayfa olup olmadığını anlamak için
+        sorgu += _ogrenci_sirasi(siralama, azalan) + ' LIMIT ?'
+        params.append(limit + 1)
+        
+        conn = get_read_connection()
+        cursor = conn.cursor()
+        cursor.execute(sorgu, params)
+        satirlar = cursor.fetchall()
+        kolonlar = [kolon[0] for kolon in cursor.description][:-len(terimler)]
+        conn.close()
+        
+        sonraki_anahtar = None
+        if len(satirlar) > limit:
+            satirlar = satirlar[:limit]
+            sonraki_anahtar = tuple(satirlar[-1][-len(terimler):])
+        return [dict(zip(kolonlar, row)) for row in satirlar], sonraki_anahtar
+    
+    def iter_ogrenciler(self, sinif_id=None, siralama='soyad', azalan=False, parca=500):
+        """
+        Öğrencileri get_ogrenci_sayfasi ile parça parça okuyarak tek tek üretir.
+        Parçalar arasında bağlantı veya cursor açık kalmaz; büyük listeler
+        (ör. dışa aktarma) belleğe bütün olarak alınmaz.
+        """
+        anahtar = None
+        while True:
+            sayfa, anahtar = self.get_ogrenci_sayfasi(sinif_id, anahtar, parca, siralama, azalan)
+            yield from sayfa
+            if anahtar is None:
+                return
+    
+    def get_ogrenci_idleri(self, sinif_id=None, siralama='soyad', azalan=False):
+        """
+        Öğrenci id'lerini get_all_ogrenciler sırasıyla döndürür.
+        Sanal listeler sırayı bu hafif listeden alır, satırları pencere
+        pencere get_ogrenciler_by_ids ile okur.
+        """
+        sorgu = '''
+            SELECT o.id
+            FROM ogrenci o
+            LEFT JOIN sinif s ON o.sinif_id = s.id
+        '''
+        params = ()
+        if sinif_id:
+            sorgu += ' WHERE o.sinif_id = ?'
+            params = (sinif_id,)
+        sorgu += _ogrenci_sirasi(siralama, azalan)
+        
+        conn = get_read_connection()
+        result = [row[0] for row in conn.execute(sorgu, params).fetchall()]
+        conn.close()
+        return result
+    
+    def get_ogrenciler_by_ids(self, ogrenci_ids):
+        """Verilen id'lerdeki öğrencileri aynı sırayla döndürür (silinmiş olanlar atlanır)."""
+        if not ogrenci_ids:
+            return []
+        
+        conn = get_read_connection()
+        yer_tutucular = ', '.join('?' * len(ogrenci_ids))
+        satirlar = conn.execute(f'''
+            SELECT o.*, s.ad as sinif_adi
+            FROM ogrenci o
+            LEFT JOIN sinif s ON o.sinif_id = s.id
+            WHERE o.id IN ({yer_tutucular})
+        ''', list(ogrenci_ids)).fetchall()
+        conn.close()
+        
+        ogrenciler = {row['id']: dict(row) for row in satirlar}
+        return [ogrenciler[oid] for oid in ogrenci_ids if oid in ogrenciler]
+    
     def get_ogrenci_by_id(self, ogrenci_id):
         """Belirli bir öğrenciyi döndürür."""
-        conn = get_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT o.*, s.ad as sinif_adi 
@@ -143,66 +442,107 @@ class DatabaseManager:
         conn.close()
         return result
     
+    def search_ogrenciler(self, query, sinif_id=None, limit=50, siralama='soyad', azalan=False):
+        """
+        Ad, soyad veya okul numarasında kelime başı (önek) araması yapar.
+        Türkçe harf ve büyük/küçük harf duyarsızdır ('isik' -> 'IŞIK').
+        Tüm kelimeler eşleşmelidir. limit=None tüm sonuçları döndürür.
+        """
+        kelimeler = re.findall(r'\w+', fold_turkish(query))
+        if not kelimeler:
+            sonuc = self.get_all_ogrenciler(sinif_id, siralama, azalan)
+            return sonuc if limit is None else sonuc[:limit]
+        
+        conn = get_read_connection()
+        fts_var = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'ogrenci_fts'"
+        ).fetchone()
+        if not fts_var:
+            # FTS5'siz SQLite: tam liste üzerinde filtrele
+            sonuc = self.get_all_ogrenciler(sinif_id, siralama, azalan)
+            for kelime in kelimeler:
+                sonuc = filter_students_by_name(sonuc, kelime)
+            return sonuc if limit is None else sonuc[:limit]
+        
+        # Her kelime ayrı önek terimi: "ah"* "yil"*
+        eslesme = ' '.join(f'"{kelime}"*' for kelime in kelimeler)
+        sorgu = '''
+            SELECT o.*, s.ad as sinif_adi
+            FROM ogrenci_fts f
+            JOIN ogrenci o ON o.id = f.rowid
+            LEFT JOIN sinif s ON o.sinif_id = s.id
+            WHERE ogrenci_fts MATCH ?
+        '''
+        params = [eslesme]
+        if sinif_id:
+            sorgu += ' AND o.sinif_id = ?'
+            params.append(sinif_id)
+        sorgu += _ogrenci_sirasi(siralama, azalan)
+        if limit is not None:
+            sorgu += ' LIMIT ?'
+            params.append(limit)
+        
+        result = [dict(row) for row in conn.execute(sorgu, params).fetchall()]
+        conn.close()
+        return result
+    
+    @_yazma
     def add_ogrenci(self, ad, soyad, okul_no, sinif_id):
         """Yeni öğrenci ekler."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            'INSERT INTO ogrenci (ad, soyad, okul_no, sinif_id) VALUES (?, ?, ?, ?)',
-            (ad, soyad, okul_no, sinif_id)
-        )
-        ogrenci_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self._islem() as cursor:
+            cursor.execute(
+                '''INSERT INTO ogrenci (ad, soyad, okul_no, sinif_id, ad_anahtari, soyad_anahtari)
+                   VALUES (?, ?, ?, ?, ?, ?)''',
+                (ad, soyad, okul_no, sinif_id, turkish_sort_key(ad), turkish_sort_key(soyad))
+            )
+            ogrenci_id = cursor.lastrowid
+            
+            self._add_to_undo(cursor, 'INSERT', 'ogrenci', ogrenci_id, None, 
+                              {'ad': ad, 'soyad': soyad, 'okul_no': okul_no, 'sinif_id': sinif_id})
         
-        self._add_to_undo('INSERT', 'ogrenci', ogrenci_id, None, 
-                          {'ad': ad, 'soyad': soyad, 'okul_no': okul_no, 'sinif_id': sinif_id})
         return ogrenci_id
     
+    @_yazma
     def update_ogrenci(self, ogrenci_id, ad, soyad, okul_no, sinif_id):
         """Öğrenci bilgilerini günceller."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Eski veriyi al
-        cursor.execute('SELECT * FROM ogrenci WHERE id = ?', (ogrenci_id,))
-        old_data = dict(cursor.fetchone())
-        
-        cursor.execute(
-            'UPDATE ogrenci SET ad = ?, soyad = ?, okul_no = ?, sinif_id = ? WHERE id = ?',
-            (ad, soyad, okul_no, sinif_id, ogrenci_id)
-        )
-        conn.commit()
-        conn.close()
-        
-        self._add_to_undo('UPDATE', 'ogrenci', ogrenci_id, old_data,
-                          {'ad': ad, 'soyad': soyad, 'okul_no': okul_no, 'sinif_id': sinif_id})
+        with self._islem() as cursor:
+            # Eski veriyi al
+            cursor.execute('SELECT * FROM ogrenci WHERE id = ?', (ogrenci_id,))
+            old_data = dict(cursor.fetchone())
+            
+            yeni_veri = {
+                'ad': ad, 'soyad': soyad, 'okul_no': okul_no, 'sinif_id': sinif_id,
+                'ad_anahtari': turkish_sort_key(ad), 'soyad_anahtari': turkish_sort_key(soyad),
+            }
+            cursor.execute(
+                f"UPDATE ogrenci SET {', '.join(f'{k} = ?' for k in yeni_veri)} WHERE id = ?",
+                list(yeni_veri.values()) + [ogrenci_id]
+            )
+            
+            self._add_to_undo(cursor, 'UPDATE', 'ogrenci', ogrenci_id, old_data, yeni_veri)
     
+    @_yazma
     def delete_ogrenci(self, ogrenci_id):
         """Öğrenciyi siler."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Eski veriyi al
-        cursor.execute('SELECT * FROM ogrenci WHERE id = ?', (ogrenci_id,))
-        old_data = dict(cursor.fetchone())
-        
-        cursor.execute('DELETE FROM ogrenci WHERE id = ?', (ogrenci_id,))
-        conn.commit()
-        conn.close()
-        
-        self._add_to_undo('DELETE', 'ogrenci', ogrenci_id, old_data, None)
+        with self._islem() as cursor:
+            # Eski veriyi al
+            cursor.execute('SELECT * FROM ogrenci WHERE id = ?', (ogrenci_id,))
+            old_data = dict(cursor.fetchone())
+            
+            bagimlilar = self._bagimlilari_sil(cursor, 'ogrenci', ogrenci_id)
+            cursor.execute('DELETE FROM ogrenci WHERE id = ?', (ogrenci_id,))
+            
+            self._add_to_undo(cursor, 'DELETE', 'ogrenci', ogrenci_id, old_data, None,
+                              bagimlilar=bagimlilar)
     
+    @_yazma
     def update_ogrenci_rozetler(self, ogrenci_id, rozetler):
         """Öğrenci rozetlerini günceller."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            'UPDATE ogrenci SET rozetler = ? WHERE id = ?',
-            (json.dumps(rozetler), ogrenci_id)
-        )
-        conn.commit()
-        conn.close()
+        with self._islem() as cursor:
+            cursor.execute(
+                'UPDATE ogrenci SET rozetler = ? WHERE id = ?',
+                (json.dumps(rozetler), ogrenci_id)
+            )
     
     def filter_ogrenciler_by_average(self, sinif_id, operator, value):
         """
@@ -210,12 +550,14 @@ class DatabaseManager:
         operator: '<', '>', '<=', '>=', '='
         """
         ogrenciler = self.get_all_ogrenciler(sinif_id)
+        ortalamalar = self.get_ortalama_tablosu(sinif_id)
         filtered = []
         
         for ogrenci in ogrenciler:
-            avg = self.get_ogrenci_genel_ortalama(ogrenci['id'])
-            if avg is None:
+            ortalama = ortalamalar.get(ogrenci['id'])
+            if ortalama is None:
                 continue
+            avg = ortalama['genel']
             
             if operator == '<' and avg < value:
                 filtered.append(ogrenci)
@@ -233,150 +575,147 @@ class DatabaseManager:
     # ==================== KATEGORİ İŞLEMLERİ ====================
     
     def get_all_kategoriler(self):
-        """Tüm kategorileri döndürür."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM kategori ORDER BY sira')
-        result = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return result
+        """Tüm kategorileri döndürür (önbellekli)."""
+        def oku():
+            conn = get_read_connection()
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM kategori ORDER BY sira')
+            result = [dict(row) for row in cursor.fetchall()]
+            conn.close()
+            return result
+        
+        return self._onbellekten(('kategoriler',), oku)
     
+    @_yazma
     def add_kategori(self, ad, sira=0):
         """Yeni kategori ekler."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            'INSERT INTO kategori (ad, sira, varsayilan) VALUES (?, ?, 0)',
-            (ad, sira)
-        )
-        kategori_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self._islem() as cursor:
+            cursor.execute(
+                'INSERT INTO kategori (ad, sira, varsayilan) VALUES (?, ?, 0)',
+                (ad, sira)
+            )
+            kategori_id = cursor.lastrowid
+            
+            self._add_to_undo(cursor, 'INSERT', 'kategori', kategori_id, None, {'ad': ad, 'sira': sira})
         
-        self._add_to_undo('INSERT', 'kategori', kategori_id, None, {'ad': ad, 'sira': sira})
         return kategori_id
     
+    @_yazma
     def update_kategori(self, kategori_id, ad, sira=None):
         """Kategori bilgilerini günceller."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Eski veriyi al
-        cursor.execute('SELECT * FROM kategori WHERE id = ?', (kategori_id,))
-        old_data = dict(cursor.fetchone())
-        
-        if sira is not None:
-            cursor.execute(
-                'UPDATE kategori SET ad = ?, sira = ? WHERE id = ?',
-                (ad, sira, kategori_id)
-            )
-        else:
-            cursor.execute(
-                'UPDATE kategori SET ad = ? WHERE id = ?',
-                (ad, kategori_id)
-            )
-        conn.commit()
-        conn.close()
-        
-        self._add_to_undo('UPDATE', 'kategori', kategori_id, old_data, {'ad': ad, 'sira': sira})
+        with self._islem() as cursor:
+            # Eski veriyi al
+            cursor.execute('SELECT * FROM kategori WHERE id = ?', (kategori_id,))
+            old_data = dict(cursor.fetchone())
+            
+            if sira is not None:
+                cursor.execute(
+                    'UPDATE kategori SET ad = ?, sira = ? WHERE id = ?',
+                    (ad, sira, kategori_id)
+                )
+            else:
+                cursor.execute(
+                    'UPDATE kategori SET ad = ? WHERE id = ?',
+                    (ad, kategori_id)
+                )
+            
+            yeni_veri = {'ad': ad} if sira is None else {'ad': ad, 'sira': sira}
+            self._add_to_undo(cursor, 'UPDATE', 'kategori', kategori_id, old_data, yeni_veri)
     
+    @_yazma
     def delete_kategori(self, kategori_id):
         """Kategoriyi siler."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Eski veriyi al
-        cursor.execute('SELECT * FROM kategori WHERE id = ?', (kategori_id,))
-        old_data = dict(cursor.fetchone())
-        
-        cursor.execute('DELETE FROM kategori WHERE id = ?', (kategori_id,))
-        conn.commit()
-        conn.close()
-        
-        self._add_to_undo('DELETE', 'kategori', kategori_id, old_data, None)
+        with self._islem() as cursor:
+            # Eski veriyi al
+            cursor.execute('SELECT * FROM kategori WHERE id = ?', (kategori_id,))
+            old_data = dict(cursor.fetchone())
+            
+            bagimlilar = self._bagimlilari_sil(cursor, 'kategori', kategori_id)
+            cursor.execute('DELETE FROM kategori WHERE id = ?', (kategori_id,))
+            
+            self._add_to_undo(cursor, 'DELETE', 'kategori', kategori_id, old_data, None,
+                              bagimlilar=bagimlilar)
     
     # ==================== NOT BAŞLIĞI İŞLEMLERİ ====================
     
     def get_not_basliklari(self, kategori_id=None, sinif_id=None):
-        """Not başlıklarını döndürür."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        query = '''
-            SELECT nb.*, k.ad as kategori_adi, s.ad as sinif_adi
-            FROM not_basligi nb
-            LEFT JOIN kategori k ON nb.kategori_id = k.id
-            LEFT JOIN sinif s ON nb.sinif_id = s.id
-            WHERE 1=1
-        '''
-        params = []
-        
-        if kategori_id:
-            query += ' AND nb.kategori_id = ?'
-            params.append(kategori_id)
-        if sinif_id:
-            query += ' AND nb.sinif_id = ?'
-            params.append(sinif_id)
-        
-        query += ' ORDER BY nb.tarih DESC'
+        """Not başlıklarını döndürür (önbellekli)."""
+        def oku():
+            conn = get_read_connection()
+            cursor = conn.cursor()
+            
+            query = '''
+                SELECT nb.*, k.ad as kategori_adi, s.ad as sinif_adi
+                FROM not_basligi nb
+                LEFT JOIN kategori k ON nb.kategori_id = k.id
+                LEFT JOIN sinif s ON nb.sinif_id = s.id
+                WHERE 1=1
+            '''
+            params = []
+            
+            if kategori_id:
+                query += ' AND nb.kategori_id = ?'
+                params.append(kategori_id)
+            if sinif_id:
+                query += ' AND nb.sinif_id = ?'
+                params.append(sinif_id)
+            
+            query += ' ORDER BY nb.tarih DESC'
+            
+            cursor.execute(query, params)
+            result = [dict(row) for row in cursor.fetchall()]
+            conn.close()
+            return result
         
-        cursor.execute(query, params)
-        result = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return result
+        return self._onbellekten(('basliklar', kategori_id, sinif_id), oku)
     
+    @_yazma
     def add_not_basligi(self, baslik, kategori_id, sinif_id):
         """Yeni not başlığı ekler."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            'INSERT INTO not_basligi (baslik, kategori_id, sinif_id) VALUES (?, ?, ?)',
-            (baslik, kategori_id, sinif_id)
-        )
-        baslik_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self._islem() as cursor:
+            cursor.execute(
+                'INSERT INTO not_basligi (baslik, kategori_id, sinif_id) VALUES (?, ?, ?)',
+                (baslik, kategori_id, sinif_id)
+            )
+            baslik_id = cursor.lastrowid
+            
+            self._add_to_undo(cursor, 'INSERT', 'not_basligi', baslik_id, None,
+                              {'baslik': baslik, 'kategori_id': kategori_id, 'sinif_id': sinif_id})
         
-        self._add_to_undo('INSERT', 'not_basligi', baslik_id, None,
-                          {'baslik': baslik, 'kategori_id': kategori_id, 'sinif_id': sinif_id})
         return baslik_id
     
+    @_yazma
     def update_not_basligi(self, baslik_id, baslik):
         """Not başlığını günceller."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM not_basligi WHERE id = ?', (baslik_id,))
-        old_data = dict(cursor.fetchone())
-        
-        cursor.execute(
-            'UPDATE not_basligi SET baslik = ? WHERE id = ?',
-            (baslik, baslik_id)
-        )
-        conn.commit()
-        conn.close()
-        
-        self._add_to_undo('UPDATE', 'not_basligi', baslik_id, old_data, {'baslik': baslik})
+        with self._islem() as cursor:
+            cursor.execute('SELECT * FROM not_basligi WHERE id = ?', (baslik_id,))
+            old_data = dict(cursor.fetchone())
+            
+            cursor.execute(
+                'UPDATE not_basligi SET baslik = ? WHERE id = ?',
+                (baslik, baslik_id)
+            )
+            
+            self._add_to_undo(cursor, 'UPDATE', 'not_basligi', baslik_id, old_data, {'baslik': baslik})
     
+    @_yazma
     def delete_not_basligi(self, baslik_id):
         """Not başlığını ve ilgili notları siler."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM not_basligi WHERE id = ?', (baslik_id,))
-        old_data = dict(cursor.fetchone())
-        
-        cursor.execute('DELETE FROM not_basligi WHERE id = ?', (baslik_id,))
-        conn.commit()
-        conn.close()
-        
-        self._add_to_undo('DELETE', 'not_basligi', baslik_id, old_data, None)
+        with self._islem() as cursor:
+            cursor.execute('SELECT * FROM not_basligi WHERE id = ?', (baslik_id,))
+            old_data = dict(cursor.fetchone())
+            
+            bagimlilar = self._bagimlilari_sil(cursor, 'not_basligi', baslik_id)
+            cursor.execute('DELETE FROM not_basligi WHERE id = ?', (baslik_id,))
+            
+            self._add_to_undo(cursor, 'DELETE', 'not_basligi', baslik_id, old_data, None,
+                              bagimlilar=bagimlilar)
     
     # ==================== NOT İŞLEMLERİ ====================
     
     def get_notlar(self, ogrenci_id=None, baslik_id=None):
         """Notları döndürür."""
-        conn = get_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         
         query = '''
@@ -404,78 +743,265 @@ class DatabaseManager:
         conn.close()
         return result
     
-    def add_or_update_not(self, ogrenci_id, baslik_id, puan):
-        """Not ekler veya günceller."""
-        conn = get_connection()
+    def get_not_sayfasi(self, ogrenci_id=None, baslik_id=None, after_key=None, limit=1000):
+        """
+        Notları id sırasıyla sayfa sayfa döndürür (keyset sayfalama).
+        after_key bir önceki sayfanın son not id'sidir; ilk sayfa için None.
+        Dönüş: (notlar, sonraki_anahtar); son sayfada sonraki_anahtar None.
+        """
+        query = '''
+            SELECT n.*, nb.baslik as not_basligi, k.ad as kategori_adi,
+                   o.ad as ogrenci_adi, o.soyad as ogrenci_soyadi
+            FROM not_ n
+            LEFT JOIN not_basligi nb ON n.baslik_id = nb.id
+            LEFT JOIN kategori k ON nb.kategori_id = k.id
+            LEFT JOIN ogrenci o ON n.ogrenci_id = o.id
+            WHERE 1=1
+        '''
+        params = []
+        
+        if ogrenci_id:
+            query += ' AND n.ogrenci_id = ?'
+            params.append(ogrenci_id)
+        if baslik_id:
+            query += ' AND n.baslik_id = ?'
+            params.append(baslik_id)
+        if after_key is not None:
+            query += ' AND n.id > ?'
+            params.append(after_key)
+        
+        query += ' ORDER BY n.id LIMIT ?'
+        params.append(limit + 1)
+        
+        conn = get_read_connection()
         cursor = conn.cursor()
+        cursor.execute(query, params)
+        result = [dict(row) for row in cursor.fetchall()]
+        conn.close()
         
-        # Mevcut not var mı kontrol et
-        cursor.execute(
-            'SELECT * FROM not_ WHERE ogrenci_id = ? AND baslik_id = ?',
-            (ogrenci_id, baslik_id)
-        )
-        existing = cursor.fetchone()
+        if len(result) > limit:
+            result = result[:limit]
+            return result, result[-1]['id']
+        return result, None
+    
+    def iter_notlar(self, ogrenci_id=None, baslik_id=None, parca=1000):
+        """Notları get_not_sayfasi ile parça parça okuyarak tek tek üretir."""
+        anahtar = None
+        while True:
+            sayfa, anahtar = self.get_not_sayfasi(ogrenci_id, baslik_id, anahtar, parca)
+            yield from sayfa
+            if anahtar is None:
+                return
+    
+    def get_not_matrisi(self, sinif_id, baslik_ids=None, siralama='soyad', azalan=False):
+        """
+        Sınıfın not çizelgesini (öğrenci x başlık) tek seferde döndürür.
+        sinif_id None ise tüm öğrenciler alınır.
+        baslik_ids verilirse yalnızca bu başlıklar, verilmezse sınıfın
+        tüm başlıkları (kategori sırasına göre) sütun olur.
+        Öğrenci sırası get_all_ogrenciler ile aynıdır (siralama, azalan).
+        
+        Dönüş: {
+            'ogrenciler': [ogrenci, ...],
+            'basliklar': [baslik, ...],
+            'puanlar': [[puan veya None, ...], ...]  # ogrenciler x basliklar
+        }
+        """
+        conn = get_read_connection()
+        cursor = conn.cursor()
         
-        if existing:
-            old_data = dict(existing)
-            cursor.execute(
-                '''UPDATE not_ SET puan = ?, guncelleme_tarihi = CURRENT_TIMESTAMP 
-                   WHERE ogrenci_id = ? AND baslik_id = ?''',
-                (puan, ogrenci_id, baslik_id)
-            )
-            self._add_to_undo('UPDATE', 'not_', existing['id'], old_data, {'puan': puan})
+        # Sütunlar
+        query = '''
+            SELECT nb.*, k.ad as kategori_adi, s.ad as sinif_adi
+            FROM not_basligi nb
+            JOIN kategori k ON nb.kategori_id = k.id
+            LEFT JOIN sinif s ON nb.sinif_id = s.id
+        '''
+        if baslik_ids:
+            query += f" WHERE nb.id IN ({', '.join('?' for _ in baslik_ids)})"
+            params = list(baslik_ids)
         else:
-            cursor.execute(
-                'INSERT INTO not_ (ogrenci_id, baslik_id, puan) VALUES (?, ?, ?)',
-                (ogrenci_id, baslik_id, puan)
-            )
-            not_id = cursor.lastrowid
-            self._add_to_undo('INSERT', 'not_', not_id, None,
-                              {'ogrenci_id': ogrenci_id, 'baslik_id': baslik_id, 'puan': puan})
+            query += ' WHERE nb.sinif_id = ?'
+            params = [sinif_id]
+        query += ' ORDER BY k.sira, k.id, nb.tarih DESC, nb.id DESC'
+        
+        cursor.execute(query, params)
+        basliklar = [dict(row) for row in cursor.fetchall()]
+        sutun = {b['id']: j for j, b in enumerate(basliklar)}
+        
+        # Öğrenciler ve notları (tek LEFT JOIN)
+        if sutun:
+            not_join = f'''
+                LEFT JOIN not_ n ON n.ogrenci_id = o.id
+                    AND n.baslik_id IN ({', '.join('?' for _ in sutun)})
+            '''
+            params = list(sutun)
+        else:
+            not_join = 'LEFT JOIN not_ n ON 0'
+            params = []
+        
+        query = f'''
+            SELECT o.*, s.ad as sinif_adi, n.baslik_id as _baslik_id, n.puan as _puan
+            FROM ogrenci o
+            LEFT JOIN sinif s ON o.sinif_id = s.id
+            {not_join}
+        '''
+        if sinif_id:
+            query += ' WHERE o.sinif_id = ?'
+            params.append(sinif_id)
+        # Son terim o.id: bir öğrencinin satırları art arda gelir
+        query += _ogrenci_sirasi(siralama, azalan)
+        
+        cursor.execute(query, params)
+        
+        ogrenciler = []
+        puanlar = []
+        son_id = None
+        for row in cursor:
+            if row['id'] != son_id:
+                son_id = row['id']
+                ogrenci = dict(row)
+                del ogrenci['_baslik_id'], ogrenci['_puan']
+                ogrenciler.append(ogrenci)
+                puanlar.append([None] * len(basliklar))
+            if row['_baslik_id'] is not None:
+                puanlar[-1][sutun[row['_baslik_id']]] = row['_puan']
         
-        conn.commit()
         conn.close()
+        return {'ogrenciler': ogrenciler, 'basliklar': basliklar, 'puanlar': puanlar}
     
+    @_yazma
+    def add_or_update_not(self, ogrenci_id, baslik_id, puan):
+        """Not ekler veya günceller."""
+        with self._islem() as cursor:
+            # Mevcut not var mı kontrol et
+            cursor.execute(
+                'SELECT * FROM not_ WHERE ogrenci_id = ? AND baslik_id = ?',
+                (ogrenci_id, baslik_id)
+            )
+            existing = cursor.fetchone()
+            
+            if existing:
+                old_data = dict(existing)
+                cursor.execute(
+                    '''UPDATE not_ SET puan = ?, guncelleme_tarihi = CURRENT_TIMESTAMP 
+                       WHERE ogrenci_id = ? AND baslik_id = ?''',
+                    (puan, ogrenci_id, baslik_id)
+                )
+                self._add_to_undo(cursor, 'UPDATE', 'not_', existing['id'], old_data, {'puan': puan})
+            else:
+                cursor.execute(
+                    'INSERT INTO not_ (ogrenci_id, baslik_id, puan) VALUES (?, ?, ?)',
+                    (ogrenci_id, baslik_id, puan)
+                )
+                not_id = cursor.lastrowid
+                self._add_to_undo(cursor, 'INSERT', 'not_', not_id, None,
+                                  {'ogrenci_id': ogrenci_id, 'baslik_id': baslik_id, 'puan': puan})
+    
+    @_yazma
     def add_bulk_notlar(self, baslik_id, notlar_dict):
         """
         Toplu not girişi yapar.
         notlar_dict: {ogrenci_id: puan, ...}
         """
-        for ogrenci_id, puan in notlar_dict.items():
-            self.add_or_update_not(ogrenci_id, baslik_id, puan)
+        return self.upsert_notlar(
+            [(ogrenci_id, baslik_id, puan) for ogrenci_id, puan in notlar_dict.items()]
+        )
     
+    @_yazma
+    def upsert_notlar(self, kayitlar):
+        """
+        Birden çok notu tek işlemde ekler veya günceller.
+        kayitlar: [(ogrenci_id, baslik_id, puan), ...]
+        Tüm toplu giriş tek bir geri alma adımı olarak kaydedilir.
+        Kaydedilen not sayısını döndürür.
+        """
+        # Aynı öğrenci/başlık için son değer geçerli
+        notlar = {(o, b): p for o, b, p in kayitlar}
+        if not notlar:
+            return 0
+        
+        ogrenci_ids = list({o for o, _ in notlar})
+        baslik_ids = list({b for _, b in notlar})
+        kosul = (
+            f"ogrenci_id IN ({', '.join('?' * len(ogrenci_ids))}) "
+            f"AND baslik_id IN ({', '.join('?' * len(baslik_ids))})"
+        )
+        
+        with self._islem() as cursor:
+            # Önceki değerler tek sorguda
+            cursor.execute(f'SELECT * FROM not_ WHERE {kosul}', ogrenci_ids + baslik_ids)
+            onceki = {
+                (row['ogrenci_id'], row['baslik_id']): dict(row)
+                for row in cursor.fetchall()
+                if (row['ogrenci_id'], row['baslik_id']) in notlar
+            }
+            
+            cursor.executemany(
+                '''INSERT INTO not_ (ogrenci_id, baslik_id, puan) VALUES (?, ?, ?)
+                   ON CONFLICT(ogrenci_id, baslik_id) DO UPDATE SET
+                       puan = excluded.puan,
+                       guncelleme_tarihi = CURRENT_TIMESTAMP''',
+                [(o, b, p) for (o, b), p in notlar.items()]
+            )
+            
+            # Yeni eklenen kayıtların id'leri
+            yeni_idler = {}
+            if len(onceki) < len(notlar):
+                cursor.execute(
+                    f'SELECT id, ogrenci_id, baslik_id FROM not_ WHERE {kosul}',
+                    ogrenci_ids + baslik_ids
+                )
+                yeni_idler = {
+                    (row['ogrenci_id'], row['baslik_id']): row['id']
+                    for row in cursor.fetchall()
+                }
+            
+            adimlar = []
+            for (ogrenci_id, baslik_id), puan in notlar.items():
+                eski = onceki.get((ogrenci_id, baslik_id))
+                if eski:
+                    adimlar.append(self._undo_kaydi('UPDATE', 'not_', eski['id'], eski, {'puan': puan}))
+                else:
+                    adimlar.append(self._undo_kaydi(
+                        'INSERT', 'not_', yeni_idler[(ogrenci_id, baslik_id)], None,
+                        {'ogrenci_id': ogrenci_id, 'baslik_id': baslik_id, 'puan': puan}
+                    ))
+            
+            if len(adimlar) == 1:
+                self._add_to_undo(cursor, **adimlar[0])
+            else:
+                self._add_to_undo(cursor, 'GRUP', 'not_', None, None, None, adimlar=adimlar)
+        
+        return len(notlar)
+    
+    @_yazma
     def delete_not(self, ogrenci_id, baslik_id):
         """Notu siler."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            'SELECT * FROM not_ WHERE ogrenci_id = ? AND baslik_id = ?',
-            (ogrenci_id, baslik_id)
-        )
-        old_data = cursor.fetchone()
-        if old_data:
-            old_data = dict(old_data)
+        with self._islem() as cursor:
             cursor.execute(
-                'DELETE FROM not_ WHERE ogrenci_id = ? AND baslik_id = ?',
+                'SELECT * FROM not_ WHERE ogrenci_id = ? AND baslik_id = ?',
                 (ogrenci_id, baslik_id)
             )
-            conn.commit()
-            self._add_to_undo('DELETE', 'not_', old_data['id'], old_data, None)
-        
-        conn.close()
+            old_data = cursor.fetchone()
+            if old_data:
+                old_data = dict(old_data)
+                cursor.execute(
+                    'DELETE FROM not_ WHERE ogrenci_id = ? AND baslik_id = ?',
+                    (ogrenci_id, baslik_id)
+                )
+                self._add_to_undo(cursor, 'DELETE', 'not_', old_data['id'], old_data, None)
     
     # ==================== ORTALAMA HESAPLAMALARI ====================
     
     def get_ogrenci_kategori_ortalama(self, ogrenci_id, kategori_id):
-        """Öğrencinin bir kategorideki ortalamasını hesaplar."""
-        conn = get_connection()
+        """Öğrencinin bir kategorideki ortalamasını döndürür (özet tablosundan)."""
+        conn = get_read_connection()
         cursor = conn.cursor()
         cursor.execute('''
-            SELECT AVG(n.puan) as ortalama
-            FROM not_ n
-            JOIN not_basligi nb ON n.baslik_id = nb.id
-            WHERE n.ogrenci_id = ? AND nb.kategori_id = ?
+            SELECT ortalama
+            FROM ogrenci_kategori_ozet
+            WHERE ogrenci_id = ? AND kategori_id = ?
         ''', (ogrenci_id, kategori_id))
         
         row = cursor.fetchone()
@@ -483,38 +1009,72 @@ class DatabaseManager:
         return row['ortalama'] if row and row['ortalama'] else None
     
     def get_ogrenci_genel_ortalama(self, ogrenci_id):
-        """Öğrencinin genel ortalamasını hesaplar (kategori ortalamalarının ortalaması)."""
-        kategoriler = self.get_all_kategoriler()
-        ortalamalar = []
+        """Öğrencinin genel ortalamasını döndürür (kategori ortalamalarının ortalaması)."""
+        conn = get_read_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            'SELECT genel_ortalama FROM ogrenci_genel_ozet WHERE ogrenci_id = ?',
+            (ogrenci_id,)
+        )
+        row = cursor.fetchone()
+        conn.close()
+        return row['genel_ortalama'] if row and row['genel_ortalama'] else None
+    
+    def get_ortalama_tablosu(self, sinif_id=None):
+        """
+        Sınıftaki (sinif_id None ise tüm okuldaki) öğrencilerin ortalamalarını
+        özet tablolarından tek sorguda döndürür.
+        Dönüş: {ogrenci_id: {'kategoriler': {kategori_id: ort, ...}, 'genel': ort}}
+        Hiç notu olmayan öğrenciler sözlükte yer almaz.
+        """
+        conn = get_read_connection()
+        cursor = conn.cursor()
         
-        for kategori in kategoriler:
-            avg = self.get_ogrenci_kategori_ortalama(ogrenci_id, kategori['id'])
-            if avg is not None:
-                ortalamalar.append(avg)
+        query = '''
+            SELECT oz.ogrenci_id, oz.kategori_id, oz.ortalama, g.genel_ortalama
+            FROM ogrenci_kategori_ozet oz
+            JOIN ogrenci o ON oz.ogrenci_id = o.id
+            LEFT JOIN ogrenci_genel_ozet g ON g.ogrenci_id = oz.ogrenci_id
+        '''
+        params = []
+        if sinif_id:
+            query += ' WHERE o.sinif_id = ?'
+            params.append(sinif_id)
         
-        if ortalamalar:
-            return sum(ortalamalar) / len(ortalamalar)
-        return None
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        conn.close()
+        
+        tablo = {}
+        for row in rows:
+            # get_ogrenci_kategori_ortalama ile aynı kural: 0/None ortalama sayılmaz
+            if not row['ortalama']:
+                continue
+            kayit = tablo.setdefault(
+                row['ogrenci_id'], {'kategoriler': {}, 'genel': row['genel_ortalama']}
+            )
+            kayit['kategoriler'][row['kategori_id']] = row['ortalama']
+        
+        return tablo
     
     def get_sinif_kategori_ortalama(self, sinif_id, kategori_id):
         """Sınıfın bir kategorideki ortalamasını hesaplar. sinif_id None ise tüm okulu hesaplar."""
-        conn = get_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         
+        # Özetteki toplam/adet değerlerinden tüm notların ortalaması
         if sinif_id:
             cursor.execute('''
-                SELECT AVG(n.puan) as ortalama
-                FROM not_ n
-                JOIN not_basligi nb ON n.baslik_id = nb.id
-                JOIN ogrenci o ON n.ogrenci_id = o.id
-                WHERE o.sinif_id = ? AND nb.kategori_id = ?
+                SELECT TOTAL(oz.toplam) / NULLIF(SUM(oz.adet), 0) as ortalama
+                FROM ogrenci_kategori_ozet oz
+                JOIN ogrenci o ON oz.ogrenci_id = o.id
+                WHERE o.sinif_id = ? AND oz.kategori_id = ?
             ''', (sinif_id, kategori_id))
         else:
-             cursor.execute('''
-                SELECT AVG(n.puan) as ortalama
-                FROM not_ n
-                JOIN not_basligi nb ON n.baslik_id = nb.id
-                WHERE nb.kategori_id = ?
+            cursor.execute('''
+                SELECT TOTAL(toplam) / NULLIF(SUM(adet), 0) as ortalama
+                FROM ogrenci_kategori_ozet
+                WHERE kategori_id = ?
             ''', (kategori_id,))
         
         row = cursor.fetchone()
@@ -535,6 +1095,45 @@ class DatabaseManager:
             return sum(ortalamalar) / len(ortalamalar)
         return None
     
+    def get_sinif_ortalama_tablosu(self, sinif_id=None):
+        """
+        Sınıfların (sinif_id verilirse yalnızca o sınıfın) kategori ve genel
+        ortalamalarını özet tablosundan tek sorguda döndürür. Kurallar
+        get_sinif_kategori_ortalama ve get_sinif_genel_ortalama ile aynıdır.
+        Dönüş: {sinif_id: {'kategoriler': {kategori_id: ort, ...}, 'genel': ort}}
+        """
+        conn = get_read_connection()
+        cursor = conn.cursor()
+        
+        query = '''
+            SELECT o.sinif_id, oz.kategori_id,
+                   TOTAL(oz.toplam) / NULLIF(SUM(oz.adet), 0) as ortalama
+            FROM ogrenci_kategori_ozet oz
+            JOIN ogrenci o ON oz.ogrenci_id = o.id
+            WHERE o.sinif_id IS NOT NULL
+        '''
+        params = []
+        if sinif_id:
+            query += ' AND o.sinif_id = ?'
+            params.append(sinif_id)
+        query += ' GROUP BY o.sinif_id, oz.kategori_id'
+        
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        conn.close()
+        
+        tablo = {}
+        for row in rows:
+            kayit = tablo.setdefault(row['sinif_id'], {'kategoriler': {}, 'genel': None})
+            if row['ortalama']:
+                kayit['kategoriler'][row['kategori_id']] = row['ortalama']
+        for kayit in tablo.values():
+            ortalamalar = list(kayit['kategoriler'].values())
+            if ortalamalar:
+                kayit['genel'] = sum(ortalamalar) / len(ortalamalar)
+        
+        return tablo
+    
     def get_ogrenci_tum_notlar(self, ogrenci_id):
         """Öğrencinin tüm notlarını kategorilere göre gruplandırılmış döndürür."""
         kategoriler = self.get_all_kategoriler()
@@ -547,7 +1146,7 @@ class DatabaseManager:
                 'ortalama': self.get_ogrenci_kategori_ortalama(ogrenci_id, kategori['id'])
             }
             
-            conn = get_connection()
+            conn = get_read_connection()
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT n.puan, nb.baslik, nb.tarih
@@ -565,102 +1164,341 @@ class DatabaseManager:
     def get_sinif_not_dagilimi(self, sinif_id):
         """Sınıfın not dağılımını döndürür (grafik için)."""
         ogrenciler = self.get_all_ogrenciler(sinif_id)
+        ortalamalar = self.get_ortalama_tablosu(sinif_id)
         notlar = []
         
         for ogrenci in ogrenciler:
-            avg = self.get_ogrenci_genel_ortalama(ogrenci['id'])
-            if avg is not None:
-                notlar.append(avg)
+            ortalama = ortalamalar.get(ogrenci['id'])
+            if ortalama is not None:
+                notlar.append(ortalama['genel'])
         
         return notlar
     
     # ==================== UNDO İŞLEMLERİ ====================
     
-    def _add_to_undo(self, islem_tipi, tablo_adi, kayit_id, eski_veri, yeni_veri):
-        """İşlemi undo stack'e ekler."""
-        self.undo_stack.append({
+    @staticmethod
+    def _undo_kaydi(islem_tipi, tablo_adi, kayit_id, eski_veri, yeni_veri, bagimlilar=None):
+        """Tek bir undo kaydı oluşturur."""
+        islem = {
             'islem_tipi': islem_tipi,
             'tablo_adi': tablo_adi,
             'kayit_id': kayit_id,
             'eski_veri': eski_veri,
             'yeni_veri': yeni_veri
-        })
+        }
+        if bagimlilar:
+            islem['bagimlilar'] = bagimlilar
+        return islem
+    
+    @staticmethod
+    def _json(veri):
+        """Günlük için kompakt JSON üretir."""
+        if veri is None:
+            return None
+        return json.dumps(veri, ensure_ascii=False, separators=(',', ':'))
+    
+    def _add_to_undo(self, cursor, islem_tipi, tablo_adi, kayit_id, eski_veri, yeni_veri,
+                     adimlar=None, bagimlilar=None):
+        """
+        İşlemi islem_gecmisi günlüğüne ve undo penceresine ekler.
+        Değişikliği yapan işlemin cursor'ı ile çağrılır; günlük kaydı
+        değişiklikle aynı transaction içinde yazılır. Blokta son adım olmalıdır.
+        GRUP işlemlerinde adimlar, birlikte geri alınacak kayıtların listesidir.
+        DELETE işlemlerinde bagimlilar, silinen alt kayıtların görüntüsüdür.
+        Açık bir undo grubu varsa kayıt yalnızca gruba eklenir.
+        """
+        if self._grup is not None:
+            if adimlar is not None:
+                self._grup.extend(adimlar)
+            else:
+                self._grup.append(self._undo_kaydi(
+                    islem_tipi, tablo_adi, kayit_id, eski_veri, yeni_veri, bagimlilar
+                ))
+            return
+        
+        islem = self._undo_kaydi(islem_tipi, tablo_adi, kayit_id, eski_veri, yeni_veri,
+                                 bagimlilar)
+        if adimlar is not None:
+            islem['adimlar'] = adimlar
+        
+        # Yeni işlem yinelenebilir işlemleri geçersiz kılar
+        if self.redo_stack:
+            cursor.execute('DELETE FROM islem_gecmisi WHERE geri_alindi = 1')
+            self.redo_stack.clear()
+        
+        cursor.execute(
+            '''INSERT INTO islem_gecmisi
+               (islem_tipi, tablo_adi, kayit_id, eski_veri, yeni_veri, adimlar, bagimlilar)
+               VALUES (?, ?, ?, ?, ?, ?, ?)''',
+            (islem_tipi, tablo_adi, kayit_id, self._json(eski_veri), self._json(yeni_veri),
+             self._json(adimlar), self._json(bagimlilar or None))
+        )
+        islem['id'] = cursor.lastrowid
+        
+        # Saklama sınırı: en yeni max_gecmis kayıt dışındakileri tek sorguda sil
+        cursor.execute(
+            '''DELETE FROM islem_gecmisi WHERE id <= (
+                   SELECT id FROM islem_gecmisi ORDER BY id DESC LIMIT 1 OFFSET ?
+               )''',
+            (self.max_gecmis,)
+        )
+        
+        # deque(maxlen) en eski kaydı kendiliğinden düşürür
+        self.undo_stack.append(islem)
+    
+    def _pencereyi_yukle(self, geri_alindi):
+        """
+        Undo (geri_alindi=0) veya redo (geri_alindi=1) penceresini günlükten doldurur.
+        Undo için en yeni, redo için en eski kayıtlar yığının tepesine gelir.
+        """
+        conn = get_connection()
+        cursor = conn.cursor()
         
-        # Stack boyutunu sınırla
-        if len(self.undo_stack) > self.max_undo:
-            self.undo_stack.pop(0)
+        cursor.execute(
+            f'''SELECT * FROM islem_gecmisi WHERE geri_alindi = ?
+                ORDER BY id {'ASC' if geri_alindi else 'DESC'} LIMIT ?''',
+            (geri_alindi, self.max_undo)
+        )
+        kayitlar = []
+        for row in reversed(cursor.fetchall()):
+            islem = self._undo_kaydi(
+                row['islem_tipi'], row['tablo_adi'], row['kayit_id'],
+                json.loads(row['eski_veri']) if row['eski_veri'] else None,
+                json.loads(row['yeni_veri']) if row['yeni_veri'] else None,
+                json.loads(row['bagimlilar']) if row['bagimlilar'] else None,
+            )
+            if row['adimlar']:
+                islem['adimlar'] = json.loads(row['adimlar'])
+            islem['id'] = row['id']
+            kayitlar.append(islem)
+        conn.close()
+        
+        hedef = self.redo_stack if geri_alindi else self.undo_stack
+        hedef.clear()
+        hedef.extend(kayitlar)
+    
+    @_yazma
+    def reload_undo_history(self):
+        """Undo/redo pencerelerini günlükten yeniden yükler (ör. geri yüklemeden sonra)."""
+        self._pencereyi_yukle(0)
+        self._pencereyi_yukle(1)
     
+    @_yazma
     def undo(self):
         """Son işlemi geri alır."""
         if not self.undo_stack:
             return False
         
-        islem = self.undo_stack.pop()
-        conn = get_connection()
-        cursor = conn.cursor()
+        islem = self.undo_stack[-1]
         
-        try:
-            if islem['islem_tipi'] == 'INSERT':
-                # Eklenen kaydı sil
-                cursor.execute(
-                    f"DELETE FROM {islem['tablo_adi']} WHERE id = ?",
-                    (islem['kayit_id'],)
-                )
+        with self._islem() as cursor:
+            if islem['islem_tipi'] == 'GRUP':
+                # Adımları ters sırada geri al
+                for adim in reversed(islem['adimlar']):
+                    self._geri_al(cursor, adim)
+            else:
+                self._geri_al(cursor, islem)
             
-            elif islem['islem_tipi'] == 'UPDATE':
-                # Eski veriyi geri yükle
-                eski = islem['eski_veri']
-                columns = ', '.join([f"{k} = ?" for k in eski.keys() if k != 'id'])
-                values = [v for k, v in eski.items() if k != 'id']
-                values.append(islem['kayit_id'])
-                cursor.execute(
-                    f"UPDATE {islem['tablo_adi']} SET {columns} WHERE id = ?",
-                    values
-                )
+            cursor.execute(
+                '''UPDATE islem_gecmisi SET geri_alindi = 1, yeni_veri = ?, adimlar = ?
+                   WHERE id = ?''',
+                (self._json(islem['yeni_veri']), self._json(islem.get('adimlar')), islem['id'])
+            )
+        
+        self.undo_stack.pop()
+        self.redo_stack.append(islem)
+        if not self.undo_stack:
+            # Pencere boşaldı, günlükteki daha eski kayıtları getir
+            self._pencereyi_yukle(0)
+        return True
+    
+    @_yazma
+    def redo(self):
+        """Son geri alınan işlemi yeniden uygular."""
+        if not self.redo_stack:
+            return False
+        
+        islem = self.redo_stack[-1]
+        
+        with self._islem() as cursor:
+            for adim in islem.get('adimlar') or [islem]:
+                self._yeniden_uygula(cursor, adim)
             
-            elif islem['islem_tipi'] == 'DELETE':
-                # Silinen kaydı geri ekle
-                eski = islem['eski_veri']
-                columns = ', '.join(eski.keys())
-                placeholders = ', '.join(['?' for _ in eski])
+            cursor.execute(
+                'UPDATE islem_gecmisi SET geri_alindi = 0 WHERE id = ?',
+                (islem['id'],)
+            )
+        
+        self.redo_stack.pop()
+        self.undo_stack.append(islem)
+        if not self.redo_stack:
+            self._pencereyi_yukle(1)
+        return True
+    
+    def _geri_al(self, cursor, islem):
+        """Tek bir undo kaydını verilen cursor üzerinde geri alır."""
+        if islem['islem_tipi'] == 'INSERT':
+            # Yineleme için kaydın tamamını sakla, sonra sil
+            cursor.execute(
+                f"SELECT * FROM {islem['tablo_adi']} WHERE id = ?",
+                (islem['kayit_id'],)
+            )
+            row = cursor.fetchone()
+            if row:
+                islem['yeni_veri'] = dict(row)
+            cursor.execute(
+                f"DELETE FROM {islem['tablo_adi']} WHERE id = ?",
+                (islem['kayit_id'],)
+            )
+        
+        elif islem['islem_tipi'] == 'UPDATE':
+            # Eski veriyi geri yükle
+            eski = islem['eski_veri']
+            columns = ', '.join([f"{k} = ?" for k in eski.keys() if k != 'id'])
+            values = [v for k, v in eski.items() if k != 'id']
+            values.append(islem['kayit_id'])
+            cursor.execute(
+                f"UPDATE {islem['tablo_adi']} SET {columns} WHERE id = ?",
+                values
+            )
+        
+        elif islem['islem_tipi'] == 'DELETE':
+            # Silinen kaydı geri ekle
+            eski = islem['eski_veri']
+            columns = ', '.join(eski.keys())
+            placeholders = ', '.join(['?' for _ in eski])
+            cursor.execute(
+                f"INSERT INTO {islem['tablo_adi']} ({columns}) VALUES ({placeholders})",
+                list(eski.values())
+            )
+            # Alt kayıtları bağımlılık sırasıyla geri yükle
+            self._bagimlilari_geri_yukle(cursor, islem.get('bagimlilar') or [], islem['kayit_id'])
+        
+        self._sira_anahtarini_onar(cursor, islem)
+    
+    def _sira_anahtarini_onar(self, cursor, islem):
+        """Sıralama anahtarları olmadan alınmış eski görüntüler için öğrencinin anahtarını düzeltir."""
+        if islem['tablo_adi'] == 'ogrenci' and islem['islem_tipi'] != 'GRUP' and islem['kayit_id']:
+            sira_anahtarlarini_guncelle(cursor, [islem['kayit_id']])
+    
+    def _yeniden_uygula(self, cursor, islem):
+        """Geri alınmış tek bir kaydı verilen cursor üzerinde yeniden uygular."""
+        if islem['islem_tipi'] == 'INSERT':
+            # Kaydı aynı id ile geri ekle
+            veri = dict(islem['yeni_veri'], id=islem['kayit_id'])
+            columns = ', '.join(veri.keys())
+            placeholders = ', '.join(['?' for _ in veri])
+            cursor.execute(
+                f"INSERT INTO {islem['tablo_adi']} ({columns}) VALUES ({placeholders})",
+                list(veri.values())
+            )
+        
+        elif islem['islem_tipi'] == 'UPDATE':
+            yeni = islem['yeni_veri']
+            columns = ', '.join([f"{k} = ?" for k in yeni.keys()])
+            cursor.execute(
+                f"UPDATE {islem['tablo_adi']} SET {columns} WHERE id = ?",
+                list(yeni.values()) + [islem['kayit_id']]
+            )
+        
+        elif islem['islem_tipi'] == 'DELETE':
+            self._bagimlilari_sil(cursor, islem['tablo_adi'], islem['kayit_id'])
+            cursor.execute(
+                f"DELETE FROM {islem['tablo_adi']} WHERE id = ?",
+                (islem['kayit_id'],)
+            )
+        
+        self._sira_anahtarini_onar(cursor, islem)
+    
+    def _bagimlilari_sil(self, cursor, tablo_adi, kayit_id):
+        """
+        Silinecek kayda bağlı alt kayıtların görüntüsünü toplu SELECT'lerle alır
+        ve onları siler. foreign_keys kapalıyken de cascade ile aynı sonucu verir.
+        Geri yükleme sırasıyla bağımlılık listesi döndürür.
+        """
+        bagimlilar = []
+        for tablo, kolon in _SIFIRLANAN_KOLONLAR.get(tablo_adi, []):
+            cursor.execute(f'SELECT id FROM {tablo} WHERE {kolon} = ?', (kayit_id,))
+            idler = [row['id'] for row in cursor.fetchall()]
+            if idler:
+                bagimlilar.append({'tablo': tablo, 'kolon': kolon, 'idler': idler})
+        
+        silinecekler = _BAGIMLI_TABLOLAR.get(tablo_adi, [])
+        for tablo, kosul in silinecekler:
+            cursor.execute(f'SELECT * FROM {tablo} WHERE {kosul}', (kayit_id,))
+            satirlar = cursor.fetchall()
+            if satirlar:
+                bagimlilar.append({
+                    'tablo': tablo,
+                    'kolonlar': list(satirlar[0].keys()),
+                    'satirlar': [list(row) for row in satirlar],
+                })
+        
+        # Önce en alttaki tablolar silinir
+        for tablo, kosul in reversed(silinecekler):
+            cursor.execute(f'DELETE FROM {tablo} WHERE {kosul}', (kayit_id,))
+        for tablo, kolon in _SIFIRLANAN_KOLONLAR.get(tablo_adi, []):
+            cursor.execute(f'UPDATE {tablo} SET {kolon} = NULL WHERE {kolon} = ?', (kayit_id,))
+        
+        return bagimlilar
+    
+    def _bagimlilari_geri_yukle(self, cursor, bagimlilar, kayit_id):
+        """_bagimlilari_sil ile alınan görüntüyü executemany ile geri yükler."""
+        for bagimli in bagimlilar:
+            if 'kolon' in bagimli:
+                idler = bagimli['idler']
                 cursor.execute(
-                    f"INSERT INTO {islem['tablo_adi']} ({columns}) VALUES ({placeholders})",
-                    list(eski.values())
+                    f"UPDATE {bagimli['tablo']} SET {bagimli['kolon']} = ? "
+                    f"WHERE id IN ({', '.join('?' * len(idler))})",
+                    [kayit_id] + idler
+                )
+            else:
+                kolonlar = bagimli['kolonlar']
+                cursor.executemany(
+                    f"INSERT INTO {bagimli['tablo']} ({', '.join(kolonlar)}) "
+                    f"VALUES ({', '.join('?' * len(kolonlar))})",
+                    bagimli['satirlar']
                 )
-            
-            conn.commit()
-            conn.close()
-            return True
-        
-        except Exception as e:
-            conn.rollback()
-            conn.close()
-            raise e
     
     def can_undo(self):
         """Geri alınabilecek işlem var mı kontrol eder."""
         return len(self.undo_stack) > 0
     
-    def get_undo_description(self):
-        """Son geri alınabilecek işlemin açıklamasını döndürür."""
-        if not self.undo_stack:
-            return None
-        
-        islem = self.undo_stack[-1]
+    def can_redo(self):
+        """Yinelenebilecek işlem var mı kontrol eder."""
+        return len(self.redo_stack) > 0
+    
+    def _islem_aciklamasi(self, islem):
+        """Undo/redo kaydı için kısa açıklama döndürür."""
         tablo_map = {
             'sinif': 'Sınıf',
             'ogrenci': 'Öğrenci',
             'kategori': 'Kategori',
             'not_basligi': 'Not Başlığı',
-            'not_': 'Not'
+            'not_': 'Not',
+            'karma': 'Çoklu'
         }
         islem_map = {
             'INSERT': 'ekleme',
             'UPDATE': 'güncelleme',
-            'DELETE': 'silme'
+            'DELETE': 'silme',
+            'GRUP': 'toplu güncelleme'
         }
         
         tablo = tablo_map.get(islem['tablo_adi'], islem['tablo_adi'])
         tip = islem_map.get(islem['islem_tipi'], islem['islem_tipi'])
-        
-        return f"{tablo} {tip} işlemini geri al"
+        if islem['islem_tipi'] == 'GRUP':
+            tip += f" ({len(islem['adimlar'])} kayıt)"
+        return f"{tablo} {tip}"
+    
+    def get_undo_description(self):
+        """Son geri alınabilecek işlemin açıklamasını döndürür."""
+        if not self.undo_stack:
+            return None
+        return f"{self._islem_aciklamasi(self.undo_stack[-1])} işlemini geri al"
+    
+    def get_redo_description(self):
+        """Son yinelenebilecek işlemin açıklamasını döndürür."""
+        if not self.redo_stack:
+            return None
+        return f"{self._islem_aciklamasi(self.redo_stack[-1])} işlemini yinele"
@@ -0,0 +1,305 @@
+"""
+Sorgu ölçümü (isteğe bağlı).
+Açıkken her SQL ifadesinin süresini ve satır sayısını kaydeder; sonuçları
+DatabaseManager metoduna ve UI eylemine (ör. refresh_views) göre toplar.
+Eşikten yavaş sorgular EXPLAIN QUERY PLAN çıktısıyla birlikte saklanır.
+Kapalıyken bağlantılar normal cursor kullanır, ek maliyet yoktur.
+Veritabanı katmanının uyarıları (ör. FTS5 yok, indeks kullanılmıyor)
+ölçüm kapalıyken de uyarılar listesinde toplanır.
+"""
+import contextvars
+import functools
+import inspect
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+
+# Çağrı zinciri boyunca taşınır (yazıcı thread'ine ve okuma havuzuna da)
+_metot = contextvars.ContextVar('metot', default=None)
+_eylem = contextvars.ContextVar('eylem', default=None)
+
+# Planı anlamlı olmayan ifadeler
+_PLANSIZ = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', 'PRAGMA', 'EXPLAIN')
+
+
+def _yeni_sayac():
+    # sure: sorgularda geçen süre, toplam_sure: çağrının/eylemin toplam süresi
+    return {'cagri': 0, 'sorgu': 0, 'sure': 0.0, 'satir': 0, 'toplam_sure': 0.0}
+
+
+class QueryInstrumentation:
+    """Sorgu sayısı, süre ve satır istatistiklerini toplayan sınıf."""
+    
+    def __init__(self, yavas_esik_ms=50, max_yavas=100, max_uyari=50):
+        self.yavas_esik = yavas_esik_ms / 1000
+        self.aktif = False
+        self._kilit = threading.Lock()
+        self._max_yavas = max_yavas
+        # Uyarılar açılışta (init_db) oluşur; reset ile silinmez
+        self._uyarilar = deque(maxlen=max_uyari)
+        self.reset()
+    
+    # ==================== AÇMA / KAPAMA ====================
+    
+    def enable(self):
+        """Ölçümü açar (yeni açılan cursor'lar ölçülür)."""
+        self.aktif = True
+    
+    def disable(self):
+        """Ölçümü kapatır; toplanan veriler korunur."""
+        self.aktif = False
+    
+    def reset(self):
+        """Toplanan tüm istatistikleri siler."""
+        with self._kilit:
+            self._baslangic = datetime.now()
+            self._toplam = _yeni_sayac()
+            self._metotlar = {}
+            self._eylemler = {}
+            self._ifadeler = {}
+            self._yavaslar = deque(maxlen=self._max_yavas)
+    
+    # ==================== UYARILAR ====================
+    
+    def warn(self, kaynak, mesaj):
+        """Veritabanı katmanından bir uyarı kaydeder (tanılama raporunda gösterilir)."""
+        with self._kilit:
+            self._uyarilar.append({
+                'tarih': datetime.now().isoformat(timespec='seconds'),
+                'kaynak': kaynak,
+                'mesaj': str(mesaj),
+            })
+    
+    # ==================== BAĞLAM ====================
+    
+    @contextmanager
+    def action(self, ad):
+        """
+        Bloktaki sorguları bir UI eylemine bağlar.
+            
+            with instrumentation.action('refresh_views'):
+                ...
+        
+        İç içe eylemlerde en dıştaki geçerlidir.
+        """
+        if not self.aktif or _eylem.get() is not None:
+            yield
+            return
+        
+        belirtec = _eylem.set(ad)
+        baslangic = time.perf_counter()
+        try:
+            yield
+        finally:
+            _eylem.reset(belirtec)
+            self._cagri_ekle(self._eylemler, ad, time.perf_counter() - baslangic)
+    
+    def instrument(self, db_manager):
+        """
+        DatabaseManager'ın public metotlarını sarar; sorgular çağrılan
+        metoda göre toplanır. Ölçüm kapalıyken sarıcı yalnızca metodu çağırır.
+        """
+        for ad, _ in inspect.getmembers(type(db_manager), inspect.isfunction):
+            if ad.startswith('_') or ad in ('undo_grubu', 'submit_write'):
+                continue
+            setattr(db_manager, ad, self._metodu_sar(ad, getattr(db_manager, ad)))
+        return db_manager
+    
+    def _metodu_sar(self, ad, metot):
+        @functools.wraps(metot)
+        def sarici(*args, **kwargs):
+            # İç çağrılar (ör. get_sinif_not_dagilimi -> get_all_ogrenciler) dıştakine yazılır
+            if not self.aktif or _metot.get() is not None:
+                return metot(*args, **kwargs)
+            
+            belirtec = _metot.set(ad)
+            baslangic = time.perf_counter()
+            try:
+                return metot(*args, **kwargs)
+            finally:
+                _metot.reset(belirtec)
+                self._cagri_ekle(self._metotlar, ad, time.perf_counter() - baslangic)
+        return sarici
+    
+    # ==================== KAYIT ====================
+    
+    def _cagri_ekle(self, tablo, ad, sure):
+        with self._kilit:
+            sayac = tablo.setdefault(ad, _yeni_sayac())
+            sayac['cagri'] += 1
+            sayac['toplam_sure'] += sure
+    
+    def _kaydet(self, sql, sure, satir, yeni):
+        """
+        Bir ifadenin süresini ve satırlarını ekler.
+        yeni=False: aynı ifadenin fetch süresi/satırları (sorgu sayısı artmaz).
+        """
+        sayi = 1 if yeni else 0
+        anahtarlar = ((self._metotlar, _metot.get()), (self._eylemler, _eylem.get()))
+        with self._kilit:
+            for sayac in (self._toplam, self._ifadeler.setdefault(sql, _yeni_sayac())):
+                sayac['sorgu'] += sayi
+                sayac['sure'] += sure
+                sayac['satir'] += satir
+            for tablo, ad in anahtarlar:
+                if ad is not None:
+                    sayac = tablo.setdefault(ad, _yeni_sayac())
+                    sayac['sorgu'] += sayi
+                    sayac['sure'] += sure
+                    sayac['satir'] += satir
+    
+    def _yavas_kaydet(self, conn, sql, params, sure):
+        """Yavaş sorguyu planıyla birlikte saklar."""
+        plan = None
+        if not sql.lstrip().upper().startswith(_PLANSIZ):
+            try:
+                # Ölçülmeyen düz cursor: plan sorgusu istatistiklere karışmasın
+                satirlar = sqlite3.Cursor(conn).execute(
+                    f'EXPLAIN QUERY PLAN {sql}', params
+                ).fetchall()
+                plan = [row[3] for row in satirlar]
+            except sqlite3.Error:
+                pass
+        
+        with self._kilit:
+            self._yavaslar.append({
+                'tarih': datetime.now().isoformat(timespec='seconds'),
+                'sure_ms': round(sure * 1000, 2),
+                'sql': ' '.join(sql.split()),
+                'params': repr(params)[:200],
+                'metot': _metot.get(),
+                'eylem': _eylem.get(),
+                'plan': plan,
+            })
+    
+    # ==================== RAPOR ====================
+    
+    @staticmethod
+    def _satirlar(tablo, anahtar, limit=None):
+        satirlar = [
+            {
+                anahtar: ad,
+                'cagri': sayac['cagri'],
+                'sorgu': sayac['sorgu'],
+                'sure_ms': round(sayac['sure'] * 1000, 2),
+                'toplam_sure_ms': round(sayac['toplam_sure'] * 1000, 2),
+                'satir': sayac['satir'],
+            }
+            for ad, sayac in tablo.items()
+        ]
+        satirlar.sort(key=lambda s: s['sure_ms'], reverse=True)
+        return satirlar[:limit] if limit else satirlar
+    
+    def get_report(self, conn=None, limit=20):
+        """
+        Toplanan istatistikleri sözlük olarak döndürür (en yavaştan hızlıya).
+        conn verilirse indeks kontrolleri (check_query_plans) de eklenir.
+        """
+        with self._kilit:
+            rapor = {
+                'baslangic': self._baslangic.isoformat(timespec='seconds'),
+                'tarih': datetime.now().isoformat(timespec='seconds'),
+                'aktif': self.aktif,
+                'yavas_esik_ms': self.yavas_esik * 1000,
+                'toplam': {
+                    'sorgu': self._toplam['sorgu'],
+                    'sure_ms': round(self._toplam['sure'] * 1000, 2),
+                    'satir': self._toplam['satir'],
+                },
+                'metotlar': self._satirlar(self._metotlar, 'metot'),
+                'eylemler': self._satirlar(self._eylemler, 'eylem'),
+                'ifadeler': [
+                    {key: deger for key, deger in satir.items()
+                     if key not in ('cagri', 'toplam_sure_ms')}
+                    for satir in self._satirlar(self._ifadeler, 'sql', limit)
+                ],
+                'yavas_sorgular': list(reversed(self._yavaslar)),
+                'uyarilar': list(reversed(self._uyarilar)),
+            }
+        
+        if conn is not None:
+            from .models import check_query_plans
+            rapor['plan_uyarilari'] = check_query_plans(sqlite3.Cursor(conn))
+        return rapor
+    
+    def export_json(self, path, conn=None):
+        """Raporu JSON dosyasına yazar (hata raporlarına eklemek için)."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.get_report(conn, limit=None), f, ensure_ascii=False, indent=2)
+        return path
+
+
+class _OlcumluCursor(sqlite3.Cursor):
+    """Süre ve satır sayısını instrumentation'a bildiren cursor."""
+    
+    _sql = None
+    _params = ()
+    _sure = 0.0
+    _yavas = False
+    
+    def execute(self, sql, params=()):
+        baslangic = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            self._basla(sql, params, time.perf_counter() - baslangic)
+    
+    def executemany(self, sql, params_listesi):
+        params_listesi = list(params_listesi)
+        baslangic = time.perf_counter()
+        try:
+            return super().executemany(sql, params_listesi)
+        finally:
+            self._basla(sql, params_listesi[0] if params_listesi else (),
+                        time.perf_counter() - baslangic)
+    
+    def executescript(self, betik):
+        baslangic = time.perf_counter()
+        try:
+            return super().executescript(betik)
+        finally:
+            self._sql = None
+            instrumentation._kaydet(betik, time.perf_counter() - baslangic, 0, True)
+    
+    def _basla(self, sql, params, sure):
+        self._sql, self._params, self._sure, self._yavas = sql, params, sure, False
+        # SELECT'te rowcount -1; satırlar fetch sırasında sayılır
+        instrumentation._kaydet(sql, sure, max(self.rowcount, 0), True)
+        self._yavas_mi()
+    
+    def _getir(self, fn, *args):
+        baslangic = time.perf_counter()
+        sonuc = fn(*args)
+        if self._sql is not None:
+            sure = time.perf_counter() - baslangic
+            satir = len(sonuc) if isinstance(sonuc, list) else int(sonuc is not None)
+            self._sure += sure
+            instrumentation._kaydet(self._sql, sure, satir, False)
+            self._yavas_mi()
+        return sonuc
+    
+    def _yavas_mi(self):
+        if not self._yavas and self._sure >= instrumentation.yavas_esik:
+            self._yavas = True
+            instrumentation._yavas_kaydet(self.connection, self._sql, self._params, self._sure)
+    
+    def fetchone(self):
+        return self._getir(super().fetchone)
+    
+    def fetchmany(self, size=None):
+        return self._getir(super().fetchmany, size if size is not None else self.arraysize)
+    
+    def fetchall(self):
+        return self._getir(super().fetchall)
+    
+    def __next__(self):
+        return self._getir(super().__next__)
+
+
+# Uygulama genelinde tek örnek
+instrumentation = QueryInstrumentation()
@@ -0,0 +1,120 @@
+"""
+Veritabanı bakım işlemleri.
+PRAGMA optimize, incremental_vacuum ve integrity_check'i arka planda
+belirli aralıklarla çalıştırır; dosya ve boş sayfa bilgilerini raporlar.
+Yazan adımlar yazıcı thread'inde (bkz. WriteQueue) sırası gelince çalışır,
+kontroller okuma havuzundan yapılır.
+"""
+import os
+import threading
+from datetime import datetime
+from .instrumentation import instrumentation
+from .models import get_connection, get_read_connection, get_db_path
+
+
+class MaintenanceManager:
+    """Veritabanı bakımını zamanlayan ve raporlayan sınıf."""
+    
+    def __init__(self, db_manager, aralik_saat=24, ilk_gecikme_sn=60):
+        self.db = db_manager
+        self.aralik = aralik_saat * 3600
+        self.ilk_gecikme = ilk_gecikme_sn
+        self.son_rapor = None
+        self._kilit = threading.Lock()
+        self._dur = threading.Event()
+        self._thread = None
+    
+    # ==================== ZAMANLAYICI ====================
+    
+    def start(self):
+        """Arka plan bakım thread'ini başlatır."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._dur.clear()
+        self._thread = threading.Thread(
+            target=self._calis, name='veritabani-bakim', daemon=True
+        )
+        self._thread.start()
+    
+    def stop(self):
+        """Bakım thread'ini durdurur."""
+        self._dur.set()
+    
+    def _calis(self):
+        bekleme = self.ilk_gecikme
+        # wait() True dönerse durdurulmuştur
+        while not self._dur.wait(bekleme):
+            try:
+                self.run_maintenance()
+            except Exception as e:
+                # Thread ölmesin; sonraki aralıkta yeniden denenir
+                instrumentation.warn('bakim', f"Veritabanı bakımı başarısız: {e}")
+            bekleme = self.aralik
+    
+    # ==================== BAKIM ====================
+    
+    def run_maintenance(self):
+        """
+        Bakımı hemen çalıştırır ve raporu döndürür.
+        Aynı anda yalnızca bir bakım çalışır.
+        """
+        with self._kilit:
+            once = self.get_db_stats()
+            
+            # VACUUM transaction içinde çalışamaz; yazıcı bu sırada başka yazma yapmaz
+            self.db.run_outside_transaction(self._yazan_adimlar)
+            
+            conn = get_read_connection()
+            sonuclar = [row[0] for row in conn.execute('PRAGMA integrity_check')]
+            fk_hatalari = conn.execute('PRAGMA foreign_key_check').fetchall()
+            conn.close()
+            
+            self.son_rapor = {
+                'tarih': datetime.now(),
+                'butunluk': 'ok' if sonuclar == ['ok'] else '; '.join(sonuclar),
+                'fk_hatasi': len(fk_hatalari),
+                'once': once,
+                'sonra': self.get_db_stats(),
+            }
+            return self.son_rapor
+    
+    @staticmethod
+    def _yazan_adimlar():
+        """Yazıcı thread'inde çalışır: istatistikler, boş sayfalar, WAL."""
+        conn = get_connection()
+        
+        # İstatistikleri güncelle; hiç ANALYZE yapılmamışsa tam ANALYZE
+        analiz_var = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+        ).fetchone()
+        conn.execute('PRAGMA optimize' if analiz_var else 'ANALYZE')
+        conn.commit()
+        
+        # Boş sayfaları dosyadan geri ver
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+            # execute() her adımda tek sayfa bırakır; executescript sonuna kadar çalıştırır
+            conn.executescript('PRAGMA incremental_vacuum;')
+        else:
+            # Eski veritabanı: auto_vacuum ayarı ancak VACUUM ile geçerli olur (bir kez)
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('VACUUM')
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    
+    def get_db_stats(self):
+        """Dosya boyutu ve boş sayfa (freelist) bilgilerini döndürür."""
+        conn = get_read_connection()
+        sayfa_boyutu = conn.execute('PRAGMA page_size').fetchone()[0]
+        sayfa_sayisi = conn.execute('PRAGMA page_count').fetchone()[0]
+        bos_sayfa = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        conn.close()
+        
+        db_path = get_db_path()
+        wal_path = db_path + '-wal'
+        return {
+            'dosya_boyutu': os.path.getsize(db_path) if os.path.exists(db_path) else 0,
+            'wal_boyutu': os.path.getsize(wal_path) if os.path.exists(wal_path) else 0,
+            'sayfa_boyutu': sayfa_boyutu,
+            'sayfa_sayisi': sayfa_sayisi,
+            'bos_sayfa': bos_sayfa,
+            'bos_boyut': bos_sayfa * sayfa_boyutu,
+        }
@@ -4,7 +4,20 @@ SQLite kullanarak öğrenci takip sistemi için gerekli tabloları oluşturur.
 """
 import sqlite3
 import os
+import threading
 from datetime import datetime
+from .instrumentation import instrumentation, _OlcumluCursor
+
+
+# Her bağlantı açıldığında bir kez uygulanan ayarlar
+_PRAGMALAR = (
+    ('foreign_keys', 'ON'),     # ON DELETE CASCADE / SET NULL kuralları
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -16000),     # ~16 MB sayfa önbelleği
+    ('mmap_size', 67108864),    # 64 MB bellek eşlemeli G/Ç
+    ('temp_store', 'MEMORY'),
+)
 
 
 def get_db_path():
@@ -23,15 +36,210 @@ def get_db_path():
     return db_path
 
 
-def init_db():
+def _ozet_ekle_sql(kaynak):
     """
-    Veritabanını başlatır ve gerekli tabloları oluşturur.
-    Varsayılan kategorileri de ekler.
+    Özet tablosuna fark ekleyen upsert ifadesini döndürür.
+    kaynak: ogrenci_id, kategori_id, toplam, adet sütunlarını veren SELECT.
+    Çıkarma işlemi için toplam ve adet negatif verilir. Puansız notların
+    (adet 0) katkısı atlanır; rebuild_ozet_tablolari gibi boş satır oluşmaz.
     """
-    db_path = get_db_path()
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    return f'''
+        INSERT INTO ogrenci_kategori_ozet (ogrenci_id, kategori_id, toplam, adet, ortalama)
+        SELECT ogrenci_id, kategori_id, toplam, adet, toplam / NULLIF(adet, 0)
+        FROM ({kaynak}) WHERE adet <> 0
+        ON CONFLICT(ogrenci_id, kategori_id) DO UPDATE SET
+            toplam = toplam + excluded.toplam,
+            adet = adet + excluded.adet,
+            ortalama = (toplam + excluded.toplam) / NULLIF(adet + excluded.adet, 0);
+    '''
+
+
+def _genel_ozet_sql(ogrenci):
+    """Öğrencinin genel ortalamasını kategori özetlerinden yeniden hesaplar."""
+    # get_ogrenci_kategori_ortalama ile aynı kural: 0/NULL ortalama sayılmaz.
+    # Sayılacak kategori kalmadıysa satır silinir (rebuild_ozet_tablolari ile aynı)
+    return f'''
+        INSERT INTO ogrenci_genel_ozet (ogrenci_id, genel_ortalama)
+        SELECT {ogrenci}, AVG(ortalama)
+        FROM ogrenci_kategori_ozet
+        WHERE ogrenci_id = {ogrenci} AND ortalama <> 0
+        HAVING COUNT(*) > 0
+        ON CONFLICT(ogrenci_id) DO UPDATE SET genel_ortalama = excluded.genel_ortalama;
+        DELETE FROM ogrenci_genel_ozet
+        WHERE ogrenci_id = {ogrenci}
+          AND NOT EXISTS (SELECT 1 FROM ogrenci_kategori_ozet
+                          WHERE ogrenci_id = {ogrenci} AND ortalama <> 0);
+    '''
+
+
+# Bir notun özetteki katkısı (kategorisi silinmiş başlıklar sayılmaz)
+_NOT_KATKISI = '''
+    SELECT {r}.ogrenci_id AS ogrenci_id, nb.kategori_id AS kategori_id,
+           {isaret}COALESCE({r}.puan, 0) AS toplam, {isaret}({r}.puan IS NOT NULL) AS adet
+    FROM not_basligi nb JOIN kategori k ON k.id = nb.kategori_id
+    WHERE nb.id = {r}.baslik_id
+'''
+
+# Bir başlığın tüm notlarının özetteki katkısı
+_BASLIK_KATKISI = '''
+    SELECT n.ogrenci_id AS ogrenci_id, {r}.kategori_id AS kategori_id,
+           {isaret}TOTAL(n.puan) AS toplam, {isaret}COUNT(n.puan) AS adet
+    FROM not_ n
+    WHERE n.baslik_id = {r}.id
+      AND EXISTS (SELECT 1 FROM kategori WHERE id = {r}.kategori_id)
+    GROUP BY n.ogrenci_id
+'''
+
+# Yeniden eklenen bir kategorinin mevcut notlarının katkısı
+_KATEGORI_KATKISI = '''
+    SELECT n.ogrenci_id AS ogrenci_id, NEW.id AS kategori_id,
+           TOTAL(n.puan) AS toplam, COUNT(n.puan) AS adet
+    FROM not_ n JOIN not_basligi nb ON nb.id = n.baslik_id
+    WHERE nb.kategori_id = NEW.id
+    GROUP BY n.ogrenci_id
+'''
+
+_OZET_TETIKLEYICILERI = [
+    # Not eklendi / silindi / değişti
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_not_ozet_ekle AFTER INSERT ON not_
+    BEGIN
+        {_ozet_ekle_sql(_NOT_KATKISI.format(r='NEW', isaret=''))}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_not_ozet_sil AFTER DELETE ON not_
+    BEGIN
+        {_ozet_ekle_sql(_NOT_KATKISI.format(r='OLD', isaret='-'))}
+        DELETE FROM ogrenci_kategori_ozet WHERE ogrenci_id = OLD.ogrenci_id AND adet <= 0;
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_not_ozet_guncelle
+    AFTER UPDATE OF puan, ogrenci_id, baslik_id ON not_
+    BEGIN
+        {_ozet_ekle_sql(_NOT_KATKISI.format(r='OLD', isaret='-'))}
+        {_ozet_ekle_sql(_NOT_KATKISI.format(r='NEW', isaret=''))}
+        DELETE FROM ogrenci_kategori_ozet WHERE ogrenci_id = OLD.ogrenci_id AND adet <= 0;
+    END
+    ''',
+    # Başlık eklendi (ör. geri alma) / silindi / kategorisi değişti.
+    # Silme BEFORE: cascade ile silinen notlar başlığı artık bulamaz, iki kez düşülmez.
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_baslik_ozet_ekle AFTER INSERT ON not_basligi
+    BEGIN
+        {_ozet_ekle_sql(_BASLIK_KATKISI.format(r='NEW', isaret=''))}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_baslik_ozet_sil BEFORE DELETE ON not_basligi
+    BEGIN
+        {_ozet_ekle_sql(_BASLIK_KATKISI.format(r='OLD', isaret='-'))}
+        DELETE FROM ogrenci_kategori_ozet WHERE kategori_id = OLD.kategori_id AND adet <= 0;
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_baslik_ozet_guncelle
+    AFTER UPDATE OF kategori_id ON not_basligi
+    BEGIN
+        {_ozet_ekle_sql(_BASLIK_KATKISI.format(r='OLD', isaret='-'))}
+        {_ozet_ekle_sql(_BASLIK_KATKISI.format(r='NEW', isaret=''))}
+        DELETE FROM ogrenci_kategori_ozet WHERE kategori_id = OLD.kategori_id AND adet <= 0;
+    END
+    ''',
+    # Kategori eklendi (ör. geri alma) / silindi
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_kategori_ozet_ekle AFTER INSERT ON kategori
+    BEGIN
+        {_ozet_ekle_sql(_KATEGORI_KATKISI)}
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_kategori_ozet_sil AFTER DELETE ON kategori
+    BEGIN
+        DELETE FROM ogrenci_kategori_ozet WHERE kategori_id = OLD.id;
+    END
+    ''',
+    # Kategori özeti değişince öğrencinin genel ortalaması
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_genel_ozet_ekle AFTER INSERT ON ogrenci_kategori_ozet
+    BEGIN
+        {_genel_ozet_sql('NEW.ogrenci_id')}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_genel_ozet_guncelle AFTER UPDATE ON ogrenci_kategori_ozet
+    BEGIN
+        {_genel_ozet_sql('NEW.ogrenci_id')}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_genel_ozet_sil AFTER DELETE ON ogrenci_kategori_ozet
+    BEGIN
+        {_genel_ozet_sql('OLD.ogrenci_id')}
+    END
+    ''',
+]
+
+
+def create_ozet_tablolari(cursor):
+    """Ortalama özet tablolarını ve onları güncel tutan tetikleyicileri oluşturur."""
+    # Öğrenci x kategori: not toplamı, adedi ve ortalaması
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ogrenci_kategori_ozet (
+            ogrenci_id INTEGER NOT NULL,
+            kategori_id INTEGER NOT NULL,
+            toplam REAL NOT NULL DEFAULT 0,
+            adet INTEGER NOT NULL DEFAULT 0,
+            ortalama REAL,
+            PRIMARY KEY (ogrenci_id, kategori_id)
+        ) WITHOUT ROWID
+    ''')
+    
+    # Öğrenci genel ortalaması (kategori ortalamalarının ortalaması)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ogrenci_genel_ozet (
+            ogrenci_id INTEGER PRIMARY KEY,
+            genel_ortalama REAL
+        )
+    ''')
     
+    for tetikleyici in _OZET_TETIKLEYICILERI:
+        cursor.execute(tetikleyici)
+
+
+def rebuild_ozet_tablolari(cursor):
+    """Özet tablolarını not_ tablosundan baştan hesaplar (ör. yedek geri yükleme sonrası)."""
+    # Genel özet tetikleyicileri satır satır çalışır; toplu hesap daha hızlı
+    for tetikleyici in ('trg_genel_ozet_ekle', 'trg_genel_ozet_guncelle', 'trg_genel_ozet_sil'):
+        cursor.execute(f'DROP TRIGGER IF EXISTS {tetikleyici}')
+    
+    cursor.execute('DELETE FROM ogrenci_kategori_ozet')
+    cursor.execute('DELETE FROM ogrenci_genel_ozet')
+    cursor.execute('''
+        INSERT INTO ogrenci_kategori_ozet (ogrenci_id, kategori_id, toplam, adet, ortalama)
+        SELECT n.ogrenci_id, nb.kategori_id, TOTAL(n.puan), COUNT(n.puan), AVG(n.puan)
+        FROM not_ n
+        JOIN not_basligi nb ON n.baslik_id = nb.id
+        JOIN kategori k ON nb.kategori_id = k.id
+        GROUP BY n.ogrenci_id, nb.kategori_id
+        HAVING COUNT(n.puan) > 0
+    ''')
+    cursor.execute('''
+        INSERT INTO ogrenci_genel_ozet (ogrenci_id, genel_ortalama)
+        SELECT ogrenci_id, AVG(ortalama)
+        FROM ogrenci_kategori_ozet
+        WHERE ortalama <> 0
+        GROUP BY ogrenci_id
+    ''')
+    create_ozet_tablolari(cursor)
+
+
+def _migration_1_temel_sema(cursor):
+    """
+    Temel tabloları oluşturur ve varsayılan kategorileri ekler.
+    Sürümlemeden önce oluşturulmuş veritabanlarında da güvenle çalışır.
+    """
     # Sınıf tablosu
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS sinif (
@@ -106,6 +314,16 @@ def init_db():
         )
     ''')
     
+    # Ortalama özet tabloları (tetikleyicilerle güncel tutulur)
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ogrenci_kategori_ozet'"
+    )
+    ozet_yeni = cursor.fetchone() is None
+    create_ozet_tablolari(cursor)
+    if ozet_yeni:
+        # Mevcut notlardan ilk doldurma
+        rebuild_ozet_tablolari(cursor)
+    
     # Varsayılan kategorileri SADECE kategori tablosu boş ise ekle
     # Bu sayede kullanıcı sildiğinde/düzenlediğinde tekrar oluşturulmaz
     cursor.execute('SELECT COUNT(*) as count FROM kategori')
@@ -125,16 +343,479 @@ def init_db():
                 ''', kategori)
             except sqlite3.IntegrityError:
                 pass
+
+
+
+def _migration_2_indeksler(cursor):
+    """Sık kullanılan sorgular için ikincil indeksleri ekler."""
+    # Başlığa göre notlar (not girişi, başlık silme, özet tetikleyicileri)
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_not_baslik ON not_ (baslik_id)')
+    
+    # Kategori/sınıf filtreli başlık listeleri (tarihe göre sıralı)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_not_basligi_kategori_sinif
+        ON not_basligi (kategori_id, sinif_id, tarih)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_not_basligi_sinif
+        ON not_basligi (sinif_id, tarih)
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_not_basligi_tarih ON not_basligi (tarih)')
+    
+    # Sınıf listesi (soyad, ad sıralı)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ogrenci_sinif_ad
+        ON ogrenci (sinif_id, soyad, ad)
+    ''')
+
+
+def _migration_3_islem_gunlugu(cursor):
+    """
+    islem_gecmisi tablosunu kalıcı geri al/yinele günlüğüne dönüştürür.
+    geri_alindi = 1 olan kayıtlar yinelenebilir işlemlerdir,
+    adimlar toplu işlemlerin alt adımlarını JSON olarak tutar.
+    """
+    cursor.execute(
+        'ALTER TABLE islem_gecmisi ADD COLUMN geri_alindi INTEGER NOT NULL DEFAULT 0'
+    )
+    cursor.execute('ALTER TABLE islem_gecmisi ADD COLUMN adimlar TEXT')
+
+
+def _migration_4_silme_goruntusu(cursor):
+    """Silmelerde alt kayıtların görüntüsü için islem_gecmisi'ne kolon ekler."""
+    cursor.execute('ALTER TABLE islem_gecmisi ADD COLUMN bagimlilar TEXT')
+
+
+def _migration_5_sahipsiz_kayitlar(cursor):
+    """foreign_keys kapalıyken silinen kayıtlardan kalan sahipsiz satırları temizler."""
+    sahipsiz_kayitlari_temizle(cursor)
+
+
+def sahipsiz_kayitlari_temizle(cursor):
+    """
+    Üst kaydı olmayan satırları temizler; şemadaki ON DELETE kurallarının
+    yapması gerekenleri uygular (eski veritabanları ve yedekler için).
+    Özet tabloları da yeniden hesaplanır.
+    """
+    cursor.execute('''
+        UPDATE ogrenci SET sinif_id = NULL
+        WHERE sinif_id IS NOT NULL AND sinif_id NOT IN (SELECT id FROM sinif)
+    ''')
+    cursor.execute('''
+        DELETE FROM not_basligi
+        WHERE kategori_id NOT IN (SELECT id FROM kategori)
+           OR (sinif_id IS NOT NULL AND sinif_id NOT IN (SELECT id FROM sinif))
+    ''')
+    cursor.execute('''
+        DELETE FROM not_
+        WHERE ogrenci_id NOT IN (SELECT id FROM ogrenci)
+           OR baslik_id NOT IN (SELECT id FROM not_basligi)
+    ''')
+    
+    # Sahipsiz notların özetlerdeki katkılarını da temizle
+    rebuild_ozet_tablolari(cursor)
+
+
+def _tr_katla_sql(kolon):
+    """
+    Arama için büyük/küçük I harflerini katlayan SQL ifadesi (İ, I, ı -> i).
+    Diğer Türkçe harfler (Ç, Ş, Ğ, Ö, Ü) FTS5 unicode61 tokenizer'ında katlanır.
+    """
+    return f"replace(replace(replace({kolon}, 'İ', 'i'), 'I', 'i'), 'ı', 'i')"
+
+
+def _arama_satiri_sql(r):
+    """Tetikleyicide FTS tablosuna eklenecek (rowid, ad, soyad, okul_no) değerleri."""
+    return (f"({r}.id, {_tr_katla_sql(f'{r}.ad')}, {_tr_katla_sql(f'{r}.soyad')}, "
+            f"{_tr_katla_sql(f'{r}.okul_no')})")
+
+
+_ARAMA_TETIKLEYICILERI = [
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_ogrenci_fts_ekle AFTER INSERT ON ogrenci
+    BEGIN
+        INSERT INTO ogrenci_fts (rowid, ad, soyad, okul_no) VALUES {_arama_satiri_sql('NEW')};
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_ogrenci_fts_sil AFTER DELETE ON ogrenci
+    BEGIN
+        DELETE FROM ogrenci_fts WHERE rowid = OLD.id;
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_ogrenci_fts_guncelle
+    AFTER UPDATE OF id, ad, soyad, okul_no ON ogrenci
+    BEGIN
+        DELETE FROM ogrenci_fts WHERE rowid = OLD.id;
+        INSERT INTO ogrenci_fts (rowid, ad, soyad, okul_no) VALUES {_arama_satiri_sql('NEW')};
+    END
+    ''',
+]
+
+
+def _migration_6_ogrenci_arama(cursor):
+    """
+    Öğrenci araması için FTS5 tablosu (rowid = ogrenci.id) ve senkron tetikleyiciler.
+    FTS5 derlenmemiş SQLite'larda atlanır; arama Python filtresine düşer.
+    """
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS ogrenci_fts USING fts5(
+                ad, soyad, okul_no,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '1 2 3'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        instrumentation.warn('fts', f"FTS5 kullanılamıyor, öğrenci araması indekssiz çalışacak: {e}")
+        return
+    
+    for tetikleyici in _ARAMA_TETIKLEYICILERI:
+        cursor.execute(tetikleyici)
+    rebuild_ogrenci_arama(cursor)
+
+
+def rebuild_ogrenci_arama(cursor):
+    """Arama indeksini ogrenci tablosundan baştan oluşturur."""
+    cursor.execute('DELETE FROM ogrenci_fts')
+    cursor.execute(f'''
+        INSERT INTO ogrenci_fts (rowid, ad, soyad, okul_no)
+        SELECT o.id, {_tr_katla_sql('o.ad')}, {_tr_katla_sql('o.soyad')},
+               {_tr_katla_sql('o.okul_no')}
+        FROM ogrenci o
+    ''')
+
+
+# Türk alfabesi sırası; büyük/küçük harf aynı karaktere çevrilir
+_TR_ALFABE = 'aâbcçdefgğhıiîjklmnoöpqrsştuûüvwxyz'
+_TR_BUYUK = {'ı': 'I', 'i': 'İ', 'â': 'Â', 'î': 'Î', 'û': 'Û'}
+_TR_HARF_ANAHTARI = {}
+for _sira, _harf in enumerate(_TR_ALFABE):
+    _TR_HARF_ANAHTARI[_harf] = _TR_HARF_ANAHTARI[_TR_BUYUK.get(_harf, _harf.upper())] = chr(0x1000 + _sira)
+_TR_ANAHTAR_TABLOSU = str.maketrans(_TR_HARF_ANAHTARI)
+
+
+def turkish_sort_key(text):
+    """
+    Türkçe alfabetik sıralama anahtarı (ç c'den, ı i'den önce; büyük/küçük duyarsız).
+    Anahtar düz metindir ve ikili (BINARY) karşılaştırmada alfabe sırasını verir;
+    bu yüzden veritabanında saklanıp varsayılan collation ile indekslenebilir.
+    Harf dışı karakterler (rakam, boşluk, noktalama) harflerden önce gelir.
+    """
+    return (text or '').translate(_TR_ANAHTAR_TABLOSU)
+
+
+def _tr_karsilastir(a, b):
+    """'tr' collation'ı: Türk alfabesine göre karşılaştırma."""
+    anahtar_a, anahtar_b = turkish_sort_key(a), turkish_sort_key(b)
+    return (anahtar_a > anahtar_b) - (anahtar_a < anahtar_b)
+
+
+def _migration_7_turkce_siralama(cursor):
+    """
+    Öğrenci listeleri için 'tr' collation'lı indeksler.
+    ORDER BY soyad COLLATE tr, ad COLLATE tr Python'da sıralamadan indeksten okunur.
+    Not: bu indeksler yüzünden ogrenci tablosuna yalnızca 'tr' collation'ını
+    kaydeden bağlantılar yazabilir; sqlite3 kabuğu gibi dış araçlarda
+    ogrenci'ye yazma "no such collation sequence: tr" hatası verir.
+    """
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ogrenci_sinif_ad_tr
+        ON ogrenci (sinif_id, soyad COLLATE tr, ad COLLATE tr)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ogrenci_ad_tr
+        ON ogrenci (soyad COLLATE tr, ad COLLATE tr)
+    ''')
+    # Yeni indeks (sinif_id, ...) aramalarını da karşılar
+    cursor.execute('DROP INDEX IF EXISTS idx_ogrenci_sinif_ad')
+
+
+def sira_anahtarlarini_guncelle(cursor, ogrenci_ids=None):
+    """
+    ad/soyad ile uyuşmayan öğrenci sıralama anahtarlarını (ad_anahtari,
+    soyad_anahtari) yeniden hesaplar. ogrenci_ids verilmezse tüm tablo
+    denetlenir (ör. dış araçlarla eklenen kayıtlar). Güncellenen sayıyı döndürür.
+    """
+    sorgu = 'SELECT id, ad, soyad, ad_anahtari, soyad_anahtari FROM ogrenci'
+    params = []
+    if ogrenci_ids is not None:
+        if not ogrenci_ids:
+            return 0
+        sorgu += f" WHERE id IN ({', '.join('?' * len(ogrenci_ids))})"
+        params = list(ogrenci_ids)
+    cursor.execute(sorgu, params)
+    
+    guncellenecekler = []
+    for ogrenci_id, ad, soyad, ad_anahtari, soyad_anahtari in cursor.fetchall():
+        yeni = (turkish_sort_key(ad), turkish_sort_key(soyad))
+        if (ad_anahtari, soyad_anahtari) != yeni:
+            guncellenecekler.append(yeni + (ogrenci_id,))
+    if guncellenecekler:
+        cursor.executemany(
+            'UPDATE ogrenci SET ad_anahtari = ?, soyad_anahtari = ? WHERE id = ?',
+            guncellenecekler
+        )
+    return len(guncellenecekler)
+
+
+def _migration_8_siralama_anahtarlari(cursor):
+    """
+    'tr' collation'lı indekslerin yerine saklanan sıralama anahtarları.
+    Collation'lı indeksler ogrenci tablosunu 'tr' collation'ını kaydetmeyen
+    bağlantılar (windows/ uygulaması, sqlite3 kabuğu) için yazılamaz yapıyordu.
+    Anahtarlar turkish_sort_key ile Python'da hesaplanır ve varsayılan
+    (BINARY) collation ile indekslenir.
+    """
+    cursor.execute('DROP INDEX IF EXISTS idx_ogrenci_sinif_ad_tr')
+    cursor.execute('DROP INDEX IF EXISTS idx_ogrenci_ad_tr')
+    cursor.execute("ALTER TABLE ogrenci ADD COLUMN ad_anahtari TEXT NOT NULL DEFAULT ''")
+    cursor.execute("ALTER TABLE ogrenci ADD COLUMN soyad_anahtari TEXT NOT NULL DEFAULT ''")
+    sira_anahtarlarini_guncelle(cursor)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ogrenci_sinif_anahtar
+        ON ogrenci (sinif_id, soyad_anahtari, ad_anahtari)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ogrenci_anahtar
+        ON ogrenci (soyad_anahtari, ad_anahtari)
+    ''')
+
+
+def _migration_9_bos_ozet_satirlari(cursor):
+    """
+    Özet tetikleyicileri puansız notlar için adet 0, ortalaması NULL satırlar
+    bırakıyordu. Tetikleyiciler yeni tanımlarıyla kurulur, özetler yeniden
+    hesaplanır.
+    """
+    tetikleyiciler = cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_%ozet%'"
+    ).fetchall()
+    for (tetikleyici,) in tetikleyiciler:
+        cursor.execute(f'DROP TRIGGER IF EXISTS {tetikleyici}')
+    rebuild_ozet_tablolari(cursor)
+
+
+# Sıralı şema değişiklikleri. Listedeki sıra = PRAGMA user_version.
+# Yeni değişiklikler yalnızca sona eklenir, mevcutlar değiştirilmez.
+MIGRATIONS = [
+    _migration_1_temel_sema,
+    _migration_2_indeksler,
+    _migration_3_islem_gunlugu,
+    _migration_4_silme_goruntusu,
+    _migration_5_sahipsiz_kayitlar,
+    _migration_6_ogrenci_arama,
+    _migration_7_turkce_siralama,
+    _migration_8_siralama_anahtarlari,
+    _migration_9_bos_ozet_satirlari,
+]
+
+
+# DatabaseManager'ın sık kullanılan sorgu kalıpları ve kullanmaları beklenen indeksler
+_SICAK_SORGULAR = [
+    ('not_ (baslik_id)', 'idx_not_baslik',
+     'SELECT * FROM not_ WHERE baslik_id = ?', (1,)),
+    ('not_basligi (kategori_id, sinif_id)', 'idx_not_basligi_kategori_sinif',
+     'SELECT * FROM not_basligi nb WHERE nb.kategori_id = ? AND nb.sinif_id = ? '
+     'ORDER BY nb.tarih DESC', (1, 1)),
+    ('not_basligi (sinif_id)', 'idx_not_basligi_sinif',
+     'SELECT * FROM not_basligi nb WHERE nb.sinif_id = ? ORDER BY nb.tarih DESC', (1,)),
+    ('not_basligi (tarih)', 'idx_not_basligi_tarih',
+     'SELECT * FROM not_basligi nb ORDER BY nb.tarih DESC', ()),
+    ('ogrenci (sinif_id, soyad, ad)', 'idx_ogrenci_sinif_anahtar',
+     'SELECT o.* FROM ogrenci o WHERE o.sinif_id = ? '
+     'ORDER BY o.soyad_anahtari, o.ad_anahtari', (1,)),
+    ('ogrenci (soyad, ad)', 'idx_ogrenci_anahtar',
+     'SELECT o.* FROM ogrenci o ORDER BY o.soyad_anahtari, o.ad_anahtari', ()),
+]
+
+
+def check_query_plans(cursor):
+    """
+    Sık kullanılan sorguların beklenen indeksleri kullandığını
+    EXPLAIN QUERY PLAN ile doğrular. Uyarı listesi döndürür (boşsa sorun yok).
+    """
+    uyarilar = []
+    for ad, indeks, sorgu, params in _SICAK_SORGULAR:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sorgu}', params)
+        plan = ' | '.join(row[3] for row in cursor.fetchall())
+        if indeks not in plan:
+            uyarilar.append(f"{ad}: {indeks} kullanılmıyor ({plan})")
+    return uyarilar
+
+
+def init_db():
+    """
+    Veritabanını başlatır ve bekleyen şema değişikliklerini uygular.
+    Şema güncelse yalnızca PRAGMA user_version okunur ve öğrenci sıralama
+    anahtarları denetlenir.
+    """
+    db_path = get_db_path()
+    conn = get_connection()
+    
+    surum = conn.execute('PRAGMA user_version').fetchone()[0]
+    if surum < len(MIGRATIONS):
+        _semayi_yukselt(conn, surum)
     
-    conn.commit()
-    conn.close()
+    # Anahtarları bilmeyen uygulamalar (windows/, sqlite3 kabuğu) öğrenci
+    # eklemiş veya adını değiştirmiş olabilir
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        sira_anahtarlarini_guncelle(conn.cursor())
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
     
     return db_path
 
 
+def _semayi_yukselt(conn, surum):
+    """Şemayı surum'dan son sürüme yükseltir; her değişiklik kendi işleminde."""
+    if surum == 0 and not conn.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()[0]:
+        # Yeni veritabanı: artımlı vacuum tablolar oluşmadan açılmalı. WAL
+        # başlığı yazıldığından ayar ancak VACUUM ile geçerli olur (boş dosyada
+        # anlık); eski veritabanları bakımda dönüştürülür.
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+    
+    for yeni_surum in range(surum + 1, len(MIGRATIONS) + 1):
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Başka bir süreç aynı anda yükseltmiş olabilir
+            if conn.execute('PRAGMA user_version').fetchone()[0] >= yeni_surum:
+                conn.rollback()
+                continue
+            
+            MIGRATIONS[yeni_surum - 1](conn.cursor())
+            conn.execute(f'PRAGMA user_version = {yeni_surum}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    
+    # Şema değiştiyse indekslerin hâlâ kullanıldığını doğrula
+    for uyari in check_query_plans(conn.cursor()):
+        instrumentation.warn('sorgu_plani', uyari)
+
+
+class _KaliciBaglanti(sqlite3.Connection):
+    """
+    Havuzda tutulan bağlantı.
+    close() bağlantıyı kapatmaz; yarım kalan işlemi geri alıp havuza bırakır.
+    islem_tutuluyor True iken (ör. açık undo grubu) işlem geri alınmaz.
+    """
+    
+    islem_tutuluyor = False
+    
+    # Ölçüm açıkken tüm ifadeler ölçümlü cursor'dan geçer
+    def cursor(self, factory=None):
+        if factory is None and instrumentation.aktif:
+            factory = _OlcumluCursor
+        return super().cursor() if factory is None else super().cursor(factory)
+    
+    def execute(self, sql, params=()):
+        if instrumentation.aktif:
+            return self.cursor().execute(sql, params)
+        return super().execute(sql, params)
+    
+    def executemany(self, sql, params_listesi):
+        if instrumentation.aktif:
+            return self.cursor().executemany(sql, params_listesi)
+        return super().executemany(sql, params_listesi)
+    
+    def executescript(self, betik):
+        if instrumentation.aktif:
+            return self.cursor().executescript(betik)
+        return super().executescript(betik)
+    
+    def close(self):
+        if self.in_transaction and not self.islem_tutuluyor:
+            self.rollback()
+    
+    def _gercekten_kapat(self):
+        super().close()
+
+
+class ConnectionManager:
+    """
+    Thread başına tek, uzun ömürlü SQLite bağlantısı yönetir.
+    Ayarlar (PRAGMA) bağlantı açılırken bir kez uygulanır.
+    """
+    
+    def __init__(self, db_path=None, salt_okunur=False):
+        self._db_path = db_path
+        self.salt_okunur = salt_okunur
+        self._yerel = threading.local()
+        self._kilit = threading.Lock()
+        self._baglantilar = []
+        self._nesil = 0
+    
+    @property
+    def db_path(self):
+        if self._db_path is None:
+            self._db_path = get_db_path()
+        return self._db_path
+    
+    def get(self):
+        """Çağıran thread'in bağlantısını döndürür, yoksa açar."""
+        kayit = getattr(self._yerel, 'kayit', None)
+        if kayit is not None and kayit[0] == self._nesil:
+            return kayit[1]
+        
+        conn = self._ac()
+        with self._kilit:
+            self._baglantilar.append(conn)
+            self._yerel.kayit = (self._nesil, conn)
+        return conn
+    
+    def _ac(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            factory=_KaliciBaglanti,
+            check_same_thread=False,  # close_all() başka thread'den kapatabilsin
+        )
+        conn.row_factory = sqlite3.Row  # Dict-like erişim için
+        # Türkçe sıralama (sınıf adları; 7. şema değişikliği de kullanır)
+        conn.create_collation('tr', _tr_karsilastir)
+        for ad, deger in _PRAGMALAR:
+            conn.execute(f'PRAGMA {ad} = {deger}')
+        if self.salt_okunur:
+            # Okuma bağlantıları yazamaz; tüm yazmalar yazıcı thread'inden geçer
+            conn.execute('PRAGMA query_only = ON')
+        return conn
+    
+    def close_all(self):
+        """Tüm bağlantıları kapatır. Sonraki get() yeni bağlantı açar."""
+        with self._kilit:
+            baglantilar, self._baglantilar = self._baglantilar, []
+            self._nesil += 1
+        
+        for conn in baglantilar:
+            try:
+                conn.close()
+                conn.execute('PRAGMA optimize')
+            except sqlite3.Error:
+                pass
+            conn._gercekten_kapat()
+
+
+_manager = ConnectionManager()
+_okuma_manager = ConnectionManager(salt_okunur=True)
+
+
 def get_connection():
-    """Veritabanı bağlantısı döndürür."""
-    db_path = get_db_path()
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row  # Dict-like erişim için
-    return conn
+    """Çağıran thread'in kalıcı veritabanı bağlantısını döndürür."""
+    return _manager.get()
+
+
+def get_read_connection():
+    """Çağıran thread'in salt okunur (query_only) kalıcı bağlantısını döndürür."""
+    return _okuma_manager.get()
+
+
+def close_connections():
+    """Açık tüm bağlantıları kapatır (uygulama kapanırken çağrılır)."""
+    _okuma_manager.close_all()
+    _manager.close_all()
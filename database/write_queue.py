@@ -0,0 +1,293 @@
+"""
+Tek yazıcı thread'i ile yazma kuyruğu.
+Tüm yazma komutları tek bir thread'de, tek bir bağlantı üzerinden çalışır.
+Kuyrukta biriken komutlar tek transaction'da birleştirilir; her komut kendi
+SAVEPOINT'i içinde çalıştığı için hatalı bir komut diğerlerini etkilemez.
+Transaction içinde çalışamayan işler (ör. VACUUM) sırası gelince tek başına,
+transaction açılmadan çalışır.
+"""
+import contextvars
+import queue
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from utils.tracing import tracer
+from .models import get_connection
+
+
+class _Komut:
+    """Kuyruktaki tek bir yazma çağrısı."""
+    
+    __slots__ = ('fn', 'args', 'kwargs', 'future', 'baglam')
+    
+    def __init__(self, fn, args, kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        # Çağıranın bağlamı (ör. sorgu ölçümü etiketleri) yazıcıda da geçerli olsun
+        self.baglam = contextvars.copy_context()
+
+
+class _IslemsizKomut(_Komut):
+    """Transaction açılmadan, tek başına çalışan komut (ör. VACUUM, checkpoint)."""
+    
+    __slots__ = ()
+
+
+class _Oturum:
+    """Bir thread'e ayrılmış, tek transaction'lık özel yazma oturumu."""
+    
+    def __init__(self, baslat, bitir, iptal):
+        self.baslat = baslat
+        self.bitir = bitir
+        self.iptal = iptal
+        self.kuyruk = queue.Queue()
+        self.future = Future()
+
+
+class _OturumSonu:
+    """Özel oturumun bittiğini bildirir."""
+    
+    def __init__(self, basarili):
+        self.basarili = basarili
+
+
+class WriteQueue:
+    """
+    Yazıcı aktör. Çağıranlar komut gönderir ve sonucunu bekler;
+    yazıcı thread'i kuyruğu boşaltıp komutları toplu commit eder.
+    """
+    
+    def __init__(self, max_toplu=64, commit_sonrasi=None, commit_hatasi=None):
+        self.max_toplu = max_toplu
+        self._commit_sonrasi = commit_sonrasi
+        self._commit_hatasi = commit_hatasi
+        self._kuyruk = queue.Queue()
+        self._yerel = threading.local()  # Çağıran thread'in açık oturumu
+        self._thread = None
+        self._kilit = threading.Lock()
+    
+    # ==================== ÇAĞIRAN TARAF ====================
+    
+    def yazici_thread_mi(self):
+        """Çağıran thread yazıcı thread'i mi?"""
+        return threading.current_thread() is self._thread
+    
+    def oturum_acik(self):
+        """Çağıran thread'in açık bir özel oturumu var mı?"""
+        return getattr(self._yerel, 'oturum', None) is not None
+    
+    def gonder(self, fn, *args, **kwargs):
+        """Komutu kuyruğa koyar ve Future döndürür (beklemez)."""
+        komut = _Komut(fn, args, kwargs)
+        oturum = getattr(self._yerel, 'oturum', None)
+        if oturum is not None:
+            oturum.kuyruk.put(komut)
+        else:
+            self._baslat()
+            self._kuyruk.put(komut)
+        return komut.future
+    
+    def calistir(self, fn, *args, **kwargs):
+        """Komutu yazıcıda çalıştırır ve sonucunu döndürür (hata varsa fırlatır)."""
+        if self.yazici_thread_mi():
+            # Yazıcının içinden gelen iç içe çağrı
+            return fn(*args, **kwargs)
+        return self.gonder(fn, *args, **kwargs).result()
+    
+    def calistir_islemsiz(self, fn, *args, **kwargs):
+        """
+        fn'i yazıcıda transaction açmadan çalıştırır ve sonucunu döndürür.
+        Önceki komutlar commit edilmiş olur; fn çalışırken yazıcı başka komut
+        almaz. fn kendi yaptığını commit etmelidir.
+        """
+        if self.yazici_thread_mi() or self.oturum_acik():
+            raise RuntimeError("Açık bir transaction içinden transaction dışı komut çalıştırılamaz.")
+        komut = _IslemsizKomut(fn, args, kwargs)
+        self._baslat()
+        self._kuyruk.put(komut)
+        return komut.future.result()
+    
+    @contextmanager
+    def oturum(self, baslat=None, bitir=None, iptal=None):
+        """
+        Bloktaki tüm yazmaları yazıcıda tek transaction'da çalıştırır.
+        Oturum sürerken yazıcı başka komut almaz. baslat/bitir/iptal
+        yazıcı thread'inde oturumun başında, commit'ten önce ve geri almada çağrılır.
+        """
+        oturum = _Oturum(baslat, bitir, iptal)
+        self._baslat()
+        self._kuyruk.put(oturum)
+        self._yerel.oturum = oturum
+        basarili = False
+        try:
+            yield
+            basarili = True
+        finally:
+            self._yerel.oturum = None
+            oturum.kuyruk.put(_OturumSonu(basarili))
+            sonuc = oturum.future.exception()
+            if basarili and sonuc is not None:
+                raise sonuc
+    
+    # ==================== YAZICI TARAF ====================
+    
+    def _baslat(self):
+        with self._kilit:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._calis, name='db-yazici', daemon=True
+                )
+                self._thread.start()
+    
+    def _calis(self):
+        bekleyen = None
+        while True:
+            is_ = bekleyen if bekleyen is not None else self._kuyruk.get()
+            bekleyen = None
+            
+            if isinstance(is_, _Oturum):
+                self._oturum_calistir(is_)
+                continue
+            if isinstance(is_, _IslemsizKomut):
+                self._islemsiz_calistir(is_)
+                continue
+            
+            # Kuyrukta birikenleri aynı transaction'a al
+            toplu = [is_]
+            while len(toplu) < self.max_toplu:
+                try:
+                    sonraki = self._kuyruk.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(sonraki, (_Oturum, _IslemsizKomut)):
+                    bekleyen = sonraki
+                    break
+                toplu.append(sonraki)
+            
+            self._toplu_calistir(toplu)
+    
+    def _transaction_baslat(self):
+        conn = get_connection()
+        conn.execute('BEGIN IMMEDIATE')
+        # Komutların içindeki okumalar conn.close() ile transaction'ı geri almasın
+        conn.islem_tutuluyor = True
+        return conn
+    
+    def _komut_calistir(self, conn, komut):
+        """Komutu kendi SAVEPOINT'inde çalıştırır; (sonuç, hata) döndürür."""
+        conn.execute('SAVEPOINT komut')
+        try:
+            sonuc = komut.baglam.run(komut.fn, *komut.args, **komut.kwargs)
+        except BaseException as e:
+            conn.execute('ROLLBACK TO komut')
+            conn.execute('RELEASE komut')
+            return None, e
+        conn.execute('RELEASE komut')
+        return sonuc, None
+    
+    def _commit(self, conn):
+        """Transaction'ı bitirir. Başarısızsa geri alır ve hatayı döndürür."""
+        try:
+            conn.commit()
+            hata = None
+        except Exception as e:
+            conn.rollback()
+            hata = e
+        finally:
+            conn.islem_tutuluyor = False
+        
+        if hata is None:
+            if self._commit_sonrasi:
+                self._commit_sonrasi()
+        elif self._commit_hatasi:
+            self._commit_hatasi()
+        return hata
+    
+    def _toplu_calistir(self, toplu):
+        try:
+            conn = self._transaction_baslat()
+        except Exception as e:
+            for komut in toplu:
+                komut.future.set_exception(e)
+            return
+        
+        with tracer.span('WriteQueue.toplu', 'db', komut=len(toplu)):
+            sonuclar = [self._komut_calistir(conn, komut) for komut in toplu]
+            with tracer.span('WriteQueue.commit', 'db'):
+                hata = self._commit(conn)
+        
+        for komut, (sonuc, komut_hatasi) in zip(toplu, sonuclar):
+            if hata is not None:
+                komut.future.set_exception(hata)
+            elif komut_hatasi is not None:
+                komut.future.set_exception(komut_hatasi)
+            else:
+                komut.future.set_result(sonuc)
+    
+    def _islemsiz_calistir(self, komut):
+        conn = get_connection()
+        try:
+            komut.future.set_result(komut.baglam.run(komut.fn, *komut.args, **komut.kwargs))
+        except BaseException as e:
+            komut.future.set_exception(e)
+        finally:
+            # Yarım kalan transaction sonraki toplu işe taşınmasın
+            if conn.in_transaction:
+                conn.rollback()
+    
+    def _oturum_calistir(self, oturum):
+        try:
+            conn = self._transaction_baslat()
+        except Exception as e:
+            # Çağıranın komutlarını reddet, oturum sonunu bekle
+            self._oturumu_reddet(oturum, e)
+            return
+        try:
+            if oturum.baslat:
+                oturum.baslat()
+        except Exception as e:
+            conn.rollback()
+            conn.islem_tutuluyor = False
+            self._oturumu_reddet(oturum, e)
+            return
+        
+        while True:
+            is_ = oturum.kuyruk.get()
+            if isinstance(is_, _OturumSonu):
+                break
+            sonuc, hata = self._komut_calistir(conn, is_)
+            if hata is not None:
+                is_.future.set_exception(hata)
+            else:
+                is_.future.set_result(sonuc)
+        
+        hata = None
+        if is_.basarili:
+            try:
+                if oturum.bitir:
+                    oturum.bitir()
+            except Exception as e:
+                hata = e
+        
+        if is_.basarili and hata is None:
+            hata = self._commit(conn)
+        else:
+            conn.rollback()
+            conn.islem_tutuluyor = False
+            if oturum.iptal:
+                oturum.iptal()
+        
+        if hata is not None:
+            oturum.future.set_exception(hata)
+        else:
+            oturum.future.set_result(None)
+    
+    def _oturumu_reddet(self, oturum, hata):
+        while True:
+            is_ = oturum.kuyruk.get()
+            if isinstance(is_, _OturumSonu):
+                break
+            is_.future.set_exception(hata)
+        oturum.future.set_exception(hata)
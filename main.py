@@ -2,13 +2,22 @@
 Öğrenci Takip Pro - Ana Uygulama
 Öğretmenler için kapsamlı öğrenci takip ve not yönetim sistemi.
 """
+import multiprocessing
 import flet as ft
-from database import init_db, DatabaseManager
+from database import (
+    init_db, close_connections, DatabaseManager, AsyncDatabaseManager, MaintenanceManager,
+    instrumentation,
+)
 from views.student_view import StudentView
 from views.grades_view import GradesView
 from views.reports_view import ReportsView
 from views.settings_view import SettingsView
 from views.random_view import RandomView
+from utils.tracing import tracer
+
+
+# Uygulama kapanırken durdurulacak arka plan işleri (bkz. __main__)
+_kapanista = []
 
 
 def main(page):
@@ -36,20 +45,34 @@ def main(page):
     # Veritabanını başlat
     init_db()
     
-    # Veritabanı yöneticisi
-    db = DatabaseManager()
+    # Veritabanı yöneticisi (sorgu ölçümü Ayarlar > Tanılama'dan açılır)
+    db = instrumentation.instrument(DatabaseManager())
+    tracer.trace_methods(db, 'db')
+    
+    if tracer.aktif:
+        # Flet güncelleme yükü zaman çizelgesinde ayrı span olarak görünsün
+        page.update = tracer.traced('page.update', 'flet')(page.update)
+    
+    # Ağır okuma/yazmalar için UI thread'i dışı erişim
+    async_db = AsyncDatabaseManager(db)
+    
+    # Arka plan veritabanı bakımı
+    maintenance = MaintenanceManager(db)
+    maintenance.start()
+    _kapanista.extend([maintenance.stop, async_db.shutdown])
     
     # State
     state = {"dark_mode": False, "current_nav": 0}
     
     # Görünümler - her biri visible=False ile başlar
-    student_view = StudentView(db, on_update=lambda: refresh_views())
+    student_view = StudentView(db, on_update=lambda: refresh_views(), async_db=async_db)
     grades_view = GradesView(db, on_update=lambda: refresh_views())
-    reports_view = ReportsView(db)
+    reports_view = ReportsView(db, async_db=async_db)
     settings_view = SettingsView(
         db, 
         on_theme_change=lambda dm: toggle_theme(dm),
-        on_data_change=lambda: refresh_views()
+        on_data_change=lambda: refresh_views(),
+        maintenance=maintenance,
     )
     
     # Rastgele Seç görünümü
@@ -64,12 +87,15 @@ def main(page):
         ft.Container(content=settings_view, visible=False, expand=True, padding=20),
     ]
     
+    @tracer.traced('refresh_views', 'ui')
     def refresh_views():
-        undo_btn.disabled = not db.can_undo()
-        for i, container in enumerate(view_containers):
-            if container.visible and hasattr(container.content, 'refresh'):
-                container.content.refresh()
-        page.update()
+        with instrumentation.action('refresh_views'):
+            undo_btn.disabled = not db.can_undo()
+            redo_btn.disabled = not db.can_redo()
+            for i, container in enumerate(view_containers):
+                if container.visible and hasattr(container.content, 'refresh'):
+                    container.content.refresh()
+            page.update()
     
     def toggle_theme(dm=None):
         if dm is not None:
@@ -80,6 +106,7 @@ def main(page):
         theme_btn.icon = ft.icons.LIGHT_MODE if state["dark_mode"] else ft.icons.DARK_MODE
         page.update()
     
+    @tracer.traced('on_nav_click', 'ui')
     def on_nav_click(e, index):
         """Navigasyon butonuna tıklandığında."""
         state["current_nav"] = index
@@ -113,6 +140,17 @@ def main(page):
             page.snack_bar.open = True
             refresh_views()
     
+    def on_redo(e):
+        if db.can_redo():
+            desc = db.get_redo_description()
+            db.redo()
+            page.snack_bar = ft.SnackBar(
+                content=ft.Text(f"↪ {desc}"),
+                bgcolor=ft.colors.BLUE_400
+            )
+            page.snack_bar.open = True
+            refresh_views()
+    
     # Navigasyon icon butonları (ayrı liste)
     nav_icon_buttons = []
     nav_icons = [ft.icons.PEOPLE, ft.icons.SHUFFLE, ft.icons.ASSIGNMENT, ft.icons.ANALYTICS, ft.icons.SETTINGS]
@@ -146,6 +184,14 @@ def main(page):
         disabled=not db.can_undo(),
     )
     
+    # Redo butonu
+    redo_btn = ft.IconButton(
+        icon=ft.icons.REDO,
+        tooltip="Yinele (Ctrl+Y)",
+        on_click=on_redo,
+        disabled=not db.can_redo(),
+    )
+    
     # Sol navigasyon paneli
     nav_column = ft.Column([
         ft.Container(
@@ -159,6 +205,7 @@ def main(page):
         *nav_buttons,
         ft.Container(expand=True),
         undo_btn,
+        redo_btn,
         theme_btn,
     ], spacing=5, horizontal_alignment=ft.CrossAxisAlignment.CENTER)
     
@@ -188,9 +235,20 @@ def main(page):
     def on_keyboard(e):
         if e.ctrl and e.key == "Z":
             on_undo(None)
+        elif e.ctrl and e.key == "Y":
+            on_redo(None)
     
     page.on_keyboard_event = on_keyboard
 
 
 if __name__ == "__main__":
-    ft.app(target=main, assets_dir="assets")
+    # Paketlenmiş uygulamada karne işçi süreçleri için gerekli
+    multiprocessing.freeze_support()
+    try:
+        ft.app(target=main, assets_dir="assets")
+    finally:
+        # Bakım ve okuma havuzu durmadan bağlantılar kapatılmaz
+        for durdur in _kapanista:
+            durdur()
+        # Kalıcı veritabanı bağlantılarını düzgünce kapat
+        close_connections()
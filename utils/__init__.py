@@ -1,5 +1,6 @@
 from .export import ExportManager
 from .backup import BackupManager
+from .export_jobs import ExportJobManager
 from .helpers import format_date, calculate_average, get_grade_color
 
-__all__ = ['ExportManager', 'BackupManager', 'format_date', 'calculate_average', 'get_grade_color']
+__all__ = ['ExportManager', 'BackupManager', 'ExportJobManager', 'format_date', 'calculate_average', 'get_grade_color']
@@ -1,22 +1,28 @@
 """
 Yedekleme ve geri yükleme işlemleri.
+Yedekler okuma havuzundan alınır; geri yükleme yazıcı thread'inde tek
+transaction olarak çalışır.
 """
 import os
 import json
 import csv
 from datetime import datetime
-from database.models import get_connection, get_db_path
+from database.models import (
+    get_connection, get_read_connection, get_db_path, sahipsiz_kayitlari_temizle,
+    sira_anahtarlarini_guncelle,
+)
 
 
 class BackupManager:
     """Yedekleme işlemlerini yöneten sınıf."""
     
-    def __init__(self):
+    def __init__(self, db_manager):
+        self.db = db_manager
         self.tables = ['sinif', 'ogrenci', 'kategori', 'not_basligi', 'not_']
     
-    def create_backup_json(self, filepath):
-        """Tüm veritabanını JSON formatında yedekler."""
-        conn = get_connection()
+    def create_backup_json(self, filepath, ilerleme=None):
+        """Tüm veritabanını JSON formatında yedekler. ilerleme(tablo, toplam): her tablo okununca."""
+        conn = get_read_connection()
         cursor = conn.cursor()
         
         backup_data = {
@@ -25,10 +31,12 @@ class BackupManager:
             'tables': {}
         }
         
-        for table in self.tables:
+        for i, table in enumerate(self.tables, 1):
             cursor.execute(f'SELECT * FROM {table}')
             rows = cursor.fetchall()
             backup_data['tables'][table] = [dict(row) for row in rows]
+            if ilerleme:
+                ilerleme(i, len(self.tables))
         
         conn.close()
         
@@ -45,45 +53,23 @@ class BackupManager:
         if 'tables' not in backup_data:
             raise ValueError("Geçersiz yedek dosyası!")
         
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            # Mevcut verileri temizle (ters sırada - foreign key kısıtlamaları için)
-            for table in reversed(self.tables):
-                cursor.execute(f'DELETE FROM {table}')
-            
-            # Yedekteki verileri yükle
-            for table in self.tables:
-                if table in backup_data['tables']:
-                    for row in backup_data['tables'][table]:
-                        columns = ', '.join(row.keys())
-                        placeholders = ', '.join(['?' for _ in row])
-                        cursor.execute(
-                            f'INSERT INTO {table} ({columns}) VALUES ({placeholders})',
-                            list(row.values())
-                        )
-            
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            raise e
-        finally:
-            conn.close()
-        
+        self.db.run_in_own_transaction(self._verileri_yukle, {
+            table: backup_data['tables'][table]
+            for table in self.tables if table in backup_data['tables']
+        })
         return True
     
-    def create_backup_csv(self, folder_path):
-        """Tüm veritabanını CSV dosyalarına yedekler."""
+    def create_backup_csv(self, folder_path, ilerleme=None):
+        """Tüm veritabanını CSV dosyalarına yedekler. ilerleme(tablo, toplam): her tablo yazılınca."""
         if not os.path.exists(folder_path):
             os.makedirs(folder_path)
         
-        conn = get_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         
         created_files = []
         
-        for table in self.tables:
+        for i, table in enumerate(self.tables, 1):
             cursor.execute(f'SELECT * FROM {table}')
             rows = cursor.fetchall()
             
@@ -97,6 +83,8 @@ class BackupManager:
                     for row in rows:
                         writer.writerow(row)
                 created_files.append(filepath)
+            if ilerleme:
+                ilerleme(i, len(self.tables))
         
         conn.close()
         
@@ -117,44 +105,65 @@ class BackupManager:
         if not os.path.exists(meta_path):
             raise ValueError("Geçersiz yedek klasörü! _backup_info.json bulunamadı.")
         
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            # Mevcut verileri temizle
-            for table in reversed(self.tables):
-                cursor.execute(f'DELETE FROM {table}')
-            
-            # CSV dosyalarını yükle
-            for table in self.tables:
-                csv_path = os.path.join(folder_path, f'{table}.csv')
-                if os.path.exists(csv_path):
-                    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
-                        reader = csv.DictReader(f)
-                        for row in reader:
-                            columns = ', '.join(row.keys())
-                            placeholders = ', '.join(['?' for _ in row])
-                            values = []
-                            for v in row.values():
-                                # Boş string'leri None'a çevir
-                                if v == '':
-                                    values.append(None)
-                                else:
-                                    values.append(v)
-                            cursor.execute(
-                                f'INSERT INTO {table} ({columns}) VALUES ({placeholders})',
-                                values
-                            )
-            
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            raise e
-        finally:
-            conn.close()
-        
+        veriler = {}
+        for table in self.tables:
+            csv_path = os.path.join(folder_path, f'{table}.csv')
+            if os.path.exists(csv_path):
+                with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+                    # Boş string'leri None'a çevir
+                    veriler[table] = [
+                        {k: (None if v == '' else v) for k, v in row.items()}
+                        for row in csv.DictReader(f)
+                    ]
+        
+        self.db.run_in_own_transaction(self._verileri_yukle, veriler)
         return True
     
+    def _verileri_yukle(self, veriler):
+        """
+        Tabloları boşaltıp veriler'deki ({tablo: [satır sözlüğü]}) satırları
+        yükler. Yazıcı thread'inde, açık transaction içinde çalışır; hata
+        verirse transaction geri alınır. Eski yedeklerde üst kaydı silinmiş
+        satırlar olabilir; yabancı anahtar kontrolü işlem sonuna ertelenir,
+        sahipsiz satırlar temizlenir ve hiç ihlal kalmadığı doğrulanır.
+        """
+        cursor = get_connection().cursor()
+        
+        # Transaction sonunda kendiliğinden kapanır
+        cursor.execute('PRAGMA defer_foreign_keys = ON')
+        
+        # Mevcut verileri temizle (ters sırada - foreign key kısıtlamaları için)
+        for table in reversed(self.tables):
+            cursor.execute(f'DELETE FROM {table}')
+        
+        # Yedekteki verileri yükle
+        for table in self.tables:
+            for row in veriler.get(table, []):
+                columns = ', '.join(row.keys())
+                placeholders = ', '.join(['?' for _ in row])
+                cursor.execute(
+                    f'INSERT INTO {table} ({columns}) VALUES ({placeholders})',
+                    list(row.values())
+                )
+        
+        # Sahipsiz satırları at; ortalama özetleri de yeniden oluşturulur
+        sahipsiz_kayitlari_temizle(cursor)
+        
+        # Eski yedeklerde öğrenci sıralama anahtarları yoktur
+        sira_anahtarlarini_guncelle(cursor)
+        
+        cursor.execute('PRAGMA foreign_key_check')
+        ihlaller = cursor.fetchall()
+        if ihlaller:
+            tablolar = sorted({row[0] for row in ihlaller})
+            raise ValueError(
+                f"Yedek tutarsız: {len(ihlaller)} satır yabancı anahtar "
+                f"kontrolünden geçmedi ({', '.join(tablolar)})."
+            )
+        
+        # Eski işlem günlüğü artık geçerli kayıtlara işaret etmiyor
+        cursor.execute('DELETE FROM islem_gecmisi')
+    
     def get_backup_info(self, filepath):
         """Yedek dosyasının bilgilerini döndürür."""
         if filepath.endswith('.json'):
@@ -1,11 +1,18 @@
 """
 Excel ve PDF dışa aktarma işlemleri.
 """
+import io
+import multiprocessing
 import os
+import re
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from datetime import datetime
 from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side, NamedStyle
 from openpyxl.utils import get_column_letter
+from pypdf import PdfReader, PdfWriter
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -15,6 +22,260 @@ from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 
 
+def _dolgu(renk):
+    return PatternFill(start_color=renk, end_color=renk, fill_type="solid")
+
+
+def _excel_stilleri():
+    """
+    Excel çıktılarının adlandırılmış stilleri. Her hücreye yeni Font/PatternFill
+    nesnesi yerine stil adı verilir; stil dosyada bir kez tanımlanır.
+    """
+    beyaz_kalin = Font(bold=True, color="FFFFFF")
+    ortali = Alignment(horizontal="center", vertical="center")
+    return [
+        NamedStyle(name="Tablo Başlığı", font=Font(bold=True, size=14),
+                   alignment=Alignment(horizontal="center")),
+        NamedStyle(name="Ortalı", alignment=Alignment(horizontal="center")),
+        NamedStyle(name="Sütun Başlığı", font=beyaz_kalin, fill=_dolgu("4472C4"), alignment=ortali),
+        NamedStyle(name="Not Başlığı", font=beyaz_kalin, fill=_dolgu("70AD47"), alignment=ortali),
+        NamedStyle(name="Genel Başlığı", font=beyaz_kalin, fill=_dolgu("C00000"), alignment=ortali),
+    ]
+
+
+# ==================== PDF (İŞÇİ SÜREÇLER) ====================
+# Toplu karneler ve okul raporunun sınıf bölümleri ayrı süreçlerde çizilip
+# tek dosyada birleştirilir. İşçilere yalnızca düz sözlükler gider (bkz.
+# ExportManager._karne_verileri, _rapor_bolumu); veritabanına dokunmazlar.
+
+_pdf_fontu_adi = None
+_surec_iptali = None  # İşçi süreçte: toplu işin iptal olayı
+
+
+class _Iptal(Exception):
+    """Dışa aktarma iptal edildi."""
+
+
+def _pdf_fontu():
+    """Türkçe karakter destekli fontu (süreç başına bir kez) kaydeder ve adını döndürür."""
+    global _pdf_fontu_adi
+    if _pdf_fontu_adi is None:
+        try:
+            # Windows Arial fontunu kullan
+            pdfmetrics.registerFont(TTFont('Arial', 'C:/Windows/Fonts/arial.ttf'))
+            pdfmetrics.registerFont(TTFont('Arial-Bold', 'C:/Windows/Fonts/arialbd.ttf'))
+            _pdf_fontu_adi = 'Arial'
+        except Exception:
+            _pdf_fontu_adi = 'Helvetica'
+    return _pdf_fontu_adi
+
+
+def _isci_baslat(iptal):
+    global _surec_iptali
+    _surec_iptali = iptal
+    _pdf_fontu()
+
+
+def _pdf_belgesi(hedef):
+    return SimpleDocTemplate(
+        hedef,
+        pagesize=A4,
+        rightMargin=2*cm,
+        leftMargin=2*cm,
+        topMargin=2*cm,
+        bottomMargin=2*cm
+    )
+
+
+def _pdf_baytlari(ogeler_olustur, veri):
+    """ogeler_olustur(veri, font_name) öğelerini çizip PDF baytlarını döndürür (işçi süreçte çalışır)."""
+    if _surec_iptali is not None and _surec_iptali.is_set():
+        raise _Iptal()
+    tampon = io.BytesIO()
+    _pdf_belgesi(tampon).build(ogeler_olustur(veri, _pdf_fontu()))
+    return tampon.getvalue()
+
+
+def _pdf_birlestir(parcalar, filepath, yer_imleri=None):
+    """PDF parçalarını (bayt) sırayla tek dosyaya yazar; yer_imleri verilirse her parçanın başına yer imi koyar."""
+    writer = PdfWriter()
+    for i, parca in enumerate(parcalar):
+        sayfa = len(writer.pages)
+        writer.append(PdfReader(io.BytesIO(parca)))
+        if yer_imleri:
+            writer.add_outline_item(yer_imleri[i], sayfa)
+    with open(filepath, 'wb') as f:
+        writer.write(f)
+
+
+def _karne_ogeleri(veri, font_name):
+    """Bir öğrencinin karnesinin PDF öğeleri (veri: _karne_verileri'nin ürettiği sözlük)."""
+    elements = []
+    styles = getSampleStyleSheet()
+    
+    # Başlık stili
+    title_style = ParagraphStyle(
+        'Title',
+        parent=styles['Heading1'],
+        fontName=font_name,
+        fontSize=18,
+        alignment=1,  # Center
+        spaceAfter=20
+    )
+    
+    # Normal stil
+    normal_style = ParagraphStyle(
+        'Normal',
+        parent=styles['Normal'],
+        fontName=font_name,
+        fontSize=11
+    )
+    
+    # Başlık
+    elements.append(Paragraph("ÖĞRENCİ KARNESİ", title_style))
+    elements.append(Spacer(1, 20))
+    
+    # Öğrenci bilgileri
+    ogrenci_bilgi = [
+        ['Ad Soyad:', veri['ad_soyad']],
+        ['Okul No:', veri['okul_no'] or '-'],
+        ['Sınıf:', veri['sinif_adi'] or '-'],
+        ['Tarih:', veri['tarih']]
+    ]
+    
+    bilgi_table = Table(ogrenci_bilgi, colWidths=[4*cm, 10*cm])
+    bilgi_table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), font_name),
+        ('FONTSIZE', (0, 0), (-1, -1), 11),
+        ('FONTNAME', (0, 0), (0, -1), f'{font_name}'),
+        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+        ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ]))
+    elements.append(bilgi_table)
+    elements.append(Spacer(1, 30))
+    
+    # Notlar tablosu
+    for kategori in veri['kategoriler']:
+        elements.append(Paragraph(f"<b>{kategori['ad']}</b>", normal_style))
+        elements.append(Spacer(1, 10))
+        
+        notlar = [[baslik, str(puan) if puan is not None else '-']
+                  for baslik, puan in kategori['notlar']]
+        
+        if notlar:
+            # Ortalama ekle
+            ort = kategori['ortalama']
+            notlar.append(['Ortalama', f"{ort:.2f}" if ort else '-'])
+            
+            not_table = Table(notlar, colWidths=[10*cm, 4*cm])
+            not_table.setStyle(TableStyle([
+                ('FONTNAME', (0, 0), (-1, -1), font_name),
+                ('FONTSIZE', (0, 0), (-1, -1), 10),
+                ('GRID', (0, 0), (-1, -2), 0.5, colors.grey),
+                ('BACKGROUND', (-1, -1), (-1, -1), colors.lightgrey),
+                ('FONTNAME', (0, -1), (-1, -1), font_name),
+                ('ALIGN', (1, 0), (1, -1), 'CENTER'),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+                ('TOPPADDING', (0, 0), (-1, -1), 6),
+            ]))
+            elements.append(not_table)
+        else:
+            elements.append(Paragraph("Bu kategoride not bulunmuyor.", normal_style))
+        
+        elements.append(Spacer(1, 20))
+    
+    # Genel ortalama
+    genel_ort = veri['genel']
+    genel_style = ParagraphStyle(
+        'Genel',
+        parent=styles['Heading2'],
+        fontName=font_name,
+        fontSize=14,
+        alignment=1
+    )
+    elements.append(Spacer(1, 20))
+    elements.append(Paragraph(
+        f"<b>GENEL ORTALAMA: {f'{genel_ort:.2f}' if genel_ort else '-'}</b>",
+        genel_style
+    ))
+    return elements
+
+
+_BOS_ORTALAMA = {'kategoriler': {}, 'genel': None}
+
+
+def _rapor_bolumu(baslik, ad_basligi, kategoriler, satirlar, ortalama_etiketi, ortalama):
+    """
+    Rapor tablosunun bir bölümü (bir sınıf veya okul özeti) için düz veri.
+    satirlar: (ad, {'kategoriler': {kategori_id: ort}, 'genel': ort}) çiftleri.
+    """
+    def degerler(ort):
+        hucreler = []
+        for kategori in kategoriler:
+            deger = ort['kategoriler'].get(kategori['id'])
+            hucreler.append(f"{deger:.1f}" if deger else '-')
+        hucreler.append(f"{ort['genel']:.1f}" if ort['genel'] else '-')
+        return hucreler
+    
+    data = [['Sıra', ad_basligi] + [f"{kategori['ad'][:10]}" for kategori in kategoriler] + ['Genel']]
+    for i, (ad, ort) in enumerate(satirlar, 1):
+        data.append([str(i), ad] + degerler(ort))
+    data.append(['', ortalama_etiketi] + degerler(ortalama))
+    return {'baslik': baslik, 'data': data}
+
+
+def _rapor_ogeleri(bolum, font_name):
+    """Rapor bölümünün PDF öğeleri: başlık ve sayfalara bölünürken başlık satırı yinelenen tablo."""
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'Title',
+        parent=styles['Heading1'],
+        fontName=font_name,
+        fontSize=18,
+        alignment=1,
+        spaceAfter=20
+    )
+    
+    # Tablo oluştur
+    # Sütun genişlikleri için hesaplama
+    # A4 genişliği = 21cm, kenar boşlukları = 2cm + 2cm = 4cm
+    # Kullanılabilir alan = 17cm
+    available_width = A4[0] - 4*cm
+    
+    # Sabit genişlikler
+    rank_width = 1*cm
+    grade_cols_count = len(bolum['data'][0]) - 2  # Kategoriler + Genel
+    grade_width = 2.2*cm  # Not sütunları için genişlik
+    name_width = available_width - rank_width - grade_cols_count * grade_width
+    
+    # Eğer isim sütunu çok dar kalırsa not sütunlarını biraz daraltabiliriz
+    if name_width < 4*cm:
+        grade_width = 1.8*cm
+        name_width = available_width - rank_width - grade_cols_count * grade_width
+    
+    table = Table(bolum['data'], colWidths=[rank_width, name_width] + [grade_width] * grade_cols_count,
+                  repeatRows=1)
+    table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), font_name),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4472C4')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#FFC000')),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+        ('TOPPADDING', (0, 0), (-1, -1), 4),
+    ]))
+    return [Paragraph(bolum['baslik'], title_style), Spacer(1, 20), table]
+
+
+def _dosya_adi(metin):
+    """Dosya adında kullanılamayan karakterleri temizler."""
+    return re.sub(r'[\\/:*?"<>|]+', '_', str(metin)).strip() or '_'
+
+
 class ExportManager:
     """Dışa aktarma işlemlerini yöneten sınıf."""
     
@@ -24,26 +285,40 @@ class ExportManager:
     
     def _register_fonts(self):
         """PDF için Türkçe karakter destekli font kaydeder."""
-        try:
-            # Windows Arial fontunu kullan
-            pdfmetrics.registerFont(TTFont('Arial', 'C:/Windows/Fonts/arial.ttf'))
-            pdfmetrics.registerFont(TTFont('Arial-Bold', 'C:/Windows/Fonts/arialbd.ttf'))
-            self.font_name = 'Arial'
-        except:
-            self.font_name = 'Helvetica'
+        self.font_name = _pdf_fontu()
     
     # ==================== EXCEL EXPORT ====================
     
-    def export_sinif_listesi_excel(self, sinif_id, filepath):
-        """Sınıf listesini Excel'e aktarır. sinif_id None ise tüm sınıflar."""
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Öğrenci Listesi"
-        
-        # Başlık stili
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        header_alignment = Alignment(horizontal="center", vertical="center")
+    def _akis_calisma_kitabi(self):
+        """
+        Yalnızca yazılabilir (write-only) çalışma kitabı: satırlar eklendikçe
+        diske akar, bellekte hücre nesnesi birikmez. Sayfa düzeni (sütun
+        genişlikleri, birleştirmeler) ilk satırdan önce ayarlanmalıdır.
+        """
+        wb = Workbook(write_only=True)
+        for stil in _excel_stilleri():
+            wb.add_named_style(stil)
+        return wb
+    
+    @staticmethod
+    def _hucre(ws, deger, stil):
+        """Adlandırılmış stilli tek hücre (write-only sayfalar için)."""
+        cell = WriteOnlyCell(ws, value=deger)
+        cell.style = stil
+        return cell
+    
+    @staticmethod
+    def _iptal_kontrol_et(iptal):
+        return iptal is not None and iptal.is_set()
+    
+    def export_sinif_listesi_excel(self, sinif_id, filepath, ilerleme=None, iptal=None):
+        """
+        Sınıf listesini Excel'e aktarır. sinif_id None ise tüm sınıflar.
+        ilerleme(satir, None): yazılan satır sayısı (toplam önceden bilinmez).
+        iptal: threading.Event; kurulursa dosya yazılmaz ve None döner.
+        """
+        wb = self._akis_calisma_kitabi()
+        ws = wb.create_sheet("Öğrenci Listesi")
         
         # Sınıf bilgisi al
         if sinif_id:
@@ -51,176 +326,142 @@ class ExportManager:
             sinif = next((s for s in siniflar if s['id'] == sinif_id), None)
             sinif_adi = sinif['ad'] if sinif else 'Bilinmeyen Sınıf'
             title = f"{sinif_adi} - Öğrenci Listesi"
-            ogrenciler = self.db.get_all_ogrenciler(sinif_id)
+            ogrenciler = self.db.iter_ogrenciler(sinif_id)
             headers = ['Sıra', 'Okul No', 'Ad', 'Soyad']
+            genislikler = [8, 15, 20, 20]
         else:
-            sinif_adi = "TÜM SINIFLAR"
             title = "TÜM SINIFLAR - Öğrenci Listesi"
-            ogrenciler = self.db.get_all_ogrenciler(None)
-            # Sınıf bilgisi ekle
-            for ogrenci in ogrenciler:
-                if not ogrenci.get('sinif_adi'):
-                    # DB'den gelmiyorsa (get_all_ogrenciler güncellemesine bağlı)
-                    # Burda basitçe id'den bulmaya çalışabiliriz ama db_manager.get_all_ogrenciler join yapıyor mu?
-                    # Evet, genellikle join yapar. Kontrol ettim, join yapıyor.
-                    pass
-            # Sıralama: Sınıf, sonra Ad
+            # Sıralama: Sınıf, sonra soyad/ad. Liste sayfa sayfa okunur
+            # (sinif_adi sorgudaki JOIN'den gelir)
+            ogrenciler = self.db.iter_ogrenciler(None, 'sinif')
             headers = ['Sıra', 'Sınıf', 'Okul No', 'Ad', 'Soyad']
-
-        # Başlık satırı
-        ws.merge_cells('A1:E1')
-        ws['A1'] = title
-        ws['A1'].font = Font(bold=True, size=14)
-        ws['A1'].alignment = Alignment(horizontal="center")
-        
-        # Tarih
-        ws.merge_cells('A2:E2')
-        ws['A2'] = f"Oluşturma Tarihi: {datetime.now().strftime('%d.%m.%Y %H:%M')}"
-        ws['A2'].alignment = Alignment(horizontal="center")
-        
-        # Sütun başlıkları
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=4, column=col, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
+            genislikler = [8, 12, 15, 20, 20]
+        
+        # Sütun genişlikleri ve birleştirmeler satırlardan önce
+        for col, genislik in enumerate(genislikler, 1):
+            ws.column_dimensions[get_column_letter(col)].width = genislik
+        ws.merged_cells.add('A1:E1')
+        ws.merged_cells.add('A2:E2')
+        
+        # Başlık, tarih ve sütun başlıkları
+        ws.append([self._hucre(ws, title, "Tablo Başlığı")])
+        ws.append([self._hucre(
+            ws, f"Oluşturma Tarihi: {datetime.now().strftime('%d.%m.%Y %H:%M')}", "Ortalı"
+        )])
+        ws.append([])
+        ws.append([self._hucre(ws, header, "Sütun Başlığı") for header in headers])
         
         # Öğrenci verileri
-        for row, ogrenci in enumerate(ogrenciler, 5):
-            col_offset = 0
+        for sira, ogrenci in enumerate(ogrenciler, 1):
             if not sinif_id:
-                 ws.cell(row=row, column=1, value=row-4)
-                 ws.cell(row=row, column=2, value=ogrenci.get('sinif_adi', '-'))
-                 ws.cell(row=row, column=3, value=ogrenci['okul_no'])
-                 ws.cell(row=row, column=4, value=ogrenci['ad'])
-                 ws.cell(row=row, column=5, value=ogrenci['soyad'])
+                ws.append([sira, ogrenci.get('sinif_adi') or '-', ogrenci['okul_no'],
+                           ogrenci['ad'], ogrenci['soyad']])
             else:
-                 ws.cell(row=row, column=1, value=row-4)
-                 ws.cell(row=row, column=2, value=ogrenci['okul_no'])
-                 ws.cell(row=row, column=3, value=ogrenci['ad'])
-                 ws.cell(row=row, column=4, value=ogrenci['soyad'])
-        
-        # Sütun genişlikleri
-        ws.column_dimensions['A'].width = 8
-        if not sinif_id:
-             ws.column_dimensions['B'].width = 12
-             ws.column_dimensions['C'].width = 15
-             ws.column_dimensions['D'].width = 20
-             ws.column_dimensions['E'].width = 20
-        else:
-             ws.column_dimensions['B'].width = 15
-             ws.column_dimensions['C'].width = 20
-             ws.column_dimensions['D'].width = 20
+                ws.append([sira, ogrenci['okul_no'], ogrenci['ad'], ogrenci['soyad']])
+            if sira % 500 == 0:
+                if self._iptal_kontrol_et(iptal):
+                    return None
+                if ilerleme:
+                    ilerleme(sira, None)
         
         wb.save(filepath)
         return filepath
     
-    def export_not_cizelgesi_excel(self, sinif_id, filepath):
-        """Sınıfın not çizelgesini Excel'e aktarır. sinif_id None ise tüm sınıflar için ayrı sheet."""
-        wb = Workbook()
-        # Varsayılan sheet'i kaldır (döngüde ekleyeceğiz veya yeniden adlandıracağız)
-        default_ws = wb.active
-        
+    def export_not_cizelgesi_excel(self, sinif_id, filepath, ilerleme=None, iptal=None):
+        """
+        Sınıfın not çizelgesini Excel'e aktarır. sinif_id None ise tüm sınıflar için ayrı sheet.
+        ilerleme(sayfa, toplam): her sınıf sayfası bittiğinde çağrılır.
+        iptal: threading.Event; kurulursa dosya yazılmaz ve None döner.
+        """
+        wb = self._akis_calisma_kitabi()
+        
+        siniflar = self.db.get_all_siniflar()
         if sinif_id:
-            siniflar = [{'id': sinif_id, 'ad': 'Not Çizelgesi'}] # Tek sınıf
-            # Sınıf adını al
-            all_s = self.db.get_all_siniflar()
-            s = next((x for x in all_s if x['id'] == sinif_id), None)
-            if s: siniflar[0]['ad'] = s['ad']
-        else:
-            siniflar = self.db.get_all_siniflar()
-            wb.remove(default_ws) # İlk boş sheet'i sil
-            
+            # Tek sınıf
+            s = next((x for x in siniflar if x['id'] == sinif_id), None)
+            siniflar = [{'id': sinif_id, 'ad': s['ad'] if s else 'Not Çizelgesi'}]
+        
         if not siniflar:
-             # Hiç sınıf yoksa boş bir tane oluştur
-             wb.create_sheet("Boş")
+            # Hiç sınıf yoksa boş bir tane oluştur
+            wb.create_sheet("Boş")
         
-        for sinif_data in siniflar:
+        kategoriler = self.db.get_all_kategoriler()
+        for sayfa, sinif_data in enumerate(siniflar, 1):
+            if self._iptal_kontrol_et(iptal):
+                return None
             s_id = sinif_data['id']
             s_name = sinif_data['ad']
             
             # Sheet ismi max 31 karakter olabilir
             safe_name = "".join(x for x in s_name if x.isalnum() or x in " -_")[:30]
-            ws = wb.create_sheet(title=safe_name)
+            ws = wb.create_sheet(title=safe_name or "Sınıf")
             
-            self._fill_grade_sheet(ws, s_id, s_name)
+            self._fill_grade_sheet(ws, s_id, s_name, kategoriler)
+            if ilerleme:
+                ilerleme(sayfa, len(siniflar))
             
         wb.save(filepath)
         return filepath
 
-    def _fill_grade_sheet(self, ws, sinif_id, sinif_adi):
-        """Bir Excel sayfasına sınıfın notlarını doldurur."""
-        # Stiller
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        category_fill = PatternFill(start_color="70AD47", end_color="70AD47", fill_type="solid")
-        
-        # Sınıf ve kategoriler
-        ogrenciler = self.db.get_all_ogrenciler(sinif_id)
-        kategoriler = self.db.get_all_kategoriler()
-        
-        # Başlık
-        row = 1
-        ws.merge_cells(f'A{row}:Z{row}')
-        ws[f'A{row}'] = f"{sinif_adi} - Not Çizelgesi"
-        ws[f'A{row}'].font = Font(bold=True, size=14)
-        
-        row = 3
-        # Sütun başlıkları
-        ws.cell(row=row, column=1, value="Sıra").font = header_font
-        ws.cell(row=row, column=1).fill = header_fill
-        ws.cell(row=row, column=2, value="Ad Soyad").font = header_font
-        ws.cell(row=row, column=2).fill = header_fill
-        
-        col = 3
+    def _fill_grade_sheet(self, ws, sinif_id, sinif_adi, kategoriler=None):
+        """
+        Bir Excel sayfasına sınıfın notlarını yazar. Sınıf başına bir çizelge
+        ve bir ortalama sorgusu yapılır; satırlar üretildikçe sayfaya akar.
+        """
+        if kategoriler is None:
+            kategoriler = self.db.get_all_kategoriler()
+        
+        # Sınıf, kategoriler ve not çizelgesi (tek sorgu)
+        matris = self.db.get_not_matrisi(sinif_id)
+        ortalamalar = self.db.get_ortalama_tablosu(sinif_id)
+        
+        # Kategori -> çizelgedeki sütun indeksleri
+        kategori_sutunlari = {}
+        for j, baslik in enumerate(matris['basliklar']):
+            kategori_sutunlari.setdefault(baslik['kategori_id'], []).append(j)
+        
+        # Sütun başlıkları: başlıklar kategori sırasıyla, her kategoriden sonra ortalaması
+        basliklar = [self._hucre(ws, "Sıra", "Sütun Başlığı"),
+                     self._hucre(ws, "Ad Soyad", "Sütun Başlığı")]
         for kategori in kategoriler:
-            basliklar = self.db.get_not_basliklari(kategori_id=kategori['id'], sinif_id=sinif_id)
-            for baslik in basliklar:
-                cell = ws.cell(row=row, column=col, value=baslik['baslik'])
-                cell.font = header_font
-                cell.fill = category_fill
-                col += 1
-            
-            # Kategori ortalaması
-            cell = ws.cell(row=row, column=col, value=f"{kategori['ad']} Ort.")
-            cell.font = header_font
-            cell.fill = header_fill
-            col += 1
+            for j in kategori_sutunlari.get(kategori['id'], []):
+                basliklar.append(self._hucre(ws, matris['basliklar'][j]['baslik'], "Not Başlığı"))
+            basliklar.append(self._hucre(ws, f"{kategori['ad']} Ort.", "Sütun Başlığı"))
+        basliklar.append(self._hucre(ws, "Genel Ort.", "Genel Başlığı"))
         
-        # Genel ortalama
-        cell = ws.cell(row=row, column=col, value="Genel Ort.")
-        cell.font = header_font
-        cell.fill = PatternFill(start_color="C00000", end_color="C00000", fill_type="solid")
+        # Sütun genişlikleri ve başlık birleştirmesi satırlardan önce
+        ws.column_dimensions['A'].width = 8
+        ws.column_dimensions['B'].width = 25
+        for i in range(3, len(basliklar) + 1):
+            ws.column_dimensions[get_column_letter(i)].width = 12
+        ws.merged_cells.add('A1:Z1')
         
-        # Öğrenci verileri
-        for i, ogrenci in enumerate(ogrenciler, 1):
-            row = i + 3
-            ws.cell(row=row, column=1, value=i)
-            ws.cell(row=row, column=2, value=f"{ogrenci['ad']} {ogrenci['soyad']}")
-            
-            curr_col = 3
+        ws.append([self._hucre(ws, f"{sinif_adi} - Not Çizelgesi", "Tablo Başlığı")])
+        ws.append([])
+        ws.append(basliklar)
+        for satir in self._not_satirlari(matris, kategoriler, kategori_sutunlari, ortalamalar):
+            ws.append(satir)
+    
+    @staticmethod
+    def _not_satirlari(matris, kategoriler, kategori_sutunlari, ortalamalar):
+        """Not çizelgesinin veri satırlarını tek tek üretir."""
+        bos = {'kategoriler': {}, 'genel': None}
+        for i, (ogrenci, puanlar) in enumerate(zip(matris['ogrenciler'], matris['puanlar']), 1):
+            ortalama = ortalamalar.get(ogrenci['id'], bos)
+            satir = [i, f"{ogrenci['ad']} {ogrenci['soyad']}"]
             for kategori in kategoriler:
-                basliklar = self.db.get_not_basliklari(kategori_id=kategori['id'], sinif_id=sinif_id)
-                for baslik in basliklar:
-                    notlar = self.db.get_notlar(ogrenci_id=ogrenci['id'], baslik_id=baslik['id'])
-                    puan = notlar[0]['puan'] if notlar else None
-                    ws.cell(row=row, column=curr_col, value=puan if puan is not None else '-')
-                    curr_col += 1
+                for j in kategori_sutunlari.get(kategori['id'], []):
+                    puan = puanlar[j]
+                    satir.append(puan if puan is not None else '-')
                 
                 # Kategori ortalaması
-                ort = self.db.get_ogrenci_kategori_ortalama(ogrenci['id'], kategori['id'])
-                ws.cell(row=row, column=curr_col, value=round(ort, 2) if ort else '-')
-                curr_col += 1
+                ort = ortalama['kategoriler'].get(kategori['id'])
+                satir.append(round(ort, 2) if ort else '-')
             
             # Genel ortalama
-            genel = self.db.get_ogrenci_genel_ortalama(ogrenci['id'])
-            ws.cell(row=row, column=curr_col, value=round(genel, 2) if genel else '-')
-        
-        # Sütun genişlikleri
-        ws.column_dimensions['A'].width = 8
-        ws.column_dimensions['B'].width = 25
-        for i in range(3, col + 1):
-            ws.column_dimensions[get_column_letter(i)].width = 12
+            genel = ortalama['genel']
+            satir.append(round(genel, 2) if genel else '-')
+            yield satir
     
     # ==================== PDF EXPORT ====================
     
@@ -230,236 +471,210 @@ class ExportManager:
         if not ogrenci:
             raise ValueError("Öğrenci bulunamadı!")
         
-        doc = SimpleDocTemplate(
-            filepath,
-            pagesize=A4,
-            rightMargin=2*cm,
-            leftMargin=2*cm,
-            topMargin=2*cm,
-            bottomMargin=2*cm
-        )
-        
-        elements = []
-        styles = getSampleStyleSheet()
-        
-        # Başlık stili
-        title_style = ParagraphStyle(
-            'Title',
-            parent=styles['Heading1'],
-            fontName=self.font_name,
-            fontSize=18,
-            alignment=1,  # Center
-            spaceAfter=20
-        )
-        
-        # Normal stil
-        normal_style = ParagraphStyle(
-            'Normal',
-            parent=styles['Normal'],
-            fontName=self.font_name,
-            fontSize=11
-        )
-        
-        # Başlık
-        elements.append(Paragraph("ÖĞRENCİ KARNESİ", title_style))
-        elements.append(Spacer(1, 20))
-        
-        # Öğrenci bilgileri
-        ogrenci_bilgi = [
-            ['Ad Soyad:', f"{ogrenci['ad']} {ogrenci['soyad']}"],
-            ['Okul No:', ogrenci['okul_no'] or '-'],
-            ['Sınıf:', ogrenci.get('sinif_adi', '-')],
-            ['Tarih:', datetime.now().strftime('%d.%m.%Y')]
-        ]
-        
-        bilgi_table = Table(ogrenci_bilgi, colWidths=[4*cm, 10*cm])
-        bilgi_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), self.font_name),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('FONTNAME', (0, 0), (0, -1), f'{self.font_name}'),
-            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-            ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ]))
-        elements.append(bilgi_table)
-        elements.append(Spacer(1, 30))
-        
-        # Notlar tablosu
-        kategoriler = self.db.get_all_kategoriler()
-        
-        for kategori in kategoriler:
-            elements.append(Paragraph(f"<b>{kategori['ad']}</b>", normal_style))
-            elements.append(Spacer(1, 10))
-            
-            notlar = []
-            basliklar = self.db.get_not_basliklari(kategori_id=kategori['id'])
-            
-            for baslik in basliklar:
-                not_kayitlari = self.db.get_notlar(ogrenci_id=ogrenci_id, baslik_id=baslik['id'])
-                puan = not_kayitlari[0]['puan'] if not_kayitlari else '-'
-                notlar.append([baslik['baslik'], str(puan)])
-            
-            if notlar:
-                # Ortalama ekle
-                ort = self.db.get_ogrenci_kategori_ortalama(ogrenci_id, kategori['id'])
-                notlar.append(['Ortalama', f"{ort:.2f}" if ort else '-'])
-                
-                not_table = Table(notlar, colWidths=[10*cm, 4*cm])
-                not_table.setStyle(TableStyle([
-                    ('FONTNAME', (0, 0), (-1, -1), self.font_name),
-                    ('FONTSIZE', (0, 0), (-1, -1), 10),
-                    ('GRID', (0, 0), (-1, -2), 0.5, colors.grey),
-                    ('BACKGROUND', (-1, -1), (-1, -1), colors.lightgrey),
-                    ('FONTNAME', (0, -1), (-1, -1), self.font_name),
-                    ('ALIGN', (1, 0), (1, -1), 'CENTER'),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                    ('TOPPADDING', (0, 0), (-1, -1), 6),
-                ]))
-                elements.append(not_table)
-            else:
-                elements.append(Paragraph("Bu kategoride not bulunmuyor.", normal_style))
-            
-            elements.append(Spacer(1, 20))
-        
-        # Genel ortalama
-        genel_ort = self.db.get_ogrenci_genel_ortalama(ogrenci_id)
-        genel_style = ParagraphStyle(
-            'Genel',
-            parent=styles['Heading2'],
-            fontName=self.font_name,
-            fontSize=14,
-            alignment=1
-        )
-        elements.append(Spacer(1, 20))
-        elements.append(Paragraph(
-            f"<b>GENEL ORTALAMA: {genel_ort:.2f if genel_ort else '-'}</b>",
-            genel_style
+        veri = next(self._karne_verileri(
+            ogrenci['sinif_id'], self.db.get_all_kategoriler(), {ogrenci_id}
         ))
-        
-        doc.build(elements)
+        _pdf_belgesi(filepath).build(_karne_ogeleri(veri, self.font_name))
         return filepath
     
-    def export_sinif_raporu_pdf(self, sinif_id, filepath):
-        """Sınıf raporunu PDF'e aktarır. sinif_id None ise tüm sınıflar."""
+    def _karne_verileri(self, sinif_id, kategoriler, ogrenci_ids=None):
+        """
+        Sınıftaki öğrencilerin karne verilerini sırayla üretir. Sınıf başına
+        bir not çizelgesi ve bir ortalama sorgusu yapılır; karnede sınıfın not
+        başlıkları yer alır. Üretilen sözlükler yalnızca düz değerler içerir,
+        işçi süreçlere olduğu gibi gönderilebilir.
+        """
+        matris = self.db.get_not_matrisi(sinif_id)
+        ortalamalar = self.db.get_ortalama_tablosu(sinif_id)
+        tarih = datetime.now().strftime('%d.%m.%Y')
+        
+        # Kategori -> çizelgedeki sütun indeksleri
+        kategori_sutunlari = {}
+        for j, baslik in enumerate(matris['basliklar']):
+            kategori_sutunlari.setdefault(baslik['kategori_id'], []).append(j)
+        
+        bos = {'kategoriler': {}, 'genel': None}
+        for ogrenci, puanlar in zip(matris['ogrenciler'], matris['puanlar']):
+            if ogrenci_ids is not None and ogrenci['id'] not in ogrenci_ids:
+                continue
+            ortalama = ortalamalar.get(ogrenci['id'], bos)
+            yield {
+                'id': ogrenci['id'],
+                'ad_soyad': f"{ogrenci['ad']} {ogrenci['soyad']}",
+                'okul_no': ogrenci['okul_no'],
+                'sinif_adi': ogrenci['sinif_adi'],
+                'tarih': tarih,
+                'kategoriler': [
+                    {
+                        'ad': kategori['ad'],
+                        'notlar': [(matris['basliklar'][j]['baslik'], puanlar[j])
+                                   for j in kategori_sutunlari.get(kategori['id'], [])],
+                        'ortalama': ortalama['kategoriler'].get(kategori['id']),
+                    }
+                    for kategori in kategoriler
+                ],
+                'genel': ortalama['genel'],
+            }
+    
+    def export_karneler(self, sinif_id, filepath, birlestir=False, ilerleme=None, iptal=None,
+                        max_isci=None):
+        """
+        Sınıftaki (sinif_id None ise tüm sınıflardaki) öğrencilerin karnelerini
+        ayrı süreçlerde oluşturur. birlestir False ise her öğrenci için ayrı PDF
+        tek ZIP dosyasına, True ise tüm karneler sırayla tek PDF'e yazılır.
+        ilerleme(tamamlanan, toplam): her karne bittiğinde çağıranın thread'inde çağrılır.
+        iptal: threading.Event; kurulursa bekleyen karneler bırakılır, yarım
+        dosya silinir ve None döner.
+        """
+        kategoriler = self.db.get_all_kategoriler()
         if sinif_id:
-            siniflar = self.db.get_all_siniflar()
-            sinif = next((s for s in siniflar if s['id'] == sinif_id), None)
-            sinif_adi = sinif['ad'] if sinif else 'Bilinmeyen Sınıf'
-            title = f"{sinif_adi} - SINIF RAPORU"
+            sinif_idleri = [sinif_id]
         else:
-            title = "TÜM OKUL RAPORU"
-        
-        doc = SimpleDocTemplate(
-            filepath,
-            pagesize=A4,
-            rightMargin=2*cm,
-            leftMargin=2*cm,
-            topMargin=2*cm,
-            bottomMargin=2*cm
-        )
-        
-        elements = []
-        styles = getSampleStyleSheet()
-        
-        title_style = ParagraphStyle(
-            'Title',
-            parent=styles['Heading1'],
-            fontName=self.font_name,
-            fontSize=18,
-            alignment=1,
-            spaceAfter=20
-        )
-        
-        elements.append(Paragraph(title, title_style))
-        elements.append(Spacer(1, 20))
-        
-        # Öğrenciler ve notları
-        ogrenciler = self.db.get_all_ogrenciler(sinif_id)
-        kategoriler = self.db.get_all_kategoriler()
-        
-        # Tablo başlıkları
-        headers = ['Sıra']
-        if not sinif_id:
-            headers.append('Sınıf')
-        headers.append('Ad Soyad')
-        for kategori in kategoriler:
-            headers.append(f"{kategori['ad'][:10]}")
-        headers.append('Genel')
-        
-        # Veriler
-        data = [headers]
-        for i, ogrenci in enumerate(ogrenciler, 1):
-            row = [str(i)]
-            if not sinif_id:
-                row.append(ogrenci.get('sinif_adi', '-'))
-            row.append(f"{ogrenci['ad']} {ogrenci['soyad']}")
-            for kategori in kategoriler:
-                ort = self.db.get_ogrenci_kategori_ortalama(ogrenci['id'], kategori['id'])
-                row.append(f"{ort:.1f}" if ort else '-')
-            genel = self.db.get_ogrenci_genel_ortalama(ogrenci['id'])
-            row.append(f"{genel:.1f}" if genel else '-')
-            data.append(row)
-        
-        # Sınıf/Okul ortalamaları
-        avg_row = ['']
-        if not sinif_id:
-            avg_row.append('') # Sınıf sütunu için
-            avg_label_col = 1
+            sinif_idleri = [s['id'] for s in self.db.get_all_siniflar()]
+        veriler = [veri for sid in sinif_idleri for veri in self._karne_verileri(sid, kategoriler)]
+        if not veriler:
+            raise ValueError("Karnesi oluşturulacak öğrenci bulunamadı!")
+        
+        if birlestir:
+            def yaz(parcalar):
+                _pdf_birlestir(parcalar, filepath)
         else:
-            avg_label_col = 0
+            sinif_klasorleri = len(sinif_idleri) > 1
             
-        avg_row.append('GENEL ORT.')
-        
-        for kategori in kategoriler:
-            ort = self.db.get_sinif_kategori_ortalama(sinif_id, kategori['id'])
-            avg_row.append(f"{ort:.1f}" if ort else '-')
-        genel = self.db.get_sinif_genel_ortalama(sinif_id)
-        avg_row.append(f"{genel:.1f}" if genel else '-')
-        data.append(avg_row)
-        
-        # Tablo oluştur
-        # Sütun genişlikleri için hesaplama
-        # A4 genişliği = 21cm, kenar boşlukları = 2cm + 2cm = 4cm
-        # Kullanılabilir alan = 17cm
-        available_width = A4[0] - 4*cm
-        
-        # Sabit genişlikler
-        rank_width = 1*cm
-        class_width = 2.5*cm if not sinif_id else 0
-        grade_cols_count = len(kategoriler) + 1 # Kategoriler + Genel
-        grade_width = 2.2*cm # Not sütunları için genişlik
-        
-        # İsim sütununa kalan genişlik
-        used_width = rank_width + class_width + (grade_cols_count * grade_width)
-        name_width = available_width - used_width
-        
-        # Eğer isim sütunu çok dar kalırsa not sütunlarını biraz daraltabiliriz
-        if name_width < 4*cm:
-            grade_width = 1.8*cm
-            used_width = rank_width + class_width + (grade_cols_count * grade_width)
-            name_width = available_width - used_width
-        
-        col_widths = [rank_width]
+            def yaz(parcalar):
+                adlar = set()
+                with zipfile.ZipFile(filepath, 'w', zipfile.ZIP_DEFLATED) as zf:
+                    for veri, parca in zip(veriler, parcalar):
+                        ad = _dosya_adi(f"{veri['okul_no'] or veri['id']}_{veri['ad_soyad']}")
+                        if sinif_klasorleri:
+                            ad = f"{_dosya_adi(veri['sinif_adi'])}/{ad}"
+                        if ad in adlar:
+                            ad = f"{ad}_{veri['id']}"
+                        adlar.add(ad)
+                        zf.writestr(f"{ad}.pdf", parca)
+        
+        return self._paralel_pdf(_karne_ogeleri, veriler, yaz, filepath, ilerleme, iptal, max_isci)
+    
+    def _paralel_pdf(self, ogeler_olustur, veriler, yaz, filepath, ilerleme=None, iptal=None,
+                     max_isci=None):
+        """
+        Her veri için ogeler_olustur(veri, font_name) öğelerinden ayrı bir PDF'i
+        işçi süreçlerde çizer, hepsi bitince parçaları (veri sırasıyla) yaz()'a verir.
+        ilerleme/iptal: bkz. export_karneler. İptalde None, aksi halde filepath döner.
+        """
+        # spawn: işçiler UI ve veritabanı thread'lerini kopyalamadan başlar (Windows ile aynı)
+        baglam = multiprocessing.get_context('spawn')
+        surec_iptali = baglam.Event()
+        havuz = ProcessPoolExecutor(
+            max_workers=min(max_isci or os.cpu_count() or 1, len(veriler)),
+            mp_context=baglam,
+            initializer=_isci_baslat,
+            initargs=(surec_iptali,),
+        )
+        basarili = False
+        try:
+            isler = {havuz.submit(_pdf_baytlari, ogeler_olustur, veri): i
+                     for i, veri in enumerate(veriler)}
+            parcalar = [None] * len(veriler)
+            for tamamlanan, is_ in enumerate(self._tamamlananlar(isler, iptal), 1):
+                parcalar[isler[is_]] = is_.result()
+                if ilerleme:
+                    ilerleme(tamamlanan, len(veriler))
+            yaz(parcalar)
+            basarili = True
+        except _Iptal:
+            pass
+        finally:
+            if not basarili:
+                surec_iptali.set()
+            havuz.shutdown(wait=True, cancel_futures=True)
+            if not basarili and os.path.exists(filepath):
+                os.remove(filepath)
+        return filepath if basarili else None
+    
+    @classmethod
+    def _tamamlananlar(cls, isler, iptal):
+        """Biten işleri sırayla üretir; iptal kurulursa _Iptal fırlatır."""
+        bekleyen = set(isler)
+        while bekleyen:
+            if cls._iptal_kontrol_et(iptal):
+                raise _Iptal()
+            biten, bekleyen = wait(bekleyen, timeout=0.2, return_when=FIRST_COMPLETED)
+            yield from biten
+    
+    def export_sinif_raporu_pdf(self, sinif_id, filepath, ilerleme=None, iptal=None, max_isci=None):
+        """
+        Sınıf raporunu PDF'e aktarır. sinif_id None ise okul raporu: okul özeti
+        ve her sınıf için ayrı bölüm; bölümler işçi süreçlerde paralel çizilip
+        tek PDF'te birleştirilir (ilerleme/iptal: bkz. export_karneler).
+        """
+        kategoriler = self.db.get_all_kategoriler()
         if not sinif_id:
-            col_widths.append(class_width)
-        col_widths.append(name_width)
-        col_widths.extend([grade_width] * grade_cols_count)
-             
-        table = Table(data, colWidths=col_widths)
-        
-        table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), self.font_name),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4472C4')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#FFC000')),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-            ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ]))
-        elements.append(table)
-        
-        doc.build(elements)
+            return self._export_okul_raporu_pdf(filepath, kategoriler, ilerleme, iptal, max_isci)
+        
+        siniflar = self.db.get_all_siniflar()
+        sinif = next((s for s in siniflar if s['id'] == sinif_id), None)
+        sinif_adi = sinif['ad'] if sinif else 'Bilinmeyen Sınıf'
+        
+        ortalamalar = self.db.get_ortalama_tablosu(sinif_id)
+        sinif_ortalamasi = self.db.get_sinif_ortalama_tablosu(sinif_id).get(sinif_id, _BOS_ORTALAMA)
+        bolum = _rapor_bolumu(
+            f"{sinif_adi} - SINIF RAPORU", 'Ad Soyad', kategoriler,
+            self._ogrenci_ortalamalari(self.db.iter_ogrenciler(sinif_id), ortalamalar),
+            'GENEL ORT.', sinif_ortalamasi,
+        )
+        _pdf_belgesi(filepath).build(_rapor_ogeleri(bolum, self.font_name))
         return filepath
+    
+    @staticmethod
+    def _ogrenci_ortalamalari(ogrenciler, ortalamalar):
+        """Rapor bölümü satırları: (ad soyad, öğrencinin ortalamaları)."""
+        for ogrenci in ogrenciler:
+            yield f"{ogrenci['ad']} {ogrenci['soyad']}", ortalamalar.get(ogrenci['id'], _BOS_ORTALAMA)
+    
+    def _export_okul_raporu_pdf(self, filepath, kategoriler, ilerleme, iptal, max_isci):
+        """
+        Okul raporu. Öğrenciler, öğrenci ortalamaları ve sınıf ortalamaları
+        birer sorguda okunur; bölümler sınıf sayısından bağımsız sabit sayıda
+        sorguyla hazırlanır.
+        """
+        siniflar = self.db.get_all_siniflar()
+        ortalamalar = self.db.get_ortalama_tablosu()
+        sinif_ortalamalari = self.db.get_sinif_ortalama_tablosu()
+        
+        # Öğrenciler sınıflarına göre (sınıf içinde soyada göre)
+        sinif_ogrencileri = {}
+        for ogrenci in self.db.iter_ogrenciler(None):
+            sinif_ogrencileri.setdefault(ogrenci['sinif_id'], []).append(ogrenci)
+        
+        okul_ortalamasi = {'kategoriler': {}, 'genel': self.db.get_sinif_genel_ortalama(None)}
+        for kategori in kategoriler:
+            okul_ortalamasi['kategoriler'][kategori['id']] = \
+                self.db.get_sinif_kategori_ortalama(None, kategori['id'])
+        
+        bolumler = [_rapor_bolumu(
+            "TÜM OKUL RAPORU", 'Sınıf', kategoriler,
+            [(s['ad'], sinif_ortalamalari.get(s['id'], _BOS_ORTALAMA)) for s in siniflar],
+            'OKUL ORT.', okul_ortalamasi,
+        )]
+        yer_imleri = ["Okul Özeti"]
+        for sinif in siniflar:
+            bolumler.append(_rapor_bolumu(
+                f"{sinif['ad']} - SINIF RAPORU", 'Ad Soyad', kategoriler,
+                self._ogrenci_ortalamalari(sinif_ogrencileri.get(sinif['id'], []), ortalamalar),
+                'SINIF ORT.', sinif_ortalamalari.get(sinif['id'], _BOS_ORTALAMA),
+            ))
+            yer_imleri.append(sinif['ad'])
+        if sinif_ogrencileri.get(None):
+            bolumler.append(_rapor_bolumu(
+                "SINIFI OLMAYAN ÖĞRENCİLER", 'Ad Soyad', kategoriler,
+                self._ogrenci_ortalamalari(sinif_ogrencileri[None], ortalamalar),
+                'ORTALAMA', _BOS_ORTALAMA,
+            ))
+            yer_imleri.append("Sınıfı Olmayanlar")
+        
+        return self._paralel_pdf(
+            _rapor_ogeleri, bolumler,
+            lambda parcalar: _pdf_birlestir(parcalar, filepath, yer_imleri),
+            filepath, ilerleme, iptal, max_isci,
+        )
@@ -0,0 +1,184 @@
+"""
+Arka plan dışa aktarma işleri.
+Dışa aktarmalar ve yedekler tek bir iş thread'inde sırayla çalışır; UI
+thread'i yalnızca işi kuyruğa koyar. Her iş ilerlemesini, süresini ve
+sonucunu tutar ve değiştikçe dinleyiciye bildirir. Bekleyen veya süren
+iş iptal edilebilir.
+"""
+import contextvars
+import itertools
+import queue
+import threading
+import time
+
+BEKLIYOR = 'bekliyor'
+CALISIYOR = 'calisiyor'
+TAMAMLANDI = 'tamamlandi'
+HATA = 'hata'
+IPTAL = 'iptal'
+
+_BITMIS = (TAMAMLANDI, HATA, IPTAL)
+_BILDIRIM_ARALIGI = 0.2  # İlerleme bildirimleri arasındaki en kısa süre (sn)
+
+
+class ExportJob:
+    """Kuyruktaki tek bir dışa aktarma işi."""
+    
+    def __init__(self, is_id, ad, fn, hedef):
+        self.id = is_id
+        self.ad = ad
+        self.hedef = hedef
+        self.durum = BEKLIYOR
+        self.tamamlanan = 0
+        self.toplam = None
+        self.hata = None
+        self.sonuc = None
+        self.baslangic = None
+        self.bitis = None
+        self.iptal = threading.Event()
+        self._fn = fn
+        # Çağıranın bağlamı (ör. sorgu ölçümü etiketleri) iş thread'inde de geçerli olsun
+        self._baglam = contextvars.copy_context()
+    
+    @property
+    def bitti(self):
+        return self.durum in _BITMIS
+    
+    @property
+    def sure(self):
+        """Çalışma süresi (sn); başlamadıysa None, sürüyorsa şimdiye kadarki."""
+        if self.baslangic is None:
+            return None
+        return (self.bitis or time.monotonic()) - self.baslangic
+    
+    def as_dict(self):
+        """İşin o anki durumu (panel satırları bu sözlükle karşılaştırılır)."""
+        sure = self.sure
+        return {
+            'id': self.id,
+            'ad': self.ad,
+            'hedef': self.hedef,
+            'durum': self.durum,
+            'tamamlanan': self.tamamlanan,
+            'toplam': self.toplam,
+            'sure': round(sure, 1) if sure is not None else None,
+            'hata': self.hata,
+        }
+
+
+class ExportJobManager:
+    """İş kuyruğu ve iş thread'i."""
+    
+    def __init__(self, on_change=None, max_gecmis=20):
+        """
+        on_change(is_): işin durumu veya ilerlemesi değiştiğinde çağrılır
+        (genellikle iş thread'inden).
+        max_gecmis: listede tutulan bitmiş iş sayısı.
+        """
+        self.on_change = on_change
+        self.max_gecmis = max_gecmis
+        self._isler = []
+        self._sayac = itertools.count(1)
+        self._kuyruk = queue.Queue()
+        self._kilit = threading.Lock()
+        self._thread = None
+    
+    # ==================== ÇAĞIRAN TARAF ====================
+    
+    def submit(self, ad, fn, hedef=None):
+        """
+        İşi kuyruğa koyar ve ExportJob döndürür (beklemez).
+        fn(ilerleme, iptal): işi yapar. ilerleme(tamamlanan, toplam) ile
+        ilerlemeyi bildirir (toplam bilinmiyorsa None), iptal (threading.Event)
+        kurulunca durur ve None döndürür.
+        """
+        is_ = ExportJob(next(self._sayac), ad, fn, hedef)
+        with self._kilit:
+            self._isler.append(is_)
+            self._gecmisi_kirp()
+        self._baslat()
+        self._kuyruk.put(is_)
+        self._bildir(is_)
+        return is_
+    
+    def cancel(self, is_id):
+        """Bekleyen işi kuyruktan düşürür, süren işe durmasını söyler."""
+        is_ = next((i for i in self._isler if i.id == is_id), None)
+        if is_ is None or is_.bitti:
+            return
+        is_.iptal.set()
+        with self._kilit:
+            if is_.durum == BEKLIYOR:
+                is_.durum = IPTAL
+        if is_.durum == IPTAL:
+            self._bildir(is_)
+    
+    def jobs(self):
+        """İşler, en yenisi başta."""
+        with self._kilit:
+            return list(reversed(self._isler))
+    
+    def clear_finished(self):
+        """Bitmiş işleri listeden siler."""
+        with self._kilit:
+            self._isler = [i for i in self._isler if not i.bitti]
+    
+    def _gecmisi_kirp(self):
+        bitmis = [i for i in self._isler if i.bitti]
+        fazla = {i.id for i in bitmis[:max(len(bitmis) - self.max_gecmis, 0)]}
+        if fazla:
+            self._isler = [i for i in self._isler if i.id not in fazla]
+    
+    def _bildir(self, is_):
+        if self.on_change:
+            try:
+                self.on_change(is_)
+            except Exception as e:
+                print(f"İş bildirimi hatası: {e}")
+    
+    # ==================== İŞ THREAD'İ ====================
+    
+    def _baslat(self):
+        with self._kilit:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._calis, name='disa-aktarma', daemon=True
+                )
+                self._thread.start()
+    
+    def _calis(self):
+        while True:
+            is_ = self._kuyruk.get()
+            with self._kilit:
+                if is_.durum != BEKLIYOR:
+                    # Beklerken iptal edildi
+                    continue
+                is_.durum = CALISIYOR
+                is_.baslangic = time.monotonic()
+            self._bildir(is_)
+            self._is_calistir(is_)
+            with self._kilit:
+                self._gecmisi_kirp()
+            self._bildir(is_)
+    
+    def _is_calistir(self, is_):
+        son_bildirim = 0.0
+        
+        def ilerleme(tamamlanan, toplam=None):
+            nonlocal son_bildirim
+            is_.tamamlanan = tamamlanan
+            is_.toplam = toplam
+            simdi = time.monotonic()
+            if simdi - son_bildirim >= _BILDIRIM_ARALIGI:
+                son_bildirim = simdi
+                self._bildir(is_)
+        
+        try:
+            sonuc = is_._baglam.run(is_._fn, ilerleme, is_.iptal)
+            durum = IPTAL if sonuc is None and is_.iptal.is_set() else TAMAMLANDI
+            is_.sonuc = sonuc
+        except Exception as e:
+            is_.hata = str(e)
+            durum = HATA
+        is_.bitis = time.monotonic()
+        is_.durum = durum
@@ -94,17 +94,29 @@ def validate_grade(value):
         return None
 
 
+# Arama katlaması: Türkçe harfler ve I/İ/ı farkı yok sayılır
+_ARAMA_KATLAMA = str.maketrans('İIıÇŞĞÖÜçşğöü', 'iiicsgoucsgou')
+
+
+def fold_turkish(text):
+    """
+    Metni aramada karşılaştırmak için katlar.
+    'IŞIK', 'ışık' ve 'isik' aynı sonucu verir (str.lower() 'I'yı 'i' yapar, 'ı' yapmaz).
+    """
+    return (text or '').translate(_ARAMA_KATLAMA).lower()
+
+
 def filter_students_by_name(students, search_text):
-    """Öğrencileri isme göre filtreler."""
+    """Öğrencileri isme göre filtreler (Türkçe harf duyarsız)."""
     if not search_text:
         return students
     
-    search_lower = search_text.lower()
+    aranan = fold_turkish(search_text)
     return [
         s for s in students
-        if search_lower in s.get('ad', '').lower() or 
-           search_lower in s.get('soyad', '').lower() or
-           search_lower in s.get('okul_no', '').lower()
+        if aranan in fold_turkish(s.get('ad')) or 
+           aranan in fold_turkish(s.get('soyad')) or
+           aranan in fold_turkish(s.get('okul_no'))
     ]
 
 
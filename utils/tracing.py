@@ -0,0 +1,173 @@
+"""
+Zaman çizelgesi izleme (Chrome trace-event biçimi).
+OGRENCI_TAKIP_TRACE ortam değişkeni ayarlıysa iç içe span'ler kaydedilir ve
+uygulama kapanırken JSON olarak yazılır. Dosya chrome://tracing veya
+Perfetto (ui.perfetto.dev) ile çevrimdışı açılabilir.
+
+    OGRENCI_TAKIP_TRACE=1 python main.py            # ./ogrenci_takip_trace.json
+    OGRENCI_TAKIP_TRACE=/tmp/iz.json python main.py
+
+Kapalıyken span() boş bağlam, traced() ise fonksiyonun kendisini döndürür.
+"""
+import atexit
+import functools
+import inspect
+import json
+import multiprocessing
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+
+_ORTAM_DEGISKENI = 'OGRENCI_TAKIP_TRACE'
+_VARSAYILAN_DOSYA = 'ogrenci_takip_trace.json'
+
+
+class Tracer:
+    """Span'leri bellekte toplayıp trace-event JSON olarak yazan sınıf."""
+    
+    def __init__(self, path=None, max_olay=500000):
+        self.path = path
+        self.aktif = path is not None
+        self.max_olay = max_olay
+        self._olaylar = []
+        self._threadler = {}
+        self._kilit = threading.Lock()
+        self._pid = os.getpid()
+        self._baslangic = time.perf_counter()
+    
+    def _simdi_us(self):
+        return (time.perf_counter() - self._baslangic) * 1e6
+    
+    def _ekle(self, olay):
+        thread = threading.current_thread()
+        olay['pid'] = self._pid
+        olay['tid'] = thread.ident
+        with self._kilit:
+            if thread.ident not in self._threadler:
+                self._threadler[thread.ident] = thread.name
+            if len(self._olaylar) < self.max_olay:
+                self._olaylar.append(olay)
+    
+    # ==================== SPAN ====================
+    
+    def span(self, ad, kategori='app', **args):
+        """
+        Bloğun süresini bir span olarak kaydeder.
+            
+            with tracer.span('page.update', 'flet'):
+                page.update()
+        """
+        if not self.aktif:
+            return nullcontext()
+        return self._span(ad, kategori, args)
+    
+    @contextmanager
+    def _span(self, ad, kategori, args):
+        baslangic = self._simdi_us()
+        try:
+            yield
+        finally:
+            olay = {
+                'name': ad,
+                'cat': kategori,
+                'ph': 'X',
+                'ts': baslangic,
+                'dur': self._simdi_us() - baslangic,
+            }
+            if args:
+                olay['args'] = {k: str(v) for k, v in args.items()}
+            self._ekle(olay)
+    
+    def traced(self, ad=None, kategori='app'):
+        """
+        Fonksiyonu span ile saran dekoratör (coroutine'ler dahil).
+        Ad verilmezse Sınıf.metot kullanılır.
+        """
+        def dekorator(fn):
+            if not self.aktif:
+                return fn
+            span_adi = ad or fn.__qualname__
+            
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_sarici(*args, **kwargs):
+                    with self._span(span_adi, kategori, None):
+                        return await fn(*args, **kwargs)
+                return async_sarici
+            
+            @functools.wraps(fn)
+            def sarici(*args, **kwargs):
+                with self._span(span_adi, kategori, None):
+                    return fn(*args, **kwargs)
+            return sarici
+        return dekorator
+    
+    def instant(self, ad, kategori='app', **args):
+        """Süresiz bir olay (işaret) kaydeder."""
+        if self.aktif:
+            self._ekle({
+                'name': ad, 'cat': kategori, 'ph': 'i', 's': 't',
+                'ts': self._simdi_us(), 'args': {k: str(v) for k, v in args.items()},
+            })
+    
+    def trace_methods(self, nesne, kategori, onek=None):
+        """
+        Nesnenin public metotlarını örnek düzeyinde span ile sarar
+        (ör. DatabaseManager çağrıları 'db' kategorisinde görünür).
+        """
+        if not self.aktif:
+            return nesne
+        onek = onek or type(nesne).__name__
+        for ad, _ in inspect.getmembers(type(nesne), inspect.isfunction):
+            if ad.startswith('_'):
+                continue
+            if ad == 'undo_grubu':  # Bağlam yöneticisi; blok süresini ölçmez
+                continue
+            setattr(nesne, ad, self.traced(f'{onek}.{ad}', kategori)(getattr(nesne, ad)))
+        return nesne
+    
+    # ==================== KAYDETME ====================
+    
+    def save(self, path=None):
+        """Toplanan olayları trace-event JSON olarak yazar."""
+        path = path or self.path
+        if not path:
+            return None
+        
+        with self._kilit:
+            olaylar = list(self._olaylar)
+            threadler = dict(self._threadler)
+        
+        # Thread adları zaman çizelgesinde satır başlığı olarak görünür
+        meta = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': self._pid, 'tid': tid,
+             'args': {'name': ad}}
+            for tid, ad in threadler.items()
+        ]
+        meta.append({'name': 'process_name', 'ph': 'M', 'pid': self._pid,
+                     'args': {'name': 'Öğrenci Takip Pro'}})
+        
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': meta + olaylar, 'displayTimeUnit': 'ms'},
+                      f, ensure_ascii=False)
+        return path
+
+
+def _ortamdan_olustur():
+    deger = os.environ.get(_ORTAM_DEGISKENI, '').strip()
+    # Alt süreçler (ör. PDF işçileri) ortam değişkenini devralır; kendi
+    # dosyalarını yazarlarsa ana sürecin izini çıkışta ezerler. spawn ile
+    # başlayan süreç ana modülü yüklerken parent_process() henüz None'dır,
+    # süreç adı ise ayarlanmıştır.
+    if not deger or deger == '0' or multiprocessing.current_process().name != 'MainProcess':
+        return Tracer()
+    path = os.path.abspath(_VARSAYILAN_DOSYA if deger == '1' else deger)
+    izleyici = Tracer(path)
+    atexit.register(izleyici.save)
+    return izleyici
+
+
+# Uygulama genelinde tek örnek; ortam değişkeni modül yüklenirken okunur
+tracer = _ortamdan_olustur()
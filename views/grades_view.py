@@ -3,6 +3,7 @@ Not ve kategori yönetimi görünümü.
 """
 import flet as ft
 from components.grade_table import GradeTable
+from utils.tracing import tracer
 
 
 class GradesView(ft.Container):
@@ -14,6 +15,7 @@ class GradesView(ft.Container):
         self.on_update = on_update
         self.selected_sinif = None
         self.selected_kategori = None
+        self.grade_table = None  # Açık not çizelgesi
         self._build_content()
     
     def _build_content(self):
@@ -108,10 +110,14 @@ class GradesView(ft.Container):
         self.expand = True
         self.refresh()  # did_mount yerine doğrudan çağır
     
+    @tracer.traced(kategori='ui')
     def refresh(self):
         """Görünümü yeniler."""
         self._update_sinif_dropdown()
         self._load_kategoriler()
+        # Açık çizelge baştan kurulmaz; yalnızca değişen hücreler güncellenir
+        if self.grade_table:
+            self.grade_table.refresh()
     
     def _update_sinif_dropdown(self):
         """Sınıf dropdown'ını günceller."""
@@ -184,6 +190,7 @@ class GradesView(ft.Container):
         self._load_kategoriler()
         self._load_basliklar()
     
+    @tracer.traced(kategori='render')
     def _load_basliklar(self):
         """Not başlıklarını yükler."""
         if not self.selected_sinif or not self.selected_kategori:
@@ -291,6 +298,11 @@ class GradesView(ft.Container):
                 on_save=self._on_grades_saved
             )
         
+        # Önceki çizelgenin bekleyen otomatik kayıtları yazılsın
+        if self.grade_table:
+            self.grade_table.flush()
+        self.grade_table = grade_table
+        
         # Alignment'ı sıfırla ve içeriği değiştir
         self.grade_entry_container.alignment = None
         self.grade_entry_container.content = ft.Column([
@@ -313,6 +325,9 @@ class GradesView(ft.Container):
     
     def _close_grade_entry(self, e=None):
         """Not girişi ekranını kapatır."""
+        if self.grade_table:
+            self.grade_table.flush()
+        self.grade_table = None
         self.grade_entry_container.content = ft.Column([
             ft.Icon(ft.icons.ASSIGNMENT_OUTLINED, size=60, color=ft.colors.GREY_400),
             ft.Text("Not başlığı seçin", size=16, color=ft.colors.GREY_500),
@@ -433,13 +448,15 @@ class GradesView(ft.Container):
                     # Tüm sınıflara ekle
                     siniflar = self.db.get_all_siniflar()
                     count = 0
-                    for sinif in siniflar:
-                        self.db.add_not_basligi(
-                            baslik_field.value,
-                            self.selected_kategori,
-                            sinif['id']
-                        )
-                        count += 1
+                    # Tek işlemde kaydet, tek adımda geri alınsın
+                    with self.db.undo_grubu():
+                        for sinif in siniflar:
+                            self.db.add_not_basligi(
+                                baslik_field.value,
+                                self.selected_kategori,
+                                sinif['id']
+                            )
+                            count += 1
                     dialog.open = False
                     self._load_basliklar()
                     self.page.snack_bar = ft.SnackBar(
@@ -3,6 +3,7 @@ Rastgele öğrenci seçici görünümü.
 """
 import flet as ft
 from components.wheel_picker import WheelPicker
+from utils.tracing import tracer
 
 
 class RandomView(ft.Container):
@@ -86,6 +87,7 @@ class RandomView(ft.Container):
         self.wheel_container.alignment = ft.alignment.center
         self.update()
     
+    @tracer.traced(kategori='ui')
     def refresh(self):
         """Görünümü yeniler."""
         siniflar = self.db.get_all_siniflar()
@@ -1,17 +1,24 @@
 """
 Raporlama ve görsel analiz görünümü.
 """
+import asyncio
 import flet as ft
 from components.charts import ChartBuilder
+from components.virtual_list import VirtualList
+from database import instrumentation
+from utils.tracing import tracer
 
 
 class ReportsView(ft.Container):
     """Raporlar ve grafikler."""
     
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, async_db=None):
         super().__init__()
         self.db = db_manager
+        self.async_db = async_db
         self.selected_sinif = None
+        self._son_rapor = None  # Sıralama için son yüklenen veri
+        self._yukleme_no = 0
         self.chart_builder = ChartBuilder(dark_mode=False)
         self.sort_column = "name"
         self.sort_descending = False
@@ -45,15 +52,22 @@ class ReportsView(ft.Container):
             border_radius=ft.border_radius.only(top_left=8, top_right=8),
         )
 
-        # Rapor listesi (scrollable değil, ana sayfa scroll olacak)
-        self.report_list = ft.Column(spacing=0)
+        # Rapor listesi (sanal: kendi içinde kayar, yalnızca görünen satırlar çizilir)
+        self.report_list = VirtualList(
+            self._rapor_satiri,
+            self._rapor_satirini_doldur,
+            anahtar=lambda item: item['ogrenci']['id'],
+            satir_yuksekligi=52,
+            expand=True,
+        )
         
-        # Tablo container
+        # Tablo container (sanal liste için sabit yükseklik)
         self.table_container = ft.Container(
             content=ft.Column([
                 self.list_header,
                 self.report_list
             ], spacing=0),
+            height=600,
             border_radius=8,
             border=ft.border.all(1, ft.colors.OUTLINE_VARIANT),
             bgcolor=ft.colors.SURFACE,
@@ -62,6 +76,12 @@ class ReportsView(ft.Container):
         # Özet kartları
         self.summary_row = ft.Row([], spacing=15, scroll=ft.ScrollMode.AUTO)
         
+        # Yükleniyor göstergesi
+        self.loading_indicator = ft.Row([
+            ft.ProgressRing(width=16, height=16, stroke_width=2),
+            ft.Text("Rapor hazırlanıyor...", size=13, color=ft.colors.ON_SURFACE_VARIANT),
+        ], spacing=8, visible=False)
+        
         # Grafik alanları
         self.distribution_chart = ft.Container(
             content=ft.Text("Grafik yükleniyor...", color=ft.colors.ON_SURFACE_VARIANT),
@@ -85,6 +105,7 @@ class ReportsView(ft.Container):
             # Üst araç çubuğu
             ft.Row([
                 self.sinif_dropdown,
+                self.loading_indicator,
                 ft.Container(expand=True),
                 ft.ElevatedButton(
                     "Yenile",
@@ -116,12 +137,11 @@ class ReportsView(ft.Container):
         self.expand = True
         self.refresh()  # did_mount yerine doğrudan çağır
     
+    @tracer.traced(kategori='ui')
     def refresh(self):
         """Raporları yeniler."""
         self._update_sinif_dropdown()
-        if self.selected_sinif:
-            self._load_report()
-            self._load_charts()
+        self._load()
     
     def _update_sinif_dropdown(self):
         """Sınıf dropdown'ını günceller."""
@@ -141,37 +161,96 @@ class ReportsView(ft.Container):
                 self.selected_sinif = "all"
             else:
                 self.selected_sinif = int(e.control.value)
+            self._load()
+    
+    def _load(self):
+        """Rapor ve grafikleri yükler; sayfa hazırsa UI'ı bloklamadan arka planda."""
+        if not self.selected_sinif:
+            return
+        if self.async_db and self.page:
+            self.page.run_task(self._load_async)
+        else:
             self._load_report()
             self._load_charts()
     
+    @tracer.traced(kategori='ui')
+    async def _load_async(self):
+        """Verileri okuma havuzunda paralel çeker, sonra ekranı çizer."""
+        self._yukleme_no += 1
+        yukleme_no = self._yukleme_no
+        sinif_id = None if self.selected_sinif == "all" else self.selected_sinif
+        
+        self.loading_indicator.visible = True
+        self.loading_indicator.update()
+        try:
+            with instrumentation.action('_load_report'):
+                ogrenciler, kategoriler, ortalamalar, notlar, siniflar = await asyncio.gather(
+                    self.async_db.get_all_ogrenciler(sinif_id, 'ad'),
+                    self.async_db.get_all_kategoriler(),
+                    self.async_db.get_ortalama_tablosu(sinif_id),
+                    self.async_db.get_sinif_not_dagilimi(sinif_id),
+                    self.async_db.get_all_siniflar(),
+                )
+                kategori_ortalamalari = await asyncio.gather(*[
+                    self.async_db.get_sinif_kategori_ortalama(sinif_id, k['id'])
+                    for k in kategoriler
+                ])
+        except Exception as err:
+            if yukleme_no == self._yukleme_no and self.page:
+                self.page.snack_bar = ft.SnackBar(
+                    content=ft.Text(f"Rapor yüklenemedi: {err}"),
+                    bgcolor=ft.colors.RED
+                )
+                self.page.snack_bar.open = True
+                self.page.update()
+            return
+        finally:
+            if yukleme_no == self._yukleme_no:
+                self.loading_indicator.visible = False
+                self.loading_indicator.update()
+        
+        # Bu arada başka bir sınıf seçildiyse eski sonucu çizme
+        if yukleme_no != self._yukleme_no:
+            return
+        
+        self._render_report(ogrenciler, kategoriler, ortalamalar)
+        kategori_data = {
+            k['ad']: ort for k, ort in zip(kategoriler, kategori_ortalamalari) if ort
+        }
+        self._render_charts(notlar, self._get_sinif_adi(sinif_id, siniflar), kategori_data)
+    
+    @tracer.traced(kategori='ui')
     def _load_report(self):
         """Rapor tablosunu yükler."""
         if not self.selected_sinif:
             return
 
-        if self.selected_sinif == "all":
-            ogrenciler = self.db.get_all_ogrenciler(None)
-        else:
-            ogrenciler = self.db.get_all_ogrenciler(self.selected_sinif)
-
-        kategoriler = self.db.get_all_kategoriler()
+        sinif_id = None if self.selected_sinif == "all" else self.selected_sinif
+        with instrumentation.action('_load_report'):
+            self._render_report(
+                self.db.get_all_ogrenciler(sinif_id, 'ad'),
+                self.db.get_all_kategoriler(),
+                self.db.get_ortalama_tablosu(sinif_id),
+            )
+    
+    @tracer.traced(kategori='render')
+    def _render_report(self, ogrenciler, kategoriler, ortalamalar):
+        """Rapor tablosunu ve özet kartlarını verilen veriden çizer."""
+        self._son_rapor = (ogrenciler, kategoriler, ortalamalar)
         
         # Sıralama için veri hazırlığı
         report_data = []
         for ogrenci in ogrenciler:
-             data = {'ogrenci': ogrenci, 'genel_ort': self.db.get_ogrenci_genel_ortalama(ogrenci['id'])}
+             ortalama = ortalamalar.get(ogrenci['id'], {'kategoriler': {}, 'genel': None})
+             data = {'ogrenci': ogrenci, 'genel_ort': ortalama['genel']}
              # Kategori ortalamaları
-             cat_avgs = []
-             for i, kategori in enumerate(kategoriler[:3]):
-                 cat_avgs.append(self.db.get_ogrenci_kategori_ortalama(ogrenci['id'], kategori['id']))
-             data['cat_avgs'] = cat_avgs
+             data['cat_avgs'] = [ortalama['kategoriler'].get(k['id']) for k in kategoriler[:3]]
              report_data.append(data)
              
-        # Sıralama fonksiyonu
+        # Sıralama fonksiyonu. Öğrenciler SQL'den ad, soyad sırasıyla (Türkçe) gelir;
+        # isme göre sıralamada bu sıra korunur, yalnızca yön çevrilir.
         def get_sort_key(item):
-            if self.sort_column == "name":
-                return item['ogrenci']['ad'].lower() + " " + item['ogrenci']['soyad'].lower()
-            elif self.sort_column == "general":
+            if self.sort_column == "general":
                 return item['genel_ort'] if item['genel_ort'] is not None else -1
             elif self.sort_column.startswith("cat_"):
                 idx = int(self.sort_column.split("_")[1])
@@ -180,7 +259,11 @@ class ReportsView(ft.Container):
                     return val if val is not None else -1
             return 0
             
-        report_data.sort(key=get_sort_key, reverse=self.sort_descending)
+        if self.sort_column == "name":
+            if self.sort_descending:
+                report_data.reverse()
+        else:
+            report_data.sort(key=get_sort_key, reverse=self.sort_descending)
             
         # Özet hesapla
         toplam = len(ogrenciler)
@@ -188,67 +271,17 @@ class ReportsView(ft.Container):
         basarisiz = 0
         ortalamalar = []
         
-        self.report_list.controls = []
-        for i, item in enumerate(report_data, 1):
-            ogrenci = item['ogrenci']
+        for item in report_data:
             genel_ort = item['genel_ort']
-            cat_avgs = item['cat_avgs']
-            
             if genel_ort:
                 ortalamalar.append(genel_ort)
                 if genel_ort >= 50:
                     basarili += 1
                 else:
                     basarisiz += 1
-            
-            # Kategori ortalamaları hücreleri
-            row_cells = [
-                ft.Container(ft.Text(str(i)), width=40),
-                ft.Container(ft.Column([
-                    ft.Text(f"{ogrenci['ad']} {ogrenci['soyad']}"),
-                    ft.Text(ogrenci.get('sinif_adi', ''), size=10, color=ft.colors.OUTLINE)
-                ], spacing=0), expand=True),
-            ]
-            
-            # 3 kategori için döngü (zaten cat_avgs'da var)
-            for j in range(3):
-                ort = cat_avgs[j] if j < len(cat_avgs) else None
-                row_cells.append(ft.Container(
-                    ft.Container(
-                        content=ft.Text(f"{ort:.1f}" if ort else "-", size=13, weight=ft.FontWeight.BOLD if ort else None, color=ft.colors.WHITE if ort else None),
-                        bgcolor=self._get_color(ort) if ort else None,
-                        border_radius=4,
-                        padding=ft.padding.symmetric(horizontal=8, vertical=2),
-                        alignment=ft.alignment.center,
-                    ),
-                    width=80,
-                    alignment=ft.alignment.center,
-                ))
-            
-            # Genel ortalama
-            row_cells.append(ft.Container(
-                ft.Container(
-                    content=ft.Text(
-                        f"{genel_ort:.1f}" if genel_ort else "-",
-                        weight=ft.FontWeight.BOLD,
-                        color=ft.colors.WHITE if genel_ort else None,
-                    ),
-                    bgcolor=self._get_color(genel_ort) if genel_ort else None,
-                    border_radius=4,
-                    padding=ft.padding.symmetric(horizontal=10, vertical=3),
-                ),
-                width=80,
-                alignment=ft.alignment.center,
-            ))
-            
-            # Row ekle
-            item = ft.Container(
-                content=ft.Row(row_cells, alignment=ft.MainAxisAlignment.START),
-                padding=ft.padding.symmetric(horizontal=15, vertical=8),
-                bgcolor=ft.colors.SURFACE_VARIANT if i % 2 == 0 else None,
-                border=ft.border.only(bottom=ft.border.BorderSide(1, ft.colors.OUTLINE_VARIANT)),
-            )
-            self.report_list.controls.append(item)
+        
+        # Satırlar yalnızca görünen pencere için oluşturulur
+        self.report_list.set_items(report_data)
         
         # Özet kartlarını güncelle
         sinif_ort = sum(ortalamalar) / len(ortalamalar) if ortalamalar else 0
@@ -260,10 +293,70 @@ class ReportsView(ft.Container):
             self._create_summary_card("Sınıf Ortalaması", f"{sinif_ort:.1f}", ft.icons.ANALYTICS, ft.colors.PURPLE),
         ]
         
-        self.report_list.update()
         self.summary_row.update()
         self.update()
     
+    def _rapor_satiri(self):
+        """Boş rapor satırı; hücreler _rapor_satirini_doldur ile ayarlanır."""
+        hucreler = {
+            'sira': ft.Text(),
+            'ad': ft.Text(),
+            'sinif': ft.Text(size=10, color=ft.colors.OUTLINE),
+            'kategoriler': [],
+        }
+        row_cells = [
+            ft.Container(hucreler['sira'], width=40),
+            ft.Container(ft.Column([hucreler['ad'], hucreler['sinif']], spacing=0), expand=True),
+        ]
+        
+        # 3 kategori ortalaması ve genel ortalama
+        for j in range(4):
+            metin = ft.Text(weight=ft.FontWeight.BOLD)
+            kutu = ft.Container(
+                content=metin,
+                border_radius=4,
+                padding=ft.padding.symmetric(horizontal=8, vertical=2),
+                alignment=ft.alignment.center,
+            )
+            if j < 3:
+                metin.size = 13
+                hucreler['kategoriler'].append((metin, kutu))
+            else:
+                kutu.padding = ft.padding.symmetric(horizontal=10, vertical=3)
+                hucreler['genel'] = (metin, kutu)
+            row_cells.append(ft.Container(kutu, width=80, alignment=ft.alignment.center))
+        
+        return ft.Container(
+            content=ft.Row(row_cells, alignment=ft.MainAxisAlignment.START),
+            padding=ft.padding.symmetric(horizontal=15, vertical=8),
+            border=ft.border.only(bottom=ft.border.BorderSide(1, ft.colors.OUTLINE_VARIANT)),
+            data=hucreler,
+        )
+    
+    def _rapor_satirini_doldur(self, satir, sira, item):
+        """Rapor satırını öğeye göre ayarlar (sira 0 tabanlı)."""
+        hucreler = satir.data
+        ogrenci = item['ogrenci']
+        cat_avgs = item['cat_avgs']
+        
+        hucreler['sira'].value = str(sira + 1)
+        hucreler['ad'].value = f"{ogrenci['ad']} {ogrenci['soyad']}"
+        hucreler['sinif'].value = ogrenci.get('sinif_adi') or ''
+        
+        for j, (metin, kutu) in enumerate(hucreler['kategoriler']):
+            ort = cat_avgs[j] if j < len(cat_avgs) else None
+            metin.value = f"{ort:.1f}" if ort else "-"
+            metin.color = ft.colors.WHITE if ort else None
+            metin.weight = ft.FontWeight.BOLD if ort else None
+            kutu.bgcolor = self._get_color(ort) if ort else None
+        
+        genel_ort = item['genel_ort']
+        metin, kutu = hucreler['genel']
+        metin.value = f"{genel_ort:.1f}" if genel_ort else "-"
+        metin.color = ft.colors.WHITE if genel_ort else None
+        kutu.bgcolor = self._get_color(genel_ort) if genel_ort else None
+        satir.bgcolor = ft.colors.SURFACE_VARIANT if sira % 2 == 1 else None
+    
     def _create_summary_card(self, title, value, icon, color):
         """Özet kartı oluşturur."""
         return ft.Container(
@@ -280,19 +373,13 @@ class ReportsView(ft.Container):
             width=200,
         )
     
+    @tracer.traced(kategori='ui')
     def _load_charts(self):
         """Grafikleri yükler."""
         # Not dağılımı grafiği
         sinif_id = None if self.selected_sinif == "all" else self.selected_sinif
         notlar = self.db.get_sinif_not_dagilimi(sinif_id)
-        
-        sinif_adi = "Tüm Sınıflar"
-        if sinif_id:
-            siniflar = self.db.get_all_siniflar()
-            sinif = next((s for s in siniflar if s['id'] == sinif_id), None)
-            sinif_adi = sinif['ad'] if sinif else ""
-        
-        self.distribution_chart.content = self.chart_builder.create_class_distribution_chart(notlar, sinif_adi)
+        sinif_adi = self._get_sinif_adi(sinif_id, self.db.get_all_siniflar())
         
         # Kategori ortalamaları grafiği
         kategoriler = self.db.get_all_kategoriler()
@@ -302,8 +389,20 @@ class ReportsView(ft.Container):
             if ort:
                 kategori_data[kategori['ad']] = ort
         
+        self._render_charts(notlar, sinif_adi, kategori_data)
+    
+    def _get_sinif_adi(self, sinif_id, siniflar):
+        """Grafik başlığı için sınıf adını döndürür."""
+        if not sinif_id:
+            return "Tüm Sınıflar"
+        sinif = next((s for s in siniflar if s['id'] == sinif_id), None)
+        return sinif['ad'] if sinif else ""
+    
+    @tracer.traced(kategori='render')
+    def _render_charts(self, notlar, sinif_adi, kategori_data):
+        """Grafikleri verilen veriden çizer."""
+        self.distribution_chart.content = self.chart_builder.create_class_distribution_chart(notlar, sinif_adi)
         self.category_chart.content = self.chart_builder.create_category_comparison_chart(kategori_data, sinif_adi)
-        
         self.update()
     
     def _get_color(self, value):
@@ -361,4 +460,9 @@ class ReportsView(ft.Container):
         self.list_header.content.controls[5].content = self._create_header_button("Genel", "general", width=80)
         
         self.list_header.update()
-        self._load_report()
+        
+        # Veri değişmedi, yalnızca yeniden sırala
+        if self._son_rapor:
+            self._render_report(*self._son_rapor)
+        else:
+            self._load_report()
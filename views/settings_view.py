@@ -1,22 +1,56 @@
 """
 Ayarlar görünümü.
 """
+import os
+import sys
+import threading
 import flet as ft
+from components.row_reconciler import RowReconciler
+from database import instrumentation
+from database.models import get_read_connection
 from utils.export import ExportManager
+from utils.export_jobs import ExportJobManager, BEKLIYOR, CALISIYOR, TAMAMLANDI, HATA, IPTAL
 from utils.backup import BackupManager
+from utils.tracing import tracer
 
 
 class SettingsView(ft.Container):
     """Ayarlar ve veri yönetimi."""
     
-    def __init__(self, db_manager, on_theme_change=None, on_data_change=None):
+    # Dışa aktarma türü -> iş paneli adı
+    _IS_ADLARI = {
+        'excel_list': "Excel - Öğrenci Listesi",
+        'excel_grades': "Excel - Not Çizelgesi",
+        'pdf_report': "PDF - Sınıf Raporu",
+        'karne_zip': "PDF - Karneler (ZIP)",
+        'karne_pdf': "PDF - Karneler (Tek Dosya)",
+        'backup_json': "Yedek (JSON)",
+        'backup_csv': "Yedek (CSV)",
+        'diagnostics_json': "Tanılama Raporu",
+        'maintenance': "Veritabanı Bakımı",
+    }
+    
+    # İş durumu -> (ikon, renk, etiket)
+    _IS_DURUMLARI = {
+        BEKLIYOR: (ft.icons.SCHEDULE, ft.colors.GREY_600, "Sırada"),
+        CALISIYOR: (ft.icons.SYNC, ft.colors.BLUE, "Çalışıyor"),
+        TAMAMLANDI: (ft.icons.CHECK_CIRCLE, ft.colors.GREEN, "Tamamlandı"),
+        HATA: (ft.icons.ERROR, ft.colors.RED, "Hata"),
+        IPTAL: (ft.icons.CANCEL, ft.colors.ORANGE, "İptal edildi"),
+    }
+    
+    def __init__(self, db_manager, on_theme_change=None, on_data_change=None, maintenance=None):
         super().__init__()
         self.db = db_manager
         self.on_theme_change = on_theme_change
         self.on_data_change = on_data_change
+        self.maintenance = maintenance
         self.export_manager = ExportManager(db_manager)
-        self.backup_manager = BackupManager()
+        self.backup_manager = BackupManager(db_manager)
         self.dark_mode = False
+        # Dışa aktarmalar ve yedekler arka planda sırayla çalışır
+        self.jobs = ExportJobManager(on_change=self._on_job_change)
+        self._bakim_isi = None
         self._build_content()
     
     def _build_content(self):
@@ -43,6 +77,23 @@ class SettingsView(ft.Container):
             options=sinif_options,
         )
         
+        # Dışa aktarma işleri paneli
+        self._job_rows = RowReconciler(self._job_satiri, self._job_satirini_doldur)
+        self._jobs_kilit = threading.Lock()  # Panel hem UI hem iş thread'inden güncellenir
+        self.jobs_empty_text = ft.Text("Henüz dışa aktarma yok.", size=13, color=ft.colors.GREY_700)
+        self.jobs_column = ft.Column([self.jobs_empty_text], spacing=4)
+        
+        # Veritabanı dosya bilgisi
+        self.db_info_text = ft.Text(self._get_db_info(), size=13, color=ft.colors.GREY_700)
+        
+        # Sorgu ölçümü (tanılama)
+        self.diagnostics_switch = ft.Switch(
+            label="Sorgu ölçümü",
+            value=instrumentation.aktif,
+            on_change=self._on_diagnostics_toggle,
+        )
+        self.diagnostics_column = ft.Column(self._build_diagnostics(), spacing=4)
+        
         self.content = ft.Column([            
             # Dışa aktarma
             self._create_section(
@@ -71,12 +122,39 @@ class SettingsView(ft.Container):
                             icon=ft.icons.PICTURE_AS_PDF,
                             on_click=lambda e: self._export_pdf_report(),
                         ),
+                        ft.ElevatedButton(
+                            "PDF - Karneler (ZIP)",
+                            icon=ft.icons.FOLDER_ZIP,
+                            on_click=lambda e: self._export_karneler(birlestir=False),
+                        ),
+                        ft.ElevatedButton(
+                            "PDF - Karneler (Tek Dosya)",
+                            icon=ft.icons.LIBRARY_BOOKS,
+                            on_click=lambda e: self._export_karneler(birlestir=True),
+                        ),
                     ], wrap=True),
                 ]
             ),
             
             ft.Divider(height=30),
             
+            # Arka plan işleri
+            self._create_section(
+                "Dışa Aktarma İşleri",
+                ft.icons.PENDING_ACTIONS,
+                [
+                    self.jobs_column,
+                    ft.Container(height=10),
+                    ft.ElevatedButton(
+                        "Bitenleri Temizle",
+                        icon=ft.icons.CLEAR_ALL,
+                        on_click=self._clear_finished_jobs,
+                    ),
+                ]
+            ),
+            
+            ft.Divider(height=30),
+            
             # Yedekleme
             self._create_section(
                 "Yedekleme ve Geri Yükleme",
@@ -136,6 +214,60 @@ class SettingsView(ft.Container):
                 ]
             ),
             
+            ft.Divider(height=30),
+            
+            # Veritabanı bakımı
+            self._create_section(
+                "Veritabanı Bakımı",
+                ft.icons.BUILD,
+                [
+                    self.db_info_text,
+                    ft.Container(height=10),
+                    ft.ElevatedButton(
+                        "Şimdi Bakım Yap",
+                        icon=ft.icons.CLEANING_SERVICES,
+                        on_click=self._run_maintenance,
+                        disabled=self.maintenance is None,
+                    ),
+                ]
+            ),
+            
+            ft.Divider(height=30),
+            
+            # Tanılama
+            self._create_section(
+                "Tanılama",
+                ft.icons.SPEED,
+                [
+                    ft.Text(
+                        "Açıkken sorgu sayısı, süre ve satır sayısı kaydedilir; "
+                        f"{instrumentation.yavas_esik * 1000:.0f} ms üzeri sorgular planlarıyla saklanır.",
+                        color=ft.colors.GREY_600,
+                        size=13,
+                    ),
+                    self.diagnostics_switch,
+                    self.diagnostics_column,
+                    ft.Container(height=10),
+                    ft.Row([
+                        ft.ElevatedButton(
+                            "Yenile",
+                            icon=ft.icons.REFRESH,
+                            on_click=lambda e: self._refresh_diagnostics(),
+                        ),
+                        ft.ElevatedButton(
+                            "Sıfırla",
+                            icon=ft.icons.DELETE_SWEEP,
+                            on_click=self._reset_diagnostics,
+                        ),
+                        ft.ElevatedButton(
+                            "JSON Dışa Aktar",
+                            icon=ft.icons.DATA_OBJECT,
+                            on_click=lambda e: self._export_diagnostics(),
+                        ),
+                    ], wrap=True),
+                ]
+            ),
+            
             # Hidden file pickers
             self.save_file_picker,
             self.open_file_picker,
@@ -164,6 +296,11 @@ class SettingsView(ft.Container):
         if self.on_theme_change:
             self.on_theme_change(self.dark_mode)
     
+    def _get_selected_sinif_name(self):
+        """Seçili sınıfın dropdown'daki adı."""
+        secili = next((o for o in self.sinif_dropdown.options if o.key == self.sinif_dropdown.value), None)
+        return secili.text if secili else "-"
+    
     def _get_selected_sinif(self):
         """Seçili sınıf ID'sini döndürür. Tümü için 'all' döner."""
         if self.sinif_dropdown.value:
@@ -217,6 +354,26 @@ class SettingsView(ft.Container):
             allowed_extensions=["pdf"],
         )
     
+    def _export_karneler(self, birlestir):
+        """Seçili sınıfın (veya tüm okulun) karnelerini toplu oluşturur."""
+        sinif_id = self._get_selected_sinif()
+        if not sinif_id:
+            self._show_error("Önce bir sınıf seçin!")
+            return
+        
+        if birlestir:
+            self._current_export = 'karne_pdf'
+            file_name, uzanti = "karneler.pdf", "pdf"
+        else:
+            self._current_export = 'karne_zip'
+            file_name, uzanti = "karneler.zip", "zip"
+        self.save_file_picker.save_file(
+            dialog_title="Karneleri Kaydet",
+            file_name=file_name,
+            file_type=ft.FilePickerFileType.CUSTOM,
+            allowed_extensions=[uzanti],
+        )
+    
     def _on_save_file(self, e):
         """Dosya kaydetme sonucu."""
         if not e.path:
@@ -227,41 +384,137 @@ class SettingsView(ft.Container):
         # Export manager None kabul eder tümü için
         export_sinif_id = None if sinif_id == "all" else sinif_id
         
-        try:
-            if self._current_export == 'excel_list':
-                self.export_manager.export_sinif_listesi_excel(export_sinif_id, path)
-            elif self._current_export == 'excel_grades':
-                self.export_manager.export_not_cizelgesi_excel(export_sinif_id, path)
-            elif self._current_export == 'pdf_report':
-                self.export_manager.export_sinif_raporu_pdf(export_sinif_id, path)
-            elif self._current_export == 'backup_json':
-                self.backup_manager.create_backup_json(path)
-            
-            def open_file(e):
-                import os
-                import sys
-                try:
-                    # Windows-only: os.startfile
-                    if sys.platform == 'win32':
-                        os.startfile(path)
-                    else:
-                        # Android/Linux/Mac - dosya açma desteklenmiyor
-                        pass
-                except Exception as err:
-                    print(f"Dosya açma hatası: {err}")
-
-            # Sadece Windows'ta "Dosyayı Aç" butonu göster
-            import sys
-            if sys.platform == 'win32':
-                self._show_success(
-                    f"Dosya kaydedildi: {path}",
-                    action_text="DOSYAYI AÇ",
-                    on_action=open_file
-                )
+        self._submit_export(self._current_export, export_sinif_id, path)
+    
+    def _submit_export(self, tur, export_sinif_id, path):
+        """Dışa aktarmayı iş kuyruğuna koyar; dosya seçici geri çağrısı beklemeden döner."""
+        ad = self._IS_ADLARI[tur]
+        if tur not in ('backup_json', 'backup_csv', 'diagnostics_json'):
+            ad = f"{ad} ({self._get_selected_sinif_name()})"
+        self.jobs.submit(
+            ad,
+            lambda ilerleme, iptal: self._run_export(tur, export_sinif_id, path, ilerleme, iptal),
+            path,
+        )
+    
+    def _run_export(self, tur, export_sinif_id, path, ilerleme=None, iptal=None):
+        """
+        Seçilen dışa aktarmayı yapar (iş thread'inde çalışır, UI'a dokunmaz).
+        Dosya yolunu, iptal edildiyse None döndürür.
+        """
+        if tur == 'excel_list':
+            return self.export_manager.export_sinif_listesi_excel(export_sinif_id, path, ilerleme, iptal)
+        elif tur == 'excel_grades':
+            return self.export_manager.export_not_cizelgesi_excel(export_sinif_id, path, ilerleme, iptal)
+        elif tur == 'pdf_report':
+            return self.export_manager.export_sinif_raporu_pdf(export_sinif_id, path, ilerleme, iptal)
+        elif tur in ('karne_zip', 'karne_pdf'):
+            return self.export_manager.export_karneler(
+                export_sinif_id, path, birlestir=(tur == 'karne_pdf'), ilerleme=ilerleme, iptal=iptal,
+            )
+        elif tur == 'backup_json':
+            return self.backup_manager.create_backup_json(path, ilerleme)
+        elif tur == 'backup_csv':
+            return self.backup_manager.create_backup_csv(path, ilerleme)
+        elif tur == 'diagnostics_json':
+            instrumentation.export_json(path, get_read_connection())
+            return path
+    
+    # ==================== İŞ PANELİ ====================
+    
+    def _on_job_change(self, is_):
+        """İş değiştiğinde paneli günceller, biten iş için mesaj gösterir (iş thread'inden de çağrılır)."""
+        self._refresh_jobs()
+        if is_.durum == TAMAMLANDI:
+            if is_ is self._bakim_isi:
+                self._show_maintenance_result(is_.sonuc)
             else:
-                self._show_success(f"Dosya kaydedildi: {path}")
-        except Exception as err:
-            self._show_error(f"Hata: {str(err)}")
+                self._show_saved(is_.hedef)
+        elif is_.durum == HATA:
+            self._show_error(f"{is_.ad}: {is_.hata}")
+    
+    def _refresh_jobs(self):
+        with self._jobs_kilit:
+            isler = [is_.as_dict() for is_ in self.jobs.jobs()]
+            self.jobs_column.controls = self._job_rows.reconcile(isler) or [self.jobs_empty_text]
+            if self.jobs_column.page:
+                self.jobs_column.update()
+    
+    def _clear_finished_jobs(self, e):
+        self.jobs.clear_finished()
+        self._refresh_jobs()
+    
+    def _job_satiri(self):
+        """Boş iş satırı; hücreler _job_satirini_doldur ile ayarlanır."""
+        hucreler = {
+            'ikon': ft.Icon(size=20),
+            'ad': ft.Text(size=14, weight=ft.FontWeight.W_500),
+            'detay': ft.Text(size=12, color=ft.colors.GREY_700),
+            'cubuk': ft.ProgressBar(width=160),
+            'iptal': ft.IconButton(ft.icons.STOP_CIRCLE, tooltip="İptal", icon_size=18),
+        }
+        satir = ft.Row([
+            hucreler['ikon'],
+            ft.Column([hucreler['ad'], hucreler['detay']], spacing=0, expand=True),
+            hucreler['cubuk'],
+            hucreler['iptal'],
+        ], vertical_alignment=ft.CrossAxisAlignment.CENTER)
+        satir.data = hucreler
+        return satir
+    
+    def _job_satirini_doldur(self, satir, sira, is_):
+        """Satırı işin durumuna göre ayarlar."""
+        hucreler = satir.data
+        ikon, renk, etiket = self._IS_DURUMLARI[is_['durum']]
+        tamamlanan, toplam = is_['tamamlanan'], is_['toplam']
+        
+        detay = [etiket]
+        if toplam:
+            detay.append(f"{tamamlanan} / {toplam}")
+        elif tamamlanan:
+            detay.append(str(tamamlanan))
+        if is_['sure'] is not None:
+            detay.append(f"{is_['sure']:.1f} sn")
+        if is_['hata']:
+            detay.append(is_['hata'])
+        
+        hucreler['ikon'].name = ikon
+        hucreler['ikon'].color = renk
+        hucreler['ad'].value = is_['ad']
+        hucreler['detay'].value = " · ".join(detay)
+        
+        surmekte = is_['durum'] in (BEKLIYOR, CALISIYOR)
+        hucreler['cubuk'].visible = surmekte
+        if is_['durum'] == BEKLIYOR:
+            hucreler['cubuk'].value = 0
+        else:
+            # Toplam bilinmiyorsa belirsiz çubuk
+            hucreler['cubuk'].value = tamamlanan / toplam if toplam else None
+        hucreler['iptal'].visible = surmekte
+        hucreler['iptal'].on_click = lambda e, is_id=is_['id']: self.jobs.cancel(is_id)
+    
+    def _show_saved(self, path):
+        """Kaydedilen dosya için başarı mesajı gösterir."""
+        def open_file(e):
+            try:
+                # Windows-only: os.startfile
+                if sys.platform == 'win32':
+                    os.startfile(path)
+                else:
+                    # Android/Linux/Mac - dosya açma desteklenmiyor
+                    pass
+            except Exception as err:
+                print(f"Dosya açma hatası: {err}")
+        
+        # Sadece Windows'ta "Dosyayı Aç" butonu göster
+        if sys.platform == 'win32':
+            self._show_success(
+                f"Dosya kaydedildi: {path}",
+                action_text="DOSYAYI AÇ",
+                on_action=open_file
+            )
+        else:
+            self._show_success(f"Dosya kaydedildi: {path}")
     
     def _create_backup_json(self):
         """JSON yedek oluşturur."""
@@ -285,14 +538,9 @@ class SettingsView(ft.Container):
         if not e.path:
             return
         
-        try:
-            if self._current_export == 'backup_csv':
-                import os
-                backup_path = os.path.join(e.path, 'ogrenci_takip_backup')
-                self.backup_manager.create_backup_csv(backup_path)
-                self._show_success(f"Yedek oluşturuldu: {backup_path}")
-        except Exception as err:
-            self._show_error(f"Hata: {str(err)}")
+        if self._current_export == 'backup_csv':
+            backup_path = os.path.join(e.path, 'ogrenci_takip_backup')
+            self._submit_export('backup_csv', None, backup_path)
     
     def _restore_backup(self):
         """Yedeği geri yükler."""
@@ -311,7 +559,9 @@ class SettingsView(ft.Container):
         filepath = e.files[0].path
         
         try:
+            # Önbellek yazıcının commit'inde temizlenir; günlük boşaldığı için geri alma yeniden yüklenir
             self.backup_manager.restore_backup_json(filepath)
+            self.db.reload_undo_history()
             self._show_success("Yedek başarıyla geri yüklendi!")
             if self.on_data_change:
                 self.on_data_change()
@@ -368,6 +618,130 @@ class SettingsView(ft.Container):
         dialog.open = True
         self.page.update()
     
+    def _get_db_info(self):
+        """Veritabanı dosya/boş alan bilgisini ve son bakım sonucunu metin olarak döndürür."""
+        if self.maintenance is None:
+            return "Bakım servisi kullanılamıyor."
+        
+        stats = self.maintenance.get_db_stats()
+        satirlar = [
+            f"Dosya boyutu: {self._format_size(stats['dosya_boyutu'])} "
+            f"(WAL: {self._format_size(stats['wal_boyutu'])})",
+            f"Boş alan: {stats['bos_sayfa']} sayfa ({self._format_size(stats['bos_boyut'])})",
+        ]
+        
+        rapor = self.maintenance.son_rapor
+        if rapor:
+            durum = "✓ Sorunsuz" if rapor['butunluk'] == 'ok' else f"⚠️ {rapor['butunluk']}"
+            if rapor['fk_hatasi']:
+                durum += f", {rapor['fk_hatasi']} sahipsiz kayıt"
+            satirlar.append(f"Son bakım: {rapor['tarih'].strftime('%d.%m.%Y %H:%M')} - {durum}")
+        else:
+            satirlar.append("Son bakım: henüz yapılmadı")
+        return "\n".join(satirlar)
+    
+    @staticmethod
+    def _format_size(bayt):
+        """Bayt değerini okunabilir boyuta çevirir."""
+        for birim in ("B", "KB", "MB"):
+            if bayt < 1024:
+                return f"{bayt:.0f} {birim}" if birim == "B" else f"{bayt:.1f} {birim}"
+            bayt /= 1024
+        return f"{bayt:.1f} GB"
+    
+    def _run_maintenance(self, e):
+        """Bakımı iş kuyruğuna koyar; sonuç iş bitince gösterilir."""
+        if self._bakim_isi is not None and not self._bakim_isi.bitti:
+            return
+        self._bakim_isi = self.jobs.submit(
+            self._IS_ADLARI['maintenance'],
+            lambda ilerleme, iptal: self.maintenance.run_maintenance(),
+        )
+    
+    def _show_maintenance_result(self, rapor):
+        """Biten bakımın kazancını ve bütünlük sonucunu gösterir (iş thread'inden çağrılır)."""
+        kazanc = rapor['once']['dosya_boyutu'] - rapor['sonra']['dosya_boyutu']
+        self.db_info_text.value = self._get_db_info()
+        if rapor['butunluk'] == 'ok':
+            self._show_success(f"Bakım tamamlandı! {self._format_size(max(kazanc, 0))} alan kazanıldı.")
+        else:
+            self._show_error(f"Bütünlük kontrolü hata buldu: {rapor['butunluk']}")
+    
+    def _build_diagnostics(self):
+        """
+        Veritabanı uyarılarını ve ölçüm raporundan en pahalı metot/eylem ve
+        yavaş sorgu satırlarını oluşturur.
+        """
+        rapor = instrumentation.get_report(limit=5)
+        toplam = rapor['toplam']
+        
+        def satir(metin, **kwargs):
+            return ft.Text(metin, size=13, selectable=True, **kwargs)
+        
+        uyarilar = []
+        if rapor['uyarilar']:
+            uyarilar.append(satir("Uyarılar:", weight=ft.FontWeight.BOLD))
+            uyarilar.extend(
+                satir(f"  {k['mesaj']}", color=ft.colors.ORANGE_800)
+                for k in rapor['uyarilar'][:5]
+            )
+        if not toplam['sorgu']:
+            durum = "Henüz ölçüm yok." if instrumentation.aktif else "Ölçüm kapalı."
+            return uyarilar + [ft.Text(durum, size=13, color=ft.colors.GREY_700)]
+        
+        def sayac(kayit, ad):
+            return (f"  {kayit[ad]}: {kayit['cagri']} çağrı, {kayit['sorgu']} sorgu, "
+                    f"{kayit['sure_ms']:.1f} ms, {kayit['satir']} satır")
+        
+        satirlar = uyarilar + [satir(
+            f"Toplam: {toplam['sorgu']} sorgu, {toplam['sure_ms']:.1f} ms, {toplam['satir']} satır",
+            weight=ft.FontWeight.BOLD,
+        )]
+        if rapor['eylemler']:
+            satirlar.append(satir("En yavaş eylemler:", weight=ft.FontWeight.BOLD))
+            satirlar.extend(satir(sayac(k, 'eylem')) for k in rapor['eylemler'][:5])
+        if rapor['metotlar']:
+            satirlar.append(satir("En yavaş metotlar:", weight=ft.FontWeight.BOLD))
+            satirlar.extend(satir(sayac(k, 'metot')) for k in rapor['metotlar'][:5])
+        if rapor['yavas_sorgular']:
+            satirlar.append(satir("Son yavaş sorgular:", weight=ft.FontWeight.BOLD))
+            for k in rapor['yavas_sorgular'][:5]:
+                plan = ' | '.join(k['plan']) if k['plan'] else '-'
+                satirlar.append(satir(
+                    f"  {k['sure_ms']:.1f} ms ({k['metot'] or '?'}): {k['sql'][:120]}\n"
+                    f"    Plan: {plan}",
+                    color=ft.colors.ORANGE_800,
+                ))
+        return satirlar
+    
+    def _refresh_diagnostics(self):
+        """Tanılama panelini günceller."""
+        self.diagnostics_column.controls = self._build_diagnostics()
+        self.diagnostics_column.update()
+    
+    def _on_diagnostics_toggle(self, e):
+        """Sorgu ölçümünü açar/kapatır."""
+        if e.control.value:
+            instrumentation.enable()
+        else:
+            instrumentation.disable()
+        self._refresh_diagnostics()
+    
+    def _reset_diagnostics(self, e):
+        """Toplanan ölçümleri siler."""
+        instrumentation.reset()
+        self._refresh_diagnostics()
+    
+    def _export_diagnostics(self):
+        """Ölçüm raporunu JSON olarak kaydeder (hata raporlarına eklemek için)."""
+        self._current_export = 'diagnostics_json'
+        self.save_file_picker.save_file(
+            dialog_title="Tanılama Raporu Kaydet",
+            file_name="tanilama.json",
+            file_type=ft.FilePickerFileType.CUSTOM,
+            allowed_extensions=["json"],
+        )
+    
     def _show_success(self, message, action_text=None, on_action=None):
         """Başarı mesajı gösterir."""
         self.page.snack_bar = ft.SnackBar(
@@ -392,10 +766,13 @@ class SettingsView(ft.Container):
         dialog.open = False
         self.page.update()
     
+    @tracer.traced(kategori='ui')
     def refresh(self):
         """Görünümü yeniler."""
         siniflar = self.db.get_all_siniflar()
         sinif_options = [ft.dropdown.Option(key="all", text="📚 Tüm Sınıflar")]
         sinif_options.extend([ft.dropdown.Option(key=str(s['id']), text=s['ad']) for s in siniflar])
         self.sinif_dropdown.options = sinif_options
+        self.db_info_text.value = self._get_db_info()
+        self.diagnostics_column.controls = self._build_diagnostics()
         self.update()
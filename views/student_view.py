@@ -1,24 +1,42 @@
 """
 Öğrenci yönetimi görünümü.
 """
+import asyncio
 import flet as ft
 from components.student_card import StudentCard
 from components.wheel_picker import WheelPicker
-from utils.helpers import filter_students_by_name
+from components.virtual_list import VirtualList
+from utils.tracing import tracer
+
+
+# Sütun -> DatabaseManager sıralaması
+_SQL_SIRALAMA = {
+    "number": "okul_no",
+    "name": "ad",
+    "surname": "soyad",
+    "class": "sinif",
+}
+
+# Sanal listede satır yüksekliği (IconButton + dikey dolgu)
+_SATIR_YUKSEKLIGI = 56
 
 
 class StudentView(ft.Container):
     """Öğrenci listesi ve yönetimi."""
     
-    def __init__(self, db_manager, on_update=None):
+    def __init__(self, db_manager, on_update=None, async_db=None):
         super().__init__()
         self.db = db_manager
+        self.async_db = async_db
         self.on_update = on_update
         self.selected_sinif = None
         self.search_text = ""
         self.filter_mode = "all"  # all, below_50, above_70
         self.sort_column = "number"  # number, name, surname, class, average
         self.sort_descending = False
+        self._ortalamalar = {}
+        self._ogrenci_idleri = []  # Listelenen öğrencilerin sıralı id'leri
+        self._yukleme_no = 0
         self._build_content()
     
     def _build_content(self):
@@ -74,8 +92,14 @@ class StudentView(ft.Container):
             border_radius=ft.border_radius.only(top_left=8, top_right=8),
         )
 
-        # Öğrenci listesi (scrollable)
-        self.student_list = ft.Column(spacing=0, scroll=ft.ScrollMode.AUTO)
+        # Öğrenci listesi (sanal: yalnızca görünen satırlar çizilir, satırlar
+        # yenilemede öğrenci id'sine göre yeniden kullanılır)
+        self.student_list = VirtualList(
+            self._ogrenci_satiri,
+            self._ogrenci_satirini_doldur,
+            satir_yuksekligi=_SATIR_YUKSEKLIGI,
+            expand=True,
+        )
         
         # Tablo container
         self.table_container = ft.Container(
@@ -136,6 +160,7 @@ class StudentView(ft.Container):
         self.expand = True
         self.refresh()  # did_mount yerine doğrudan çağır
     
+    @tracer.traced(kategori='ui')
     def refresh(self):
         """Listeyi yeniler."""
         self._update_sinif_dropdown()
@@ -159,112 +184,195 @@ class StudentView(ft.Container):
                 self.selected_sinif = "all"
             else:
                 self.selected_sinif = int(e.control.value)
-            self._load_students()
+            self._load_students(basa_don=True)
             self.update()
     
-    def _load_students(self):
-        """Öğrenci listesini yükler."""
+    @tracer.traced(kategori='render')
+    def _load_students(self, basa_don=False):
+        """
+        Öğrenci listesini yükler. Yalnızca sıralı id listesi okunur; satırlar
+        kaydırdıkça görünen pencere için veritabanından alınır.
+        """
         if not self.selected_sinif:
-            self.student_list.controls = []
+            self._yukleme_no += 1
+            self._ogrenci_idleri = []
+            self.student_list.set_items([], basa_don=True)
             self.update()
             return
         
-        # Tüm sınıflar seçiliyse
-        if self.selected_sinif == "all":
-            ogrenciler = self.db.get_all_ogrenciler(None)  # Tüm öğrenciler
-        else:
-            ogrenciler = self.db.get_all_ogrenciler(self.selected_sinif)
+        if self.async_db and self.page:
+            # Arama yazılırken UI bloklanmasın; okumalar havuzda yapılır
+            self.page.run_task(self._load_students_async, basa_don)
+            return
         
-        # Filtrele
+        self._yukleme_no += 1
+        sinif_id, siralama, azalan = self._liste_parametreleri()
         if self.search_text:
-            ogrenciler = filter_students_by_name(ogrenciler, self.search_text)
+            # İndeksli arama; tüm liste yüklenip Python'da süzülmez
+            ogrenci_idleri = [o['id'] for o in self.db.search_ogrenciler(
+                self.search_text, sinif_id, limit=None, siralama=siralama, azalan=azalan
+            )]
+        else:
+            ogrenci_idleri = self.db.get_ogrenci_idleri(sinif_id, siralama, azalan)
+        
+        # Ortalamalar tek sorguda
+        self._listeyi_goster(ogrenci_idleri, self.db.get_ortalama_tablosu(sinif_id), basa_don)
+    
+    @tracer.traced(kategori='ui')
+    async def _load_students_async(self, basa_don):
+        """Id listesini ve ortalamaları okuma havuzunda paralel çeker."""
+        self._yukleme_no += 1
+        yukleme_no = self._yukleme_no
+        sinif_id, siralama, azalan = self._liste_parametreleri()
+        arama = self.search_text
+        if arama:
+            idler = self.async_db.search_ogrenciler(
+                arama, sinif_id, limit=None, siralama=siralama, azalan=azalan
+            )
+        else:
+            idler = self.async_db.get_ogrenci_idleri(sinif_id, siralama, azalan)
+        try:
+            ogrenci_idleri, ortalamalar = await asyncio.gather(
+                idler, self.async_db.get_ortalama_tablosu(sinif_id)
+            )
+        except Exception as err:
+            if yukleme_no == self._yukleme_no and self.page:
+                self.page.snack_bar = ft.SnackBar(
+                    content=ft.Text(f"Öğrenci listesi yüklenemedi: {err}"),
+                    bgcolor=ft.colors.RED
+                )
+                self.page.snack_bar.open = True
+                self.page.update()
+            return
+        
+        # Bu arada arama/sınıf değiştiyse eski sonucu çizme
+        if yukleme_no != self._yukleme_no or self.page is None:
+            return
+        if arama:
+            ogrenci_idleri = [o['id'] for o in ogrenci_idleri]
+        self._listeyi_goster(ogrenci_idleri, ortalamalar, basa_don)
+    
+    def _liste_parametreleri(self):
+        """Seçili sınıf id'si (tümü için None) ve SQL sıralaması."""
+        sinif_id = None if self.selected_sinif == "all" else self.selected_sinif
+        # Ortalama dışındaki sıralamalar SQL'de (Türkçe sıralama anahtarıyla) yapılır
+        siralama = _SQL_SIRALAMA.get(self.sort_column, 'soyad')
+        azalan = self.sort_descending and self.sort_column in _SQL_SIRALAMA
+        return sinif_id, siralama, azalan
+    
+    def _listeyi_goster(self, ogrenci_idleri, ortalamalar, basa_don):
+        """Okunan id listesini süzer, sıralar ve sanal listeye verir."""
+        self._ortalamalar = ortalamalar
         
+        # Filtrele
         if self.filter_mode != "all":
             filtered = []
-            for o in ogrenciler:
-                avg = self.db.get_ogrenci_genel_ortalama(o['id'])
+            for oid in ogrenci_idleri:
+                avg = self._get_avg(oid)
                 if avg is None:
                     continue
                 if self.filter_mode == "below_50" and avg < 50:
-                    filtered.append(o)
+                    filtered.append(oid)
                 elif self.filter_mode == "above_70" and avg > 70:
-                    filtered.append(o)
+                    filtered.append(oid)
                 elif self.filter_mode == "above_85" and avg > 85:
-                    filtered.append(o)
-            ogrenciler = filtered
-        
-        # Sıralama
-        def get_sort_key(o):
-            if self.sort_column == "number":
-                try:
-                    return int(o.get('okul_no') or 0)
-                except ValueError:
-                    return 0
-            elif self.sort_column == "name":
-                return o.get('ad', '').lower()
-            elif self.sort_column == "surname":
-                return o.get('soyad', '').lower()
-            elif self.sort_column == "class":
-                return o.get('sinif_adi', '').lower()
-            elif self.sort_column == "average":
-                avg = self.db.get_ogrenci_genel_ortalama(o['id'])
-                return avg if avg is not None else -1
-            return 0
-            
-        ogrenciler.sort(key=get_sort_key, reverse=self.sort_descending)
+                    filtered.append(oid)
+            ogrenci_idleri = filtered
         
-        # Tablo satırları
-        self.student_list.controls = []
-        for i, ogrenci in enumerate(ogrenciler, 1):
-            avg = self.db.get_ogrenci_genel_ortalama(ogrenci['id'])
-            
-            row_content = ft.Row([
-                ft.Container(ft.Text(str(i)), width=40),
-                ft.Container(ft.Text(ogrenci['okul_no'] or '-'), width=80),
-                ft.Container(ft.Text(ogrenci.get('sinif_adi', '-'), size=12), width=80),
-                ft.Container(ft.Text(ogrenci['ad'], no_wrap=True, overflow=ft.TextOverflow.ELLIPSIS), expand=True),
-                ft.Container(ft.Text(ogrenci['soyad'], no_wrap=True, overflow=ft.TextOverflow.ELLIPSIS), expand=True),
-                ft.Container(
-                    ft.Container(
-                        content=ft.Text(
-                            f"{avg:.1f}" if avg else "-",
-                            color=ft.colors.WHITE,
-                            size=12,
-                            weight=ft.FontWeight.BOLD,
-                        ),
-                        bgcolor=self._get_avg_color(avg),
-                        border_radius=4,
-                        padding=ft.padding.symmetric(horizontal=8, vertical=2),
-                        alignment=ft.alignment.center,
-                    ),
-                    width=80,
-                    alignment=ft.alignment.center_left,
-                ),
-                ft.Container(
-                    ft.Row([
-                        ft.IconButton(ft.icons.VISIBILITY, tooltip="Detay", icon_size=18, 
-                                     on_click=lambda e, oid=ogrenci['id']: self._show_student_detail(oid)),
-                        ft.IconButton(ft.icons.EDIT, tooltip="Düzenle", icon_size=18, 
-                                     on_click=lambda e, o=ogrenci: self._show_edit_student_dialog(o)),
-                        ft.IconButton(ft.icons.DELETE, tooltip="Sil", icon_size=18, icon_color=ft.colors.RED_400,
-                                     on_click=lambda e, o=ogrenci: self._confirm_delete_student(o)),
-                    ], spacing=0, alignment=ft.MainAxisAlignment.END),
-                    width=120,
-                ),
-            ], alignment=ft.MainAxisAlignment.START)
+        # Ortalamaya göre sıralama (ortalama SQL sırasında yok)
+        if self.sort_column == "average":
+            def get_sort_key(oid):
+                avg = self._get_avg(oid)
+                return avg if avg is not None else -1
             
-            item = ft.Container(
-                content=row_content,
-                padding=ft.padding.symmetric(horizontal=15, vertical=8),
-                bgcolor=ft.colors.SURFACE_VARIANT if i % 2 == 0 else None,
-                border=ft.border.only(bottom=ft.border.BorderSide(1, ft.colors.OUTLINE_VARIANT)),
-                on_click=lambda e, oid=ogrenci['id']: self._show_student_detail(oid),
-                ink=True,
-            )
-            self.student_list.controls.append(item)
+            ogrenci_idleri.sort(key=get_sort_key, reverse=self.sort_descending)
         
+        # Tablo satırları: yalnızca görünen pencere
+        self._ogrenci_idleri = ogrenci_idleri
+        self.student_list.set_source(len(ogrenci_idleri), self._ogrenci_penceresi, basa_don)
         self.update()
     
+    def _ogrenci_penceresi(self, baslangic, bitis):
+        """Sanal listenin istediği aralıktaki öğrencileri veritabanından okur."""
+        ogrenciler = self.db.get_ogrenciler_by_ids(self._ogrenci_idleri[baslangic:bitis])
+        # Ortalama da satır verisine girer: değişirse yalnızca o satır yenilenir
+        for ogrenci in ogrenciler:
+            ogrenci['ortalama'] = self._get_avg(ogrenci['id'])
+        return ogrenciler
+    
+    def _get_avg(self, ogrenci_id):
+        """Öğrencinin genel ortalaması (yoksa None)."""
+        ortalama = self._ortalamalar.get(ogrenci_id)
+        return ortalama['genel'] if ortalama else None
+    
+    def _ogrenci_satiri(self):
+        """Boş öğrenci satırı; hücreler _ogrenci_satirini_doldur ile ayarlanır."""
+        hucreler = {
+            'sira': ft.Text(),
+            'okul_no': ft.Text(),
+            'sinif': ft.Text(size=12),
+            'ad': ft.Text(no_wrap=True, overflow=ft.TextOverflow.ELLIPSIS),
+            'soyad': ft.Text(no_wrap=True, overflow=ft.TextOverflow.ELLIPSIS),
+            'ortalama': ft.Text(color=ft.colors.WHITE, size=12, weight=ft.FontWeight.BOLD),
+            'detay': ft.IconButton(ft.icons.VISIBILITY, tooltip="Detay", icon_size=18),
+            'duzenle': ft.IconButton(ft.icons.EDIT, tooltip="Düzenle", icon_size=18),
+            'sil': ft.IconButton(ft.icons.DELETE, tooltip="Sil", icon_size=18, icon_color=ft.colors.RED_400),
+        }
+        hucreler['ortalama_kutu'] = ft.Container(
+            content=hucreler['ortalama'],
+            border_radius=4,
+            padding=ft.padding.symmetric(horizontal=8, vertical=2),
+            alignment=ft.alignment.center,
+        )
+        
+        row_content = ft.Row([
+            ft.Container(hucreler['sira'], width=40),
+            ft.Container(hucreler['okul_no'], width=80),
+            ft.Container(hucreler['sinif'], width=80),
+            ft.Container(hucreler['ad'], expand=True),
+            ft.Container(hucreler['soyad'], expand=True),
+            ft.Container(
+                hucreler['ortalama_kutu'],
+                width=80,
+                alignment=ft.alignment.center_left,
+            ),
+            ft.Container(
+                ft.Row([
+                    hucreler['detay'],
+                    hucreler['duzenle'],
+                    hucreler['sil'],
+                ], spacing=0, alignment=ft.MainAxisAlignment.END),
+                width=120,
+            ),
+        ], alignment=ft.MainAxisAlignment.START)
+        
+        return ft.Container(
+            content=row_content,
+            padding=ft.padding.symmetric(horizontal=15, vertical=8),
+            border=ft.border.only(bottom=ft.border.BorderSide(1, ft.colors.OUTLINE_VARIANT)),
+            ink=True,
+            data=hucreler,
+        )
+    
+    def _ogrenci_satirini_doldur(self, satir, sira, ogrenci):
+        """Satırın hücrelerini öğrenciye göre ayarlar (yalnızca değişenler gönderilir)."""
+        hucreler = satir.data
+        avg = ogrenci['ortalama']
+        
+        hucreler['sira'].value = str(sira + 1)
+        hucreler['okul_no'].value = ogrenci['okul_no'] or '-'
+        hucreler['sinif'].value = ogrenci.get('sinif_adi') or '-'
+        hucreler['ad'].value = ogrenci['ad']
+        hucreler['soyad'].value = ogrenci['soyad']
+        hucreler['ortalama'].value = f"{avg:.1f}" if avg else "-"
+        hucreler['ortalama_kutu'].bgcolor = self._get_avg_color(avg)
+        
+        hucreler['detay'].on_click = lambda e, oid=ogrenci['id']: self._show_student_detail(oid)
+        hucreler['duzenle'].on_click = lambda e, o=ogrenci: self._show_edit_student_dialog(o)
+        hucreler['sil'].on_click = lambda e, o=ogrenci: self._confirm_delete_student(o)
+        satir.on_click = lambda e, oid=ogrenci['id']: self._show_student_detail(oid)
+        satir.bgcolor = ft.colors.SURFACE_VARIANT if sira % 2 == 1 else None
+    
     def _get_avg_color(self, avg):
         """Ortalama için renk döndürür."""
         if avg is None:
@@ -280,21 +388,15 @@ class StudentView(ft.Container):
         else:
             return ft.colors.RED
     
-    def _on_sinif_change(self, e):
-        """Sınıf değiştiğinde."""
-        if e.control.value:
-            self.selected_sinif = int(e.control.value)
-            self._load_students()
-    
     def _on_search(self, e):
         """Arama değiştiğinde."""
         self.search_text = e.control.value
-        self._load_students()
+        self._load_students(basa_don=True)
     
     def _on_filter_change(self, e):
         """Filtre değiştiğinde."""
         self.filter_mode = e.control.value
-        self._load_students()
+        self._load_students(basa_don=True)
     
     def _show_student_detail(self, ogrenci_id):
         """Öğrenci detay kartını gösterir."""
@@ -545,4 +647,4 @@ class StudentView(ft.Container):
         self.list_header.content.controls[5].content = self._create_header_button("Ortalama", "average", width=80)
         
         self.list_header.update()
-        self._load_students()
+        self._load_students(basa_don=True)